@@ -0,0 +1,217 @@
+"""
+Shared benchmark fixtures.
+
+The ``benchmark`` fixture times a function, measures its peak memory use with
+:py:mod:`tracemalloc`, and compares the results with a stored baseline
+(:file:`benchmarks/baseline.json`)::
+
+    $ pytest benchmarks -s                        # report against the baseline
+    $ pytest benchmarks -s --benchmark-compare    # fail on regressions
+    $ pytest benchmarks -s --benchmark-save       # update the baseline
+
+Benchmarks marked ``slow`` (eg. 100k objects) take minutes, and only run with
+``--benchmark-slow``.
+
+Timings depend on the machine they're taken on, so only compare against a
+baseline recorded on the same machine.
+"""
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import pytest
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# results from this run, by benchmark name
+RESULTS = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("koordinates benchmarks")
+    group.addoption(
+        "--benchmark-baseline",
+        default=BASELINE_PATH,
+        help="Baseline results file (default: %(default)s)",
+    )
+    group.addoption(
+        "--benchmark-save",
+        action="store_true",
+        help="Save the results as the new baseline",
+    )
+    group.addoption(
+        "--benchmark-compare",
+        action="store_true",
+        help="Fail benchmarks which are slower than the baseline",
+    )
+    group.addoption(
+        "--benchmark-tolerance",
+        type=float,
+        default=1.5,
+        help="Allowed slowdown vs the baseline (default: %(default)sx)",
+    )
+    group.addoption(
+        "--benchmark-slow",
+        action="store_true",
+        help="Run slow benchmarks too",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: benchmark takes minutes to run")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("benchmark_slow"):
+        return
+    skip = pytest.mark.skip(reason="needs --benchmark-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+
+class Result(object):
+    """
+    Measurements from one benchmark.
+
+    :param str name: benchmark name.
+    :param int n: number of objects processed per run.
+    :param float wall: best wall-clock time of a run, in seconds.
+    :param float cpu: best process CPU time of a run, in seconds.
+    :param int peak: peak memory allocated during a run, in bytes.
+    :param str unit: what's being processed, for reporting.
+    """
+
+    def __init__(self, name, n, wall, cpu, peak, unit="object"):
+        self.name = name
+        self.n = n
+        self.unit = unit
+        self.wall = wall
+        self.cpu = cpu
+        self.peak = peak
+
+    @property
+    def throughput(self):
+        """Objects per second"""
+        return self.n / self.wall if self.wall else float("inf")
+
+    @property
+    def cpu_per_object(self):
+        return self.cpu / self.n
+
+    def as_dict(self):
+        return {
+            "n": self.n,
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "cpu_per_object": self.cpu_per_object,
+            "peak": self.peak,
+        }
+
+    def __str__(self):
+        return "%s: %d x %s, %.0f/s, %.2fus CPU/%s, %.1fMB peak" % (
+            self.name,
+            self.n,
+            self.unit,
+            self.throughput,
+            self.cpu_per_object * 1e6,
+            self.unit,
+            self.peak / 1024 ** 2,
+        )
+
+
+def _load_baseline(path):
+    try:
+        with open(path) as fp:
+            return json.load(fp)
+    except FileNotFoundError:
+        return {"results": {}}
+
+
+class Benchmark(object):
+    def __init__(self, name, config):
+        self.name = name
+        self.config = config
+
+    def _baseline(self):
+        path = self.config.getoption("benchmark_baseline")
+        return _load_baseline(path)["results"].get(self.name)
+
+    def __call__(self, func, n, rounds=None, unit="object"):
+        """
+        Runs ``func()`` several times, and records the best time.
+
+        :param function func: the code to benchmark.
+        :param int n: the number of objects ``func`` processes.
+        :param int rounds: number of timed runs. By default this scales down
+            as ``n`` goes up.
+        :param str unit: what ``n`` counts, for reporting.
+        :returns: the value returned by the last call to ``func``.
+        :rtype: object
+        """
+        if rounds is None:
+            rounds = max(1, min(5, 100000 // n))
+
+        # peak memory is measured separately, since tracing is slow
+        gc.collect()
+        tracemalloc.start()
+        try:
+            value = func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del value
+
+        wall = cpu = float("inf")
+        for i in range(rounds):
+            gc.collect()
+            w0, c0 = time.perf_counter(), time.process_time()
+            value = func()
+            wall = min(wall, time.perf_counter() - w0)
+            cpu = min(cpu, time.process_time() - c0)
+
+        result = Result(self.name, n, wall, cpu, peak, unit)
+        RESULTS[self.name] = result
+        print("\n%s" % result)
+
+        baseline = self._baseline()
+        if baseline:
+            ratio = result.cpu_per_object / baseline["cpu_per_object"]
+            print("  %.2fx baseline CPU/object" % ratio)
+            if self.config.getoption("benchmark_compare"):
+                tolerance = self.config.getoption("benchmark_tolerance")
+                assert ratio <= tolerance, "%s is %.2fx slower than the baseline" % (
+                    self.name,
+                    ratio,
+                )
+        return value
+
+
+@pytest.fixture
+def benchmark(request):
+    return Benchmark(request.node.name, request.config)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    if not (config.getoption("benchmark_save", False) and RESULTS):
+        return
+
+    path = config.getoption("benchmark_baseline")
+    data = _load_baseline(path)
+    data["machine"] = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+    data["results"].update(
+        {name: result.as_dict() for name, result in sorted(RESULTS.items())}
+    )
+    with open(path, "w") as fp:
+        json.dump(data, fp, indent=2, sort_keys=True)
+        fp.write("\n")
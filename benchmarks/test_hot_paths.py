@@ -0,0 +1,260 @@
+"""
+Hot path benchmarks.
+
+Each benchmark runs against synthetic payloads from
+:py:mod:`koordinates.simulator`, from 1 to 100k objects. HTTP traffic is
+recorded from the simulator once and then replayed from a cassette, so the
+measurements only include the client's own costs.
+"""
+import io
+import time
+
+import pytest
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from koordinates import Client, Layer
+from koordinates.simulator import Simulator, layer_payload
+from koordinates.sources import UploadSource
+
+
+SIZES = [
+    pytest.param(1, id="1"),
+    pytest.param(100, id="100"),
+    pytest.param(10000, id="10k"),
+    pytest.param(100000, id="100k", marks=pytest.mark.slow),
+]
+
+# export downloads & uploads, in MB
+FILE_SIZES = [
+    pytest.param(1, id="1MB"),
+    pytest.param(100, id="100MB"),
+]
+
+
+class _NullFile(object):
+    """Discards everything written to it"""
+
+    def write(self, data):
+        return len(data)
+
+
+@pytest.fixture(scope="module")
+def replay_listing(tmp_path_factory):
+    """
+    Records a full expanded listing of ``n`` layers, and returns a client
+    function to replay it.
+    """
+    cassettes = {}
+
+    def factory(n):
+        if n not in cassettes:
+            path = str(tmp_path_factory.mktemp("cassettes") / ("layers-%d" % n))
+            sim = Simulator(layers=n)
+            client = sim.client()
+            with client.record(path):
+                assert len(list(client.layers.list().expand())) == n
+            cassettes[n] = path
+        return cassettes[n]
+
+    return factory
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_query_iter(benchmark, replay_listing, n):
+    path = replay_listing(n)
+    client = Client(host="test.koordinates.com", token="test")
+    with client.replay(path):
+        layers = benchmark(lambda: list(client.layers.list().expand()), n=n)
+    assert len(layers) == n
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_query_iter_compact(benchmark, replay_listing, n):
+    path = replay_listing(n)
+    client = Client(host="test.koordinates.com", token="test")
+    with client.replay(path):
+        layers = benchmark(lambda: list(client.layers.list().expand().compact()), n=n)
+    assert len(layers) == n
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_query_iter_raw(benchmark, replay_listing, n):
+    path = replay_listing(n)
+    client = Client(host="test.koordinates.com", token="test")
+    with client.replay(path):
+        rows = benchmark(lambda: list(client.layers.list().expand().raw()), n=n)
+    assert len(rows) == n
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_query_iter_values(benchmark, replay_listing, n):
+    path = replay_listing(n)
+    client = Client(host="test.koordinates.com", token="test")
+    with client.replay(path):
+        rows = benchmark(
+            lambda: list(
+                client.layers.list().expand().values("id", "name", "updated_at")
+            ),
+            n=n,
+        )
+    assert len(rows) == n
+
+
+@pytest.mark.parametrize("stream", [False, True], ids=["buffered", "stream"])
+@pytest.mark.parametrize("n", SIZES)
+def test_query_iter_discard(benchmark, replay_listing, n, stream):
+    # peak memory when results aren't kept, with & without streaming pages
+    path = replay_listing(n)
+    client = Client(host="test.koordinates.com", token="test")
+    query = client.layers.list().expand()
+    if stream:
+        query = query.stream()
+    with client.replay(path):
+        count = benchmark(lambda: sum(1 for layer in query), n=n)
+    assert count == n
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_deserialize(benchmark, n):
+    client = Client(host="test.koordinates.com", token="test")
+    manager = client.get_manager(Layer)
+    payloads = [layer_payload(i + 1) for i in range(n)]
+
+    layers = benchmark(
+        lambda: [Layer()._deserialize(p, manager) for p in payloads], n=n
+    )
+    assert layers[-1].id == n
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_deserialize_access(benchmark, n):
+    # as test_deserialize, but converting every lazy field too
+    client = Client(host="test.koordinates.com", token="test")
+    manager = client.get_manager(Layer)
+    payloads = [layer_payload(i + 1) for i in range(n)]
+
+    def deserialize():
+        layers = [Layer()._deserialize(p, manager) for p in payloads]
+        for layer in layers:
+            layer._convert_lazy()
+        return layers
+
+    layers = benchmark(deserialize, n=n)
+    assert layers[-1].group.id
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_serialize(benchmark, n):
+    client = Client(host="test.koordinates.com", token="test")
+    manager = client.get_manager(Layer)
+    layers = [Layer()._deserialize(layer_payload(i + 1), manager) for i in range(n)]
+
+    data = benchmark(lambda: [layer._serialize() for layer in layers], n=n)
+    assert data[-1]["id"] == n
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_get_url(benchmark, n):
+    client = Client(host="test.koordinates.com", token="test")
+
+    urls = benchmark(
+        lambda: [
+            client.get_url("LAYER", "GET", "single", {"id": i}) for i in range(n)
+        ],
+        n=n,
+    )
+    assert urls[-1].endswith("/layers/%d/" % (n - 1))
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_reverse_url(benchmark, n):
+    client = Client(host="test.koordinates.com", token="test")
+    urls = [client.get_url("LAYER", "GET", "single", {"id": i}) for i in range(n)]
+
+    params = benchmark(lambda: [client.reverse_url("LAYER", u) for u in urls], n=n)
+    assert params[-1] == {"id": str(n - 1)}
+
+
+@pytest.mark.parametrize("mb", FILE_SIZES)
+def test_export_download(benchmark, mb):
+    sim = Simulator(export_size=mb * 1024 ** 2)
+    client = sim.client()
+    export = client.exports.get(1)
+
+    benchmark(lambda: export.download(_NullFile()), n=mb, unit="MB")
+    assert sim.bytes_sent >= mb * 1024 ** 2
+
+
+class _SinkAdapter(BaseAdapter):
+    """Reads and discards request bodies, responding with a new Source"""
+
+    def send(self, request, **kwargs):
+        body = request.body
+        while body.read(2 ** 16):
+            pass
+
+        r = Response()
+        r.status_code = 201
+        r.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+        r._content = b'{"id": 1, "name": "upload", "type": "upload"}'
+        r.request = request
+        r.url = request.url
+        return r
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("mb", FILE_SIZES)
+def test_upload_multipart(benchmark, mb):
+    client = Client(host="test.koordinates.com", token="test")
+    client.mount(_SinkAdapter())
+    content = b"\0" * (mb * 1024 ** 2)
+
+    def upload():
+        upload = UploadSource(title="upload")
+        upload.add_file(io.BytesIO(content), "data.zip")
+        return client.sources.create(upload)
+
+    source = benchmark(upload, n=mb, unit="MB")
+    assert source.id == 1
+
+
+def test_prefetch_slow_consumer():
+    # processing each page takes about as long as fetching the next one
+    sim = Simulator(layers=1000, latency=0.02)
+    client = sim.client()
+
+    def consume(query):
+        t0 = time.perf_counter()
+        for layer in query:
+            time.sleep(0.0002)
+        return time.perf_counter() - t0
+
+    sequential = consume(client.layers.list())
+    prefetched = consume(client.layers.list().prefetch(2))
+    print(
+        "\nprefetch: %.2fs sequential, %.2fs prefetched (%.1fx)"
+        % (sequential, prefetched, sequential / prefetched)
+    )
+    assert prefetched < sequential * 0.8
+
+
+def test_parallel_catalog_crawl():
+    sim = Simulator(layers=8000, sets=2000, latency=0.05)
+    client = sim.client()
+
+    def crawl(query):
+        t0 = time.perf_counter()
+        assert sum(1 for item in query) == 10000
+        return time.perf_counter() - t0
+
+    sequential = crawl(client.catalog.list())
+    parallel = crawl(client.catalog.list().parallel(16))
+    print(
+        "\nparallel: %.2fs sequential, %.2fs with 16 workers (%.1fx)"
+        % (sequential, parallel, sequential / parallel)
+    )
+    assert parallel < sequential / 2
@@ -0,0 +1,113 @@
+"""
+Memory footprint benchmarks.
+
+Catalog crawls can hold hundreds of thousands of model instances, so the
+memory retained by each deserialized object has a budget. Sizes are measured
+with :py:mod:`tracemalloc` in a fresh interpreter, from JSON parsed during
+the measurement (as it would be from a response), and fail if they go more
+than ``MEMORY_TOLERANCE`` over budget.
+
+When a change reduces memory use, lower the budgets to protect it.
+"""
+import subprocess
+import sys
+
+import pytest
+
+
+# Budgets, in bytes retained per object
+LAYER_BUDGET = 8400
+SET_BUDGET = 3850
+EXPORT_BUDGET = 2000
+CATALOG_BUDGET = 900
+
+MEMORY_TOLERANCE = 1.1
+
+SIZES = [
+    pytest.param(1000, id="1k"),
+    pytest.param(10000, id="10k"),
+    pytest.param(100000, id="100k", marks=pytest.mark.slow),
+]
+
+_SCRIPT = """
+import gc, json, tracemalloc
+from koordinates import Client, Export, Layer, Set
+from koordinates.simulator import export_payload, layer_payload, set_payload
+
+client = Client(host="test.koordinates.com", token="test")
+payloads = [json.dumps(%(payload)s) for i in range(%(n)d)]
+build = %(build)s
+
+gc.collect()
+tracemalloc.start()
+before = tracemalloc.get_traced_memory()[0]
+objects = [build(json.loads(p)) for p in payloads]
+gc.collect()
+after = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+assert len(objects) == len(payloads)
+print((after - before) / len(payloads))
+"""
+
+
+def _bytes_per_object(build, payload, n):
+    """
+    Returns the average memory retained by ``build(data)`` for ``n`` payloads
+    from the ``payload`` expression (of ``i``), JSON-encoded.
+
+    Measured in a fresh interpreter, so the result doesn't depend on what
+    earlier benchmarks left behind (eg. classes' shared attribute tables, or
+    the state of the allocator).
+    """
+    script = _SCRIPT % {"payload": payload, "n": n, "build": build}
+    return float(subprocess.check_output([sys.executable, "-c", script]))
+
+
+def _check(name, per_object, budget):
+    print("\n%s: %d bytes/object (budget %d)" % (name, per_object, budget))
+    assert per_object <= budget * MEMORY_TOLERANCE, (
+        "%s uses %d bytes/object, over the budget of %d"
+        % (name, per_object, budget)
+    )
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_layer_memory(n):
+    per_object = _bytes_per_object(
+        "lambda data: Layer()._deserialize(data, client.get_manager(Layer))",
+        "layer_payload(i + 1)",
+        n,
+    )
+    _check("Layer", per_object, LAYER_BUDGET)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_set_memory(n):
+    per_object = _bytes_per_object(
+        "lambda data: Set()._deserialize(data, client.get_manager(Set))",
+        "set_payload(i + 1)",
+        n,
+    )
+    _check("Set", per_object, SET_BUDGET)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_export_memory(n):
+    per_object = _bytes_per_object(
+        "lambda data: Export()._deserialize(data, client.get_manager(Export))",
+        "export_payload(i + 1)",
+        n,
+    )
+    _check("Export", per_object, EXPORT_BUDGET)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_catalog_memory(n):
+    # catalog listings are a mix of layer & set summaries
+    per_object = _bytes_per_object(
+        "client.catalog.create_from_result",
+        "layer_payload(i + 1, expanded=False)"
+        " if i % 4 else set_payload(i + 1, expanded=False)",
+        n,
+    )
+    _check("Catalog entry", per_object, CATALOG_BUDGET)
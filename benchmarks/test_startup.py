@@ -0,0 +1,70 @@
+"""
+Start-up cost benchmarks.
+
+``import koordinates`` and ``Client()`` are on the critical path of short-lived
+CLI tools and serverless functions, so both have a time budget. Imports are
+timed in a fresh interpreter, taking the best of several runs.
+"""
+import json
+import subprocess
+import sys
+import timeit
+
+import koordinates
+
+
+# Budgets, in seconds
+IMPORT_BUDGET = 0.025
+CLIENT_BUDGET = 0.00005
+FIRST_CLIENT_BUDGET = 0.5
+
+RUNS = 5
+
+
+def _measure_in_subprocess(code):
+    script = (
+        "import json, sys, time\n"
+        "t0 = time.perf_counter()\n"
+        "%s\n"
+        "elapsed = time.perf_counter() - t0\n"
+        "print(json.dumps({'elapsed': elapsed, 'modules': sorted(sys.modules)}))\n"
+    ) % code
+    results = []
+    for i in range(RUNS):
+        out = subprocess.check_output([sys.executable, "-c", script])
+        results.append(json.loads(out))
+    return min(results, key=lambda r: r["elapsed"])
+
+
+def test_import_time():
+    result = _measure_in_subprocess("import koordinates")
+    print("import koordinates: %.1fms" % (result["elapsed"] * 1000))
+    assert result["elapsed"] < IMPORT_BUDGET
+
+    # nothing heavy should have been imported
+    for name in ("requests", "requests_toolbelt", "dateutil", "koordinates.client"):
+        assert name not in result["modules"]
+
+
+def test_first_client_time():
+    result = _measure_in_subprocess(
+        "import koordinates\nkoordinates.Client(host='test.koordinates.com', token='test')"
+    )
+    print("import koordinates + Client(): %.1fms" % (result["elapsed"] * 1000))
+    assert result["elapsed"] < FIRST_CLIENT_BUDGET
+
+    # managers (and the modules defining them) are built on first access
+    assert "koordinates.layers" not in result["modules"]
+
+
+def test_client_time():
+    n = 1000
+    elapsed = min(
+        timeit.repeat(
+            lambda: koordinates.Client(host="test.koordinates.com", token="test"),
+            number=n,
+            repeat=RUNS,
+        )
+    )
+    print("Client(): %.1fus" % (elapsed / n * 1e6))
+    assert elapsed / n < CLIENT_BUDGET
@@ -6,6 +6,8 @@ Koordinates Python API Client Library
 :license: BSD, see LICENSE for more details.
 """
 
+import importlib
+
 from .exceptions import (
     KoordinatesException,
     ClientError,
@@ -23,13 +25,71 @@ from .exceptions import (
     ServiceUnvailable,
 )
 
-from .client import Client
-from .layers import Layer, Table
-from .licenses import License
-from .metadata import Metadata
-from .publishing import Publish
-from .sets import Set
-from .sources import Source, UploadSource
-from .users import Group, User
-from .permissions import Permission
-from .exports import Export, CropLayer, DownloadError
+
+# Submodules (and their dependencies, eg. requests & dateutil) are only
+# imported when one of their names is first accessed.
+_LAZY_ATTRIBUTES = {
+    "Client": "client",
+    "Layer": "layers",
+    "Table": "layers",
+    "License": "licenses",
+    "Metadata": "metadata",
+    "Publish": "publishing",
+    "Set": "sets",
+    "Source": "sources",
+    "UploadSource": "sources",
+    "Group": "users",
+    "User": "users",
+    "Permission": "permissions",
+    "Export": "exports",
+    "CropLayer": "exports",
+    "DownloadError": "exports",
+}
+
+_SUBMODULES = (
+    "base",
+    "catalog",
+    "client",
+    "exports",
+    "layers",
+    "licenses",
+    "metadata",
+    "permissions",
+    "publishing",
+    "sets",
+    "sources",
+    "users",
+    "utils",
+)
+
+__all__ = [
+    "KoordinatesException",
+    "ClientError",
+    "ClientValidationError",
+    "InvalidAPIVersion",
+    "ServerError",
+    "BadRequest",
+    "AuthenticationError",
+    "Forbidden",
+    "NotFound",
+    "NotAllowed",
+    "Conflict",
+    "RateLimitExceeded",
+    "InternalServerError",
+    "ServiceUnvailable",
+] + list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module("." + _LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    elif name in _SUBMODULES:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_SUBMODULES))
@@ -1,14 +1,32 @@
 import abc
+import array
+import codecs
 import collections
+import concurrent.futures
 import datetime
 import copy
+import functools
+import io
 import itertools
+import json
 import logging
+import os
+import queue
 import re
+import tempfile
+import threading
+import time
 
 import urllib
 
-from .exceptions import ClientValidationError
+import requests
+
+from .exceptions import (
+    ClientValidationError,
+    KoordinatesException,
+    NotFound,
+    ServerError,
+)
 from .utils import make_date, is_bound
 
 
@@ -25,24 +43,50 @@ class BaseManager(metaclass=abc.ABCMeta):
 
     # _URL_KEY = None
     model = None
+    # cleared if the API doesn't count list results for HEAD requests
+    _count_via_head = True
+    # query parameter the API accepts to select the fields in responses, if any
+    _FIELDS_PARAM = None
+    # list filter the API accepts for a comma-separated list of IDs, if any
+    _ID_FILTER = None
 
     def __init__(self, client):
         self.client = client
 
+    def __reduce_ex__(self, protocol):
+        # Managers registered on a Client pickle as a lookup against the
+        # (re-created) Client, so unpickled models stay bound to its managers.
+        client = getattr(self, "client", None)
+        if client is not None and client._manager_map.get(self.model) is self:
+            return (client.get_manager, (self.model,))
+        return super(BaseManager, self).__reduce_ex__(protocol)
+
     def _meta_attribute(self, attribute, default=None):
         return getattr(self.model._meta, attribute, default)
 
-    def create_from_result(self, result, **kwargs):
-        obj = self.model()
+    def create_from_result(self, result, compact=False, **kwargs):
+        if compact:
+            return _create_compact(
+                self.model, result, lambda obj: obj._deserialize(result, self, **kwargs)
+            )
+        obj = _new_result(self.model)
         return obj._deserialize(result, self, **kwargs)
 
-    def _get(self, target_url, expand=[]):
+    def _get(self, target_url, expand=[], fields=None):
         headers = {}
         if expand:
             headers["Expand"] = ",".join(expand)
 
+        if not fields:
+            r = self.client.request("GET", target_url, headers=headers)
+            return self.create_from_result(r.json())
+
+        deferred = _Deferred(only=fields, by_api=bool(self._FIELDS_PARAM))
+        if self._FIELDS_PARAM:
+            params = {self._FIELDS_PARAM: ",".join(sorted(deferred.only))}
+            target_url += "?" + urllib.parse.urlencode(params)
         r = self.client.request("GET", target_url, headers=headers)
-        return self.create_from_result(r.json())
+        return deferred.apply(self.create_from_result(deferred.trim(r.json())))
 
     def _reverse_url(self, url):
         return self.client.reverse_url(self._URL_KEY, url)
@@ -64,13 +108,84 @@ class Manager(BaseManager, metaclass=abc.ABCMeta):
         target_url = self.client.get_url(self._URL_KEY, "GET", "multi")
         return Query(self, target_url)
 
-    def get(self, id, expand=[]):
+    def get(self, id, expand=[], fields=None):
         """Fetches a Model instance determined by the value of `id`.
 
         :param id: numeric ID for the Model.
+        :param list fields: only fetch these fields. Other fields are fetched
+            if they're accessed. See :py:meth:`koordinates.base.Query.only`.
         """
         target_url = self.client.get_url(self._URL_KEY, "GET", "single", {"id": id})
-        return self._get(target_url, expand=expand)
+        return self._get(target_url, expand=expand, fields=fields)
+
+    def get_many(self, ids, expand=[], concurrency=8):
+        """
+        Fetches several Model instances by ID, concurrently. Duplicate IDs are
+        only fetched once. Errors fetching individual objects (from the API,
+        or connection errors) don't stop the others being fetched: they're
+        returned alongside the objects.
+
+        Where the API can filter lists by ID, the objects are fetched
+        :py:attr:`Query.MAX_PAGE_SIZE` at a time, and IDs missing from the
+        results are reported as :py:class:`koordinates.exceptions.NotFound`.
+        Otherwise each object is fetched separately.
+
+        >>> layers, errors = client.layers.get_many([12, 34, 56])
+        >>> list(errors)
+        [56]
+
+        :param list ids: numeric IDs for the Models.
+        :param list expand: expansions, as for :py:meth:`get`.
+        :param int concurrency: maximum number of concurrent requests.
+        :return: the objects that were found, in the order of ``ids``, and the
+            exceptions for the rest, by ID.
+        :rtype: tuple(list, dict)
+        """
+        if concurrency < 1:
+            raise ValueError("Concurrency must be >= 1")
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return [], {}
+
+        found = {}
+        errors = {}
+        if self._ID_FILTER and not expand:
+            size = Query.MAX_PAGE_SIZE
+            tasks = [ids[i : i + size] for i in range(0, len(ids), size)]
+            fetch = self._get_batch
+        else:
+            tasks = [[id] for id in ids]
+
+            def fetch(batch):
+                return {batch[0]: self.get(batch[0], expand=expand)}
+
+        with concurrent.futures.ThreadPoolExecutor(
+            min(concurrency, len(tasks)), thread_name_prefix="koordinates-get"
+        ) as executor:
+            futures = {executor.submit(fetch, batch): batch for batch in tasks}
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    found.update(future.result())
+                except (KoordinatesException, requests.RequestException) as e:
+                    # API & connection errors only affect the IDs in the task
+                    errors.update((id, e) for id in futures[future])
+
+        for id in ids:
+            if id not in found and id not in errors:
+                errors[id] = NotFound("%s not found" % id)
+        return [found[id] for id in ids if id in found], errors
+
+    def _get_batch(self, ids):
+        """ Fetches objects via the ID list filter, by requested ID """
+        by_id = {str(id): id for id in ids}
+        query = self.list().expand().page_size(len(ids))
+        query = query.extra(**{self._ID_FILTER: ",".join(by_id)})
+        found = {}
+        for obj in query:
+            id = by_id.get(str(obj.id))
+            if id is not None:
+                found[id] = obj
+        return found
 
     # Query methods we delegate
     def filter(self, *args, **kwargs):
@@ -115,6 +230,12 @@ class Query(object):
     and examine the ``X-Resource-Range`` header to produce a count.
     """
 
+    # largest page size the API allows
+    MAX_PAGE_SIZE = 100
+    # overlap between changed_since() runs, for changes which are saved with
+    # an earlier updated_at than ones we've already seen
+    CHANGED_SINCE_SKEW = datetime.timedelta(minutes=5)
+
     def __init__(
         self, manager, url, valid_filter_attributes=None, valid_sort_attributes=None
     ):
@@ -125,6 +246,20 @@ class Query(object):
         self._order_by = None
         self._expand = None
         self._extra = collections.defaultdict(list)
+        self._page_size = None
+        self._prefetch = 0
+        self._parallel = None
+        # builds each result from its raw dict, if not a model
+        self._row_factory = None
+        # fields left out via only() & defer()
+        self._deferred = None
+        self._compact = False
+        self._resume = None
+        self._checkpoint = None
+        # chunk size for streaming pages, if they're decoded incrementally
+        self._stream = None
+        # position of the latest iteration: (url, offset, position)
+        self._cursor_state = None
 
         self._valid_filter_attrs = (
             self._manager._meta_attribute("filter_attributes", [])
@@ -143,8 +278,10 @@ class Query(object):
     def __str__(self):
         return self._to_url()
 
-    def _request(self, url, method="GET"):
-        r = self._manager.client.request(method, url, headers=self._to_headers())
+    def _request(self, url, method="GET", **kwargs):
+        r = self._manager.client.request(
+            method, url, headers=self._to_headers(), **kwargs
+        )
         r.raise_for_status()
         return r
 
@@ -157,8 +294,13 @@ class Query(object):
         else:
             self._count = None
 
-    def _to_url(self):
-        """ Serialises this query into a request-able URL including parameters """
+    def _to_url(self, page_size=None):
+        """
+        Serialises this query into a request-able URL including parameters
+
+        :param int page_size: page size to request, if none has been set via
+            :py:meth:`.page_size`.
+        """
         url = self._target_url
 
         params = collections.defaultdict(list, copy.deepcopy(self._filters))
@@ -166,6 +308,12 @@ class Query(object):
             params["sort"] = self._order_by
         for k, vl in list(self._extra.items()):
             params[k] += vl
+        page_size = self._page_size or page_size
+        if page_size:
+            params["page_size"] = page_size
+        fields_param = self._manager._FIELDS_PARAM
+        if fields_param and self._deferred and self._deferred.only is not None:
+            params[fields_param] = ",".join(sorted(self._deferred.only))
 
         if params:
             url += "?" + urllib.parse.urlencode(params, doseq=True)
@@ -189,42 +337,291 @@ class Query(object):
         """
         return response.links.get("page-next", {}).get("url", None)
 
-    def __iter__(self):
+    def _fetch_page(self, url):
         """
-        Execute this query and return the results (generally as Model objects)
+        Fetch a page of raw results, as a :py:class:`Page`
+        """
+        t0 = time.perf_counter()
+        r = self._request(url)
+        page_results = r.json()
+        elapsed = time.perf_counter() - t0
+
+        # Update position
+        self._update_range(r)
+
+        # Paginate via Link headers
+        # Link URLs will include the query parameters, so we can use it as an entire URL.
+        return Page(
+            url,
+            page_results,
+            next_url=self._next_url(r),
+            range=r.headers.get("X-Resource-Range"),
+            bytes=len(r.content),
+            elapsed=elapsed,
+        )
+
+    def _stream_page(self, url):
+        """
+        Fetch a page of raw results as a :py:class:`Page`, where the results
+        are decoded from the response as they're iterated over.
+        """
+        t0 = time.perf_counter()
+        r = self._request(url, stream=True)
+        page = Page(
+            url,
+            None,
+            next_url=self._next_url(r),
+            range=r.headers.get("X-Resource-Range"),
+            elapsed=time.perf_counter() - t0,
+        )
+        self._update_range(r)
+
+        def chunks():
+            try:
+                for chunk in r.iter_content(self._stream):
+                    page.bytes += len(chunk)
+                    yield chunk
+            finally:
+                r.close()
+
+        def results():
+            # adds the time spent reading & decoding the results to elapsed,
+            # but not the time spent using them
+            decoded = _iter_json_array(chunks())
+            end = object()
+            while True:
+                t1 = time.perf_counter()
+                result = next(decoded, end)
+                page.elapsed += time.perf_counter() - t1
+                if result is end:
+                    return
+                yield result
+
+        page.results = _StreamedResults(results())
+        return page
+
+    def _fetch_first_page(self, url=None):
         """
-        if hasattr(self, "_first_page"):
+        Fetch the first page of raw results, or the page at ``url`` when
+        resuming.
+        """
+        if url is not None:
+            return self._fetch_page(url)
+        elif hasattr(self, "_first_page"):
             # if len() has been called on this Query, we have a cached page
-            # of results & a next url
-            page_results, url = self._first_page
+            first_page = self._first_page
             del self._first_page
+            return first_page
+        return self._fetch_page(self._to_url(page_size=self.MAX_PAGE_SIZE))
+
+    def _pages(self, url=None):
+        """
+        Execute this query and return each page of raw results, starting at
+        ``url`` if given.
+        """
+        if self._stream and url is None and not hasattr(self, "_first_page"):
+            url = self._to_url(page_size=self.MAX_PAGE_SIZE)
+        fetch = self._stream_page if self._stream else self._fetch_page
+
+        page = fetch(url) if url is not None else self._fetch_first_page()
+        yield page
+
+        while page.next_url:
+            page = fetch(page.next_url)
+            yield page
+
+    def _parallel_pages(self, workers, ordered, url=None):
+        """
+        Execute this query and return each page of raw results, fetching
+        pages after the first concurrently.
+
+        The first page gives the total count (from ``X-Resource-Range``) and
+        the page size, so the URLs of all the other pages are known.
+        """
+        page = self._fetch_first_page(url)
+        yield page
+
+        page_size = len(page.results)
+        if not page.next_url:
+            return
+        elif self._count is None or not page_size:
+            # can't tell how many pages there are
+            yield from self._pages(page.next_url)
+            return
+
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(page.url).query)
+        first = int(query.get("page", ["1"])[0]) + 1
+        page_count = -(-self._count // page_size)
+        urls = (_page_url(page.next_url, p) for p in range(first, page_count + 1))
+
+        with concurrent.futures.ThreadPoolExecutor(
+            workers, thread_name_prefix="koordinates-page"
+        ) as executor:
+            # limit the number of pages waiting to be consumed
+            pending = collections.deque()
+
+            def submit():
+                for page_url in itertools.islice(urls, workers * 2 - len(pending)):
+                    pending.append(executor.submit(self._fetch_page, page_url))
+
+            try:
+                submit()
+                while pending:
+                    if ordered:
+                        future = pending.popleft()
+                    else:
+                        done, _ = concurrent.futures.wait(
+                            pending, return_when=concurrent.futures.FIRST_COMPLETED
+                        )
+                        future = done.pop()
+                        pending.remove(future)
+                    page = future.result()
+                    submit()
+                    yield page
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _unordered(self):
+        """ Whether pages of results arrive out of order, via :py:meth:`.parallel` """
+        return bool(self._parallel) and not self._parallel[1] and not self._stream
+
+    def _page_stream(self):
+        """
+        Execute this query and return each page of raw results, via the
+        configured strategy (sequential, prefetched or parallel), resuming &
+        checkpointing as needed, and keeping track of the position for
+        :py:attr:`.cursor`
+        """
+        resume = self._resume
+        url = resume.url if resume else None
+        skip = resume.offset if resume else 0
+        position = resume.position if resume else 0
+        checkpoint, every = self._checkpoint or (None, 0)
+
+        if resume is not None and url is None:
+            # finished
+            self._cursor_state = (None, 0, position)
+            return
+        elif self._parallel and not self._stream:
+            if checkpoint and self._unordered():
+                raise ValueError("Can't checkpoint unordered parallel iteration")
+            pages = self._parallel_pages(*self._parallel, url=url)
         else:
-            url = self._to_url()
-            r = self._request(url)
-            page_results = r.json()
+            pages = self._pages(url)
+            if self._prefetch and not self._stream:
+                pages = _prefetch_pages(pages, self._prefetch)
 
-            # Update position
-            self._update_range(r)
+        try:
+            for i, page in enumerate(pages):
+                if skip:
+                    # already consumed before resuming
+                    page.skip(skip)
+                    skip = 0
+                elif checkpoint and i and i % every == 0:
+                    # everything before this page has been consumed
+                    checkpoint(QueryCursor(self, page.url, 0, position, self._count))
+
+                page.position = position
+                yield page
+                position += len(page.results)
+                # next_url is None after the last page
+                self._cursor_state = (page.next_url, 0, position)
+        finally:
+            pages.close()
+
+    def _raw_results(self):
+        """
+        Execute this query and return each raw result, keeping track of the
+        position for :py:attr:`.cursor`
+        """
+        pages = self._page_stream()
+        try:
+            for page in pages:
+                position = page.position
+                # streamed pages don't know how many results they have
+                last = None if page.streamed else len(page.results) - 1
+                for i, raw_result in enumerate(page.results):
+                    # the position after this result
+                    position += 1
+                    if last is None or i < last:
+                        self._cursor_state = (page.url, page.offset + i + 1, position)
+                    else:
+                        self._cursor_state = (page.next_url, 0, position)
+                    yield raw_result
+        finally:
+            pages.close()
 
-            # Point to the next page
-            url = self._next_url(r)
+    def iter_pages(self):
+        """
+        Execute this query and return each page of results as a
+        :py:class:`Page`, with the response details. Useful for processing
+        results in batches::
 
-        for raw_result in page_results:
-            yield self._manager.create_from_result(raw_result)
+            for page in client.layers.list().iter_pages():
+                db.insert_many(page.items)
+                print(page.range, page.bytes, page.elapsed)
 
-        while url:
-            r = self._request(url)
-            page_results = r.json()
+        Works with :py:meth:`.prefetch`, :py:meth:`.parallel`,
+        :py:meth:`.resume` and :py:meth:`.checkpoint` in the same way as
+        iterating over the results does.
 
-            # Update position
-            self._update_range(r)
+        :rtype: iterator
+        """
+        pages = self._page_stream()
+        try:
+            for page in pages:
+                page.items = [self._create(r) for r in page.results]
+                yield page
+        finally:
+            pages.close()
+
+    @property
+    def cursor(self):
+        """
+        A :py:class:`QueryCursor` for the position of the most recent
+        iteration over this query, just after the latest result. Pass it to
+        :py:meth:`.resume` to carry on from there. ``None`` if the query
+        hasn't been iterated over.
+
+        Not available for unordered :py:meth:`.parallel` iteration, where
+        results from later pages can arrive before earlier ones.
 
-            for raw_result in page_results:
-                yield self._manager.create_from_result(raw_result)
+        :rtype: QueryCursor
+        """
+        if self._unordered():
+            raise ValueError("Can't resume unordered parallel iteration")
+        if self._cursor_state is None:
+            return None
+        url, offset, position = self._cursor_state
+        return QueryCursor(self, url, offset, position, self._count)
 
-            # Paginate via Link headers
-            # Link URLs will include the query parameters, so we can use it as an entire URL.
-            url = r.links.get("page-next", {}).get("url", None)
+    def __iter__(self):
+        """
+        Execute this query and return the results (generally as Model objects)
+        """
+        results = self._raw_results()
+        try:
+            for raw_result in results:
+                yield self._create(raw_result)
+        finally:
+            results.close()
+
+    def _create(self, raw_result):
+        """ Build a result from its raw dict, as set by :py:meth:`.raw` etc """
+        deferred = self._deferred
+        if deferred is not None:
+            raw_result = deferred.trim(raw_result)
+        if self._row_factory is not None:
+            return self._row_factory(raw_result)
+
+        if self._compact:
+            obj = self._manager.create_from_result(raw_result, compact=True)
+        else:
+            obj = self._manager.create_from_result(raw_result)
+        if deferred is not None and isinstance(obj, ModelBase):
+            deferred.apply(obj)
+        return obj
 
     def __len__(self):
         """
@@ -235,34 +632,333 @@ class Query(object):
         # https://bugs.python.org/issue39829
         # so we need to make sure it is cached and doesn't do a request every time.
         if self._count is None:
-            r = self._request(self._to_url())
-            self._update_range(r)
-            self._first_page = (r.json(), self._next_url(r))
-            if self._count is None and self._first_page[1] is None:
+            # the page is kept for iteration, which usually follows
+            self._first_page = self._fetch_page(
+                self._to_url(page_size=self.MAX_PAGE_SIZE)
+            )
+            if self._count is None and self._first_page.next_url is None:
                 # this is the only page
-                self._count = len(self._first_page[0])
+                self._count = len(self._first_page.results)
         return self._count
 
-    def __getitem__(self, k):
+    def count(self):
         """
-        Limited slicing support ([N] and [:N] only, for positive N)
+        Returns the number of results, without downloading them. Unlike
+        :py:func:`len`, this doesn't fetch and keep the first page of results.
+
+        Uses a ``HEAD`` request where the API supports it, otherwise a request
+        for a single result.
+
+        :rtype: int
         """
-        if isinstance(k, int) and k >= 0:
+        if self._count is not None:
+            return self._count
+
+        manager = self._manager
+        url = self._to_url(page_size=1)
+        if manager._count_via_head:
             try:
-                return next(itertools.islice(self.__iter__(), k, None))
-            except StopIteration:
-                raise IndexError(k)
-
-        elif (
-            not isinstance(k, slice)
-            or k.start is not None
-            or k.step is not None
-            or k.stop is None
-            or k.stop <= 0
-        ):
-            raise ValueError("Only query[:+N] or query[+N] slicing is supported.")
+                self._update_range(manager.client.request("HEAD", url))
+            except ServerError as e:
+                logger.debug("HEAD %s failed, counting via GET: %s", url, e)
+                if e.response is not None and e.response.status_code in (405, 501):
+                    # HEAD isn't supported. Other errors may be temporary.
+                    manager._count_via_head = False
+            else:
+                if self._count is None:
+                    # HEAD works, but doesn't count the results
+                    manager._count_via_head = False
+
+        if self._count is None:
+            page = self._fetch_page(url)
+            if self._count is None:
+                # no X-Resource-Range, so count the hard way
+                self._count = len(page.results)
+                if page.next_url:
+                    pages = self.page_size(self.MAX_PAGE_SIZE)._pages()
+                    self._count = sum(len(page.results) for page in pages)
+        return self._count
+
+    def exists(self):
+        """
+        Returns whether there are any results, without downloading them.
+
+        :rtype: bool
+        """
+        return self.count() > 0
+
+    def counts(self, filters, workers=8):
+        """
+        Returns counts for several filtered variations of this query, fetched
+        concurrently.
+
+        >>> client.layers.list().counts({
+        ...     "vector": {"kind": "vector"},
+        ...     "raster": {"kind": "raster"},
+        ... })
+        {'vector': 1234, 'raster': 56}
+
+        :param dict filters: filter arguments (see :py:meth:`.filter`) by label.
+        :param int workers: maximum number of concurrent requests.
+        :return: counts by label.
+        :rtype: dict
+        """
+        queries = {label: self.filter(**f) for label, f in filters.items()}
+        if not queries:
+            return {}
+        with concurrent.futures.ThreadPoolExecutor(
+            min(workers, len(queries)), thread_name_prefix="koordinates-count"
+        ) as executor:
+            futures = {
+                label: executor.submit(q.count) for label, q in queries.items()
+            }
+            return {label: f.result() for label, f in futures.items()}
+
+    def __getitem__(self, k):
+        """
+        Indexing & slicing support. Only the pages holding the requested
+        results are fetched, concurrently if there's more than one.
+
+        Negative indexes, and slices with no end, need the result count first,
+        via :py:func:`len`.
+        """
+        if isinstance(k, int):
+            if k < 0:
+                k += len(self)
+                if k < 0:
+                    raise IndexError("Query index out of range")
+            results = self._fetch_range(k, k + 1)
+            if not results:
+                raise IndexError("Query index out of range")
+            return results[0]
+
+        elif not isinstance(k, slice):
+            raise TypeError("Query indices must be integers or slices")
+
+        if k.step == 0:
+            raise ValueError("slice step cannot be zero")
+        elif k.stop is None or k.stop < 0 or (k.start or 0) < 0 or (k.step or 1) < 0:
+            indices = range(*k.indices(len(self)))
+        else:
+            indices = range(k.start or 0, k.stop, k.step or 1)
+
+        if not indices:
+            return []
+        lo, hi = min(indices), max(indices) + 1
+        results = self._fetch_range(lo, hi)
+        return [results[i - lo] for i in indices if i - lo < len(results)]
+
+    def _range_page_size(self, lo, hi):
+        """
+        Returns the smallest page size which has results ``lo`` to ``hi`` on
+        a single page, or the largest page size if there isn't one.
+        """
+        for page_size in range(hi - lo, self.MAX_PAGE_SIZE + 1):
+            if lo // page_size == (hi - 1) // page_size:
+                return page_size
+        return self.MAX_PAGE_SIZE
+
+    def _fetch_range(self, lo, hi):
+        """
+        Returns results ``lo`` to ``hi``, fetching only the pages they're on.
+        """
+        if hasattr(self, "_first_page") and hi <= len(self._first_page.results):
+            # already have them from len()
+            raw_results = self._first_page.results[lo:hi]
+        else:
+            page_size = self._page_size or self._range_page_size(lo, hi)
+            first, last = lo // page_size + 1, (hi - 1) // page_size + 1
+            url = self._to_url(page_size=page_size)
+            urls = [
+                url if p == 1 else _page_url(url, p) for p in range(first, last + 1)
+            ]
+
+            if len(urls) == 1:
+                pages = [self._fetch_page(urls[0])]
+            else:
+                workers = self._parallel[0] if self._parallel else 4
+                with concurrent.futures.ThreadPoolExecutor(
+                    min(workers, len(urls)), thread_name_prefix="koordinates-page"
+                ) as executor:
+                    pages = list(executor.map(self._fetch_page, urls))
+
+            if any(len(p.results) < page_size and p.next_url for p in pages):
+                # the server used a different page size, so page numbers
+                # don't line up with ours
+                pages = self.page_size(page_size)._pages()
+                raw_results = list(
+                    itertools.islice(
+                        itertools.chain.from_iterable(page.results for page in pages),
+                        lo,
+                        hi,
+                    )
+                )
+            else:
+                offset = (first - 1) * page_size
+                raw_results = [r for page in pages for r in page.results][
+                    lo - offset : hi - offset
+                ]
+
+        return [self._create(r) for r in raw_results]
+
+    def cache(self, max_in_memory=None, spill_dir=None):
+        """
+        Returns a :py:class:`QueryResult` which executes this query once, and
+        keeps the results for repeated iteration, indexing and slicing.
+
+        Results are fetched as they're needed, so eg. ``result[5]`` only
+        fetches the first page.
+
+        :param int max_in_memory: number of results to keep in memory. Any
+            more are written to a temporary file, and deserialized again when
+            they're accessed. By default all results are kept in memory.
+        :param str spill_dir: directory for the temporary file. By default
+            the system temporary directory.
+        :rtype: QueryResult
+        """
+        return QueryResult(self, max_in_memory=max_in_memory, spill_dir=spill_dir)
 
-        return list(itertools.islice(self.__iter__(), k.stop))
+    def changed_since(self, checkpoint, save=None, skew=None):
+        """
+        Returns the results created or updated since the last run, by
+        filtering and sorting on ``updated_at``. For periodic syncs::
+
+            for layer in client.layers.list().changed_since("layers.checkpoint"):
+                sync(layer)
+
+        At the end of iteration the new checkpoint is saved, so the next run
+        starts from there. If iteration stops early, the checkpoint isn't
+        updated and the next run fetches the same results again.
+
+        Each run starts ``skew`` before the newest ``updated_at`` from the
+        last one, to catch changes which were saved after that run with an
+        earlier timestamp. Results in the overlap which haven't changed since
+        the last run (including ones with the same ``updated_at`` as the
+        checkpoint) are skipped.
+
+        :param checkpoint: path of a checkpoint file, which is created if it
+            doesn't exist and replaced atomically when it's updated.
+            Alternatively, a checkpoint ``dict`` passed to a previous
+            ``save`` callback, or ``None`` to fetch everything.
+        :param save: a function called with the new checkpoint ``dict``
+            instead of writing the file.
+        :param datetime.timedelta skew: overlap between runs. By default
+            :py:attr:`CHANGED_SINCE_SKEW`.
+        :rtype: iterator
+        """
+        if skew is None:
+            skew = self.CHANGED_SINCE_SKEW
+        if save is None:
+            if not isinstance(checkpoint, (str, os.PathLike)):
+                raise TypeError("changed_since() needs a checkpoint path or save()")
+            path = checkpoint
+            state = _load_checkpoint(path)
+            save = functools.partial(_save_checkpoint, path)
+        else:
+            state = checkpoint or {}
+
+        q = self.order_by("updated_at")
+        latest = make_date(state.get("updated_at")) or None
+        if latest is not None:
+            q = q.filter(updated_at__gte=(latest - skew).isoformat())
+        return q._iter_changed(state.get("seen", {}), latest, skew, save)
+
+    def _iter_changed(self, seen, latest, skew, save):
+        # results which might be in the next run's overlap
+        recent = collections.deque()
+
+        for raw_result in self._raw_results():
+            key = raw_result.get("url") or raw_result.get("id")
+            if key is not None:
+                # JSON object keys are strings
+                key = str(key)
+            updated_at = raw_result.get("updated_at")
+            if key is None or seen.get(key) != updated_at:
+                yield self._create(raw_result)
+
+            timestamp = make_date(updated_at)
+            if not timestamp:
+                continue
+            if latest is None or timestamp > latest:
+                latest = timestamp
+            recent.append((timestamp, key, updated_at))
+            # results are sorted, so older ones are out of the overlap
+            while recent and recent[0][0] < latest - skew:
+                recent.popleft()
+
+        save(
+            {
+                "updated_at": latest.isoformat() if latest is not None else None,
+                "seen": {
+                    key: updated_at
+                    for timestamp, key, updated_at in recent
+                    if key is not None and timestamp >= latest - skew
+                },
+            }
+        )
+
+    def to_columns(self, fields, format="dict", chunk_size=10000):
+        """
+        Returns the values of ``fields`` for every result, as columns,
+        without building model objects. Use ``__`` to get values from nested
+        objects, eg. ``group__name``. Fields named ``*_at`` are converted to
+        UTC datetimes.
+
+        See :py:mod:`koordinates.columns`.
+
+        :param list fields: field names.
+        :param str format: ``dict`` for a dict of lists, ``numpy`` for a NumPy
+            structured array, or ``arrow`` for a PyArrow table.
+        :param int chunk_size: number of rows to convert at a time.
+        """
+        from .columns import to_columns
+
+        return to_columns(self, fields, format=format, chunk_size=chunk_size)
+
+    def dump(
+        self,
+        path,
+        format=None,
+        compression=None,
+        fields=None,
+        progress=None,
+        row_group_size=10000,
+    ):
+        """
+        Writes every result to a file, a page at a time, so memory use stays
+        constant however many results there are. If the dump is interrupted,
+        calling ``dump()`` again with the same query and path resumes it.
+        Dumps can't use unordered :py:meth:`.parallel` queries, since there'd
+        be no position to resume from.
+
+        See :py:mod:`koordinates.dump`.
+
+        :param str path: output file.
+        :param str format: ``ndjson`` or ``parquet``. By default, ``parquet``
+            if ``path`` ends with ``.parquet``, otherwise ``ndjson``.
+        :param str compression: for ``ndjson``, ``gzip``, ``bz2`` or ``xz``
+            (by default, based on the ``path`` extension). For ``parquet``, a
+            Parquet codec (default ``snappy``).
+        :param list fields: only write these fields (use ``__`` for nested
+            fields). By default, all of them.
+        :param progress: a function called with a
+            :py:class:`koordinates.dump.DumpStats` after each page.
+        :param int row_group_size: for ``parquet``, the number of rows per
+            row group (and the number held in memory).
+        :return: the number of rows & bytes written, and the rates.
+        :rtype: koordinates.dump.DumpStats
+        """
+        from .dump import dump
+
+        return dump(
+            self,
+            path,
+            format=format,
+            compression=compression,
+            fields=fields,
+            progress=progress,
+            row_group_size=row_group_size,
+        )
 
     def _clone(self):
         q = Query(
@@ -276,6 +972,15 @@ class Query(object):
         q._order_by = self._order_by
         q._expand = self._expand
         q._extra = collections.defaultdict(list, copy.deepcopy(self._extra))
+        q._page_size = self._page_size
+        q._prefetch = self._prefetch
+        q._parallel = self._parallel
+        q._row_factory = self._row_factory
+        q._deferred = self._deferred
+        q._compact = self._compact
+        q._resume = self._resume
+        q._checkpoint = self._checkpoint
+        q._stream = self._stream
         return q
 
     def extra(self, **params):
@@ -338,6 +1043,733 @@ class Query(object):
         q._expand = True
         return q
 
+    def only(self, *fields):
+        """
+        Only fetch the given fields of each result. Where the API supports
+        it the other fields are left out of the responses, otherwise they're
+        discarded as the results are decoded.
+
+        The returned models fetch their missing fields from the API
+        (via :py:meth:`Model.refresh`) the first time one is accessed.
+
+        Calling ``Query.only()`` replaces any previous ``only()`` fields.
+        ``id`` and ``url`` are always included.
+
+        :param str fields: field names.
+        :rtype: Query
+        """
+        q = self._clone()
+        defer = self._deferred.defer if self._deferred else ()
+        q._deferred = _Deferred(
+            only=fields, defer=defer, by_api=bool(self._manager._FIELDS_PARAM)
+        )
+        return q
+
+    def defer(self, *fields):
+        """
+        Leave the given fields out of each result. This is the opposite of
+        :py:meth:`.only`, and appends to any previous ``defer()`` fields.
+
+        :param str fields: field names.
+        :rtype: Query
+        """
+        q = self._clone()
+        only = self._deferred.only if self._deferred else None
+        defer = (self._deferred.defer if self._deferred else frozenset()) | set(fields)
+        q._deferred = _Deferred(
+            only=only, defer=defer, by_api=bool(self._manager._FIELDS_PARAM)
+        )
+        return q
+
+    def resume(self, cursor):
+        """
+        Carry on iterating from a :py:class:`QueryCursor`, from
+        :py:attr:`.cursor` or a :py:meth:`.checkpoint`. The query must be the
+        same as the one the cursor came from.
+
+        :param QueryCursor cursor: where to resume from. A ``dict`` from
+            :py:meth:`QueryCursor.as_dict` is also accepted.
+        :rtype: Query
+        """
+        if isinstance(cursor, dict):
+            cursor = QueryCursor.from_dict(cursor)
+        if cursor.query != str(self):
+            raise ValueError(
+                "Cursor is for a different query: %s (not %s)" % (cursor.query, self)
+            )
+        q = self._clone()
+        q._resume = cursor
+        q._count = cursor.count
+        return q
+
+    def checkpoint(self, callback, every=1):
+        """
+        Call ``callback`` with a :py:class:`QueryCursor` during iteration,
+        after every ``every`` pages of results have been consumed. If the
+        process dies, resuming from the last checkpoint (via
+        :py:meth:`.resume`) fetches at most ``every`` pages of results again::
+
+            for layer in client.layers.list().checkpoint(save, every=10):
+                ...
+
+        Checkpoints aren't possible with unordered :py:meth:`.parallel`
+        iteration.
+
+        :param callback: a function taking a :py:class:`QueryCursor`.
+        :param int every: number of pages between checkpoints.
+        :rtype: Query
+        """
+        if every < 1:
+            raise ValueError("Checkpoint interval must be >= 1")
+        q = self._clone()
+        q._checkpoint = (callback, every)
+        return q
+
+    def stream(self, chunk_size=65536):
+        """
+        Decode each page of results incrementally as the response arrives,
+        rather than reading and decoding the whole page first. Results are
+        returned as soon as they've been received, and memory use is bounded
+        by the size of a result rather than of a page, which helps for
+        big expanded pages.
+
+        Pages are fetched one at a time, so :py:meth:`.prefetch` and
+        :py:meth:`.parallel` are ignored when streaming.
+
+        :param int chunk_size: number of bytes to read at a time.
+        :rtype: Query
+        """
+        if chunk_size < 1:
+            raise ValueError("Stream chunk size must be >= 1")
+        q = self._clone()
+        q._stream = chunk_size
+        return q
+
+    def raw(self):
+        """
+        Return each result as the ``dict`` decoded from the API response,
+        rather than as a model object.
+
+        Building model objects (with their nested objects and parsed dates)
+        is the main cost of iterating over large queries, so this is much
+        faster when you don't need them.
+
+        :rtype: Query
+        """
+        q = self._clone()
+        q._row_factory = _raw_row
+        return q
+
+    def compact(self):
+        """
+        Return each result as a compact model object, which keeps its fields
+        in ``__slots__`` rather than an instance ``__dict__``. This saves
+        memory when holding on to lots of results, eg. in a :py:meth:`.cache`.
+
+        Compact objects are instances of a subclass of the model, generated
+        with a slot for each attribute the model sets from results with the
+        same fields. Any other attributes are kept in ``__dict__`` as usual.
+        Otherwise they behave like (and compare equal to) the usual objects,
+        and can be pickled.
+
+        :rtype: Query
+        """
+        q = self._clone()
+        q._compact = True
+        return q
+
+    def values(self, *fields, flat=False):
+        """
+        Return each result as a tuple of the values of ``fields``, rather than
+        as a model object. Use ``__`` to get values from nested objects,
+        eg. ``values("id", "group__name")``. Missing values are ``None``.
+
+        Values are as they are in the API response, so eg. dates aren't
+        parsed.
+
+        :param str fields: field names.
+        :param bool flat: with a single field, return its values rather than
+            1-tuples.
+        :rtype: Query
+        """
+        if not fields:
+            raise ValueError("values() needs at least one field")
+        elif flat and len(fields) > 1:
+            raise ValueError("values(flat=True) only works with a single field")
+
+        paths = tuple(tuple(f.split("__")) for f in fields)
+        q = self._clone()
+        if flat:
+            q._row_factory = functools.partial(_lookup, paths[0])
+        else:
+            q._row_factory = functools.partial(_values_row, paths)
+        return q
+
+    def page_size(self, page_size):
+        """
+        Set the number of results to fetch in each request. By default
+        iteration uses the largest page size the API allows
+        (:py:attr:`MAX_PAGE_SIZE`), and slicing only fetches as many results
+        as it needs.
+
+        :param int page_size: number of results per page.
+        :rtype: Query
+        """
+        if page_size < 1:
+            raise ValueError("Page size must be >= 1")
+        q = self._clone()
+        q._page_size = page_size
+        return q
+
+    def prefetch(self, depth=2):
+        """
+        Fetch pages of results on a background thread while the current page
+        is being processed, keeping up to ``depth`` pages ready. This helps
+        when processing each result takes a while.
+
+        The background thread stops when iteration finishes or is abandoned.
+
+        :param int depth: number of pages to fetch ahead. ``0`` disables prefetching.
+        :rtype: Query
+        """
+        if depth < 0:
+            raise ValueError("Prefetch depth must be >= 0")
+        q = self._clone()
+        q._prefetch = depth
+        return q
+
+    def parallel(self, workers=4, ordered=True):
+        """
+        Fetch pages of results concurrently. Once the first page gives the
+        total number of results and the page size, the remaining pages are
+        fetched by up to ``workers`` threads.
+
+        :param int workers: maximum number of concurrent requests. ``0``
+            disables parallel fetching.
+        :param bool ordered: return results in order. If ``False``, pages of
+            results are returned as soon as they're fetched.
+        :rtype: Query
+        """
+        if workers < 0:
+            raise ValueError("Parallel workers must be >= 0")
+        q = self._clone()
+        q._parallel = (workers, ordered) if workers else None
+        return q
+
+
+class QueryResult(object):
+    """
+    The results of a :py:class:`Query`, fetched once and kept for repeated
+    access. Created via :py:meth:`Query.cache`.
+
+    Supports iteration, :py:func:`len`, indexing and slicing. Results are
+    fetched from the API as they're needed, and after that access by index is
+    constant-time.
+
+    Results beyond ``max_in_memory`` are kept as JSON in a temporary file,
+    which is removed by :py:meth:`close`, or when the ``QueryResult`` is
+    garbage-collected. ``QueryResult`` can also be used as a context manager.
+
+    If fetching results fails, the error is raised again by anything that
+    needs the rest of the results. Results fetched before it are still
+    available.
+    """
+
+    def __init__(self, query, max_in_memory=None, spill_dir=None):
+        if max_in_memory is not None and max_in_memory < 0:
+            raise ValueError("max_in_memory must be >= 0")
+        self.query = query
+        self._max_in_memory = max_in_memory
+        self._spill_dir = spill_dir
+        self._items = []
+        self._spill = None
+        # file offset of each spilled result
+        self._offsets = array.array("q")
+        self._raw = query._raw_results()
+        # the exception fetching results failed with, if any
+        self._error = None
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return "<%s: %s>" % (
+            self.__class__.__name__,
+            self.query._manager.model.__name__,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def _length(self):
+        return len(self._items) + len(self._offsets)
+
+    @property
+    def complete(self):
+        """ Whether all the results have been fetched """
+        return self._raw is None
+
+    def _fill(self, n=None):
+        """ Fetch results until there are at least ``n``, or all of them """
+        with self._lock:
+            while self._raw is not None and (n is None or self._length < n):
+                if self._error is not None:
+                    # the generator is finished, but the results aren't
+                    raise self._error
+                try:
+                    raw_result = next(self._raw)
+                except StopIteration:
+                    self._raw = None
+                    break
+                except Exception as e:
+                    self._error = e
+                    raise
+
+                limit = self._max_in_memory
+                if limit is None or len(self._items) < limit:
+                    self._items.append(self.query._create(raw_result))
+                else:
+                    if self._spill is None:
+                        self._spill = tempfile.TemporaryFile(dir=self._spill_dir)
+                    self._spill.seek(0, io.SEEK_END)
+                    self._offsets.append(self._spill.tell())
+                    self._spill.write(json.dumps(raw_result).encode("utf-8") + b"\n")
+
+    def _get(self, i):
+        if i < len(self._items):
+            return self._items[i]
+        with self._lock:
+            self._spill.seek(self._offsets[i - len(self._items)])
+            raw_result = json.loads(self._spill.readline().decode("utf-8"))
+        return self.query._create(raw_result)
+
+    def __len__(self):
+        self._fill()
+        return self._length
+
+    def __iter__(self):
+        i = 0
+        while True:
+            if i >= self._length:
+                self._fill(i + 1)
+                if i >= self._length:
+                    return
+            yield self._get(i)
+            i += 1
+
+    def __getitem__(self, k):
+        if isinstance(k, int):
+            if k < 0:
+                self._fill()
+                k += self._length
+            else:
+                self._fill(k + 1)
+            if not 0 <= k < self._length:
+                raise IndexError("QueryResult index out of range")
+            return self._get(k)
+
+        elif not isinstance(k, slice):
+            raise TypeError("QueryResult indices must be integers or slices")
+
+        if k.stop is None or k.stop < 0 or (k.start or 0) < 0 or (k.step or 1) < 0:
+            self._fill()
+        else:
+            self._fill(k.stop)
+        return [self._get(i) for i in range(*k.indices(self._length))]
+
+    def close(self):
+        """
+        Stop fetching results, and remove the temporary file. Results which
+        have already been fetched are still available if they're in memory.
+        """
+        with self._lock:
+            if self._raw is not None:
+                self._raw.close()
+                self._raw = None
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+                del self._offsets[:]
+
+
+def _profiled_deserialize(method):
+    """
+    Times a model's ``_deserialize()`` while its client is being profiled.
+    See :py:meth:`koordinates.client.Client.profile`.
+    """
+
+    @functools.wraps(method)
+    def _deserialize(self, data, manager, *args):
+        profiler = manager.client._profiler
+        if profiler is None:
+            return method(self, data, manager, *args)
+        # nested calls (super(), inner models) count towards the outer one
+        with profiler.phase("deserialize", objects=1):
+            return method(self, data, manager, *args)
+
+    return _deserialize
+
+
+class Page(object):
+    """
+    A page of results from :py:meth:`Query.iter_pages`.
+
+    :ivar list items: the results, as model objects (or as set by
+        :py:meth:`Query.raw` etc).
+    :ivar list results: the raw results, as decoded from the response. When
+        :py:meth:`Query.stream` is used, these are decoded as they're
+        iterated over, and can only be iterated over once.
+    :ivar str url: URL of the page.
+    :ivar str next_url: URL of the next page, or ``None`` for the last page.
+    :ivar str range: the ``X-Resource-Range`` response header
+        (eg. ``"0-100/2500"``), if any.
+    :ivar int position: index of the first result in the whole query.
+    :ivar int offset: index of the first result within the page, if some
+        were skipped when resuming.
+    :ivar int bytes: size of the response body.
+    :ivar float elapsed: seconds taken to fetch and decode the page. When
+        :py:meth:`Query.stream` is used, this is only complete once the
+        results have all been iterated over.
+    """
+
+    def __init__(self, url, results, next_url=None, range=None, bytes=0, elapsed=0.0):
+        self.url = url
+        self.results = results
+        self.next_url = next_url
+        self.range = range
+        self.bytes = bytes
+        self.elapsed = elapsed
+        self.items = None
+        self.position = 0
+        self.offset = 0
+
+    def __repr__(self):
+        return "<%s: %s>" % (self.__class__.__name__, self.range or len(self))
+
+    def __len__(self):
+        """ Number of results. For streamed pages, the number read so far. """
+        return len(self.results)
+
+    def __iter__(self):
+        return iter(self.results if self.items is None else self.items)
+
+    @property
+    def streamed(self):
+        """ Whether the results are decoded as they're iterated over """
+        return isinstance(self.results, _StreamedResults)
+
+    def skip(self, n):
+        """ Drop the first ``n`` results """
+        if self.streamed:
+            for _ in itertools.islice(self.results, n):
+                pass
+            self.results.count = 0
+        else:
+            self.results = self.results[n:]
+        self.offset += n
+
+    @property
+    def count(self):
+        """ Total number of results in the query, from :py:attr:`range` """
+        m = re.match(r"\d+-\d+/(\d+)$", self.range or "")
+        return int(m.group(1)) if m else None
+
+
+class QueryCursor(object):
+    """
+    A position in the results of a :py:class:`Query`, which can be saved and
+    used to resume iteration later via :py:meth:`Query.resume`.
+
+    :py:meth:`as_dict` & :py:meth:`from_dict` convert cursors to and from
+    JSON-serializable dicts, and cursors can also be pickled.
+
+    :ivar str query: URL of the query.
+    :ivar str url: URL of the page holding the next result, or ``None`` if
+        there are no more results.
+    :ivar int offset: index of the next result within that page.
+    :ivar int position: number of results before the next one.
+    :ivar int count: total number of results, if known.
+    """
+
+    def __init__(self, query, url, offset, position, count=None):
+        self.query = str(query)
+        self.url = url
+        self.offset = offset
+        self.position = position
+        self.count = count
+
+    def __repr__(self):
+        return "<%s: %s/%s>" % (
+            self.__class__.__name__,
+            self.position,
+            "?" if self.count is None else self.count,
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, QueryCursor) and self.as_dict() == other.as_dict()
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    @property
+    def done(self):
+        """ Whether there are no more results """
+        return self.url is None
+
+    def as_dict(self):
+        """ :rtype: dict """
+        return {
+            "query": self.query,
+            "url": self.url,
+            "offset": self.offset,
+            "position": self.position,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """ :rtype: QueryCursor """
+        return cls(**data)
+
+
+class _Deferred(object):
+    """
+    Fields left out of results, via :py:meth:`Query.only` and ``defer()``.
+
+    A name is only deferred if it's a field which was actually left out of a
+    result, so other missing attributes don't cause a request. Where the API
+    leaves out the fields which aren't in ``only`` (``by_api``) they're never
+    seen, so all of those names count.
+    """
+
+    # models can't be refreshed without these
+    REQUIRED = frozenset(["id", "url"])
+
+    def __init__(self, only=None, defer=(), by_api=False):
+        self.only = None if only is None else frozenset(only) | self.REQUIRED
+        self.defer = frozenset(defer) - self.REQUIRED
+        self.by_api = by_api
+        # fields which trim() has left out of results
+        self.trimmed = set()
+
+    def __contains__(self, name):
+        if name in self.trimmed:
+            return True
+        return self.by_api and self.only is not None and name not in self.only
+
+    def _leaves_out(self, name):
+        return name in self.defer or (self.only is not None and name not in self.only)
+
+    def trim(self, raw_result):
+        """ Returns ``raw_result`` without the deferred fields """
+        if isinstance(raw_result, dict):
+            leaves_out = self._leaves_out
+            result = {k: v for k, v in raw_result.items() if not leaves_out(k)}
+            if len(result) < len(raw_result):
+                self.trimmed.update(raw_result.keys() - result.keys())
+            return result
+        return raw_result
+
+    def apply(self, obj):
+        """
+        Marks a model as missing the deferred fields. Some models set
+        defaults (eg. ``None``) for fields which weren't in their data, which
+        are removed so accessing them fetches the real values.
+        """
+        # compact models' defaults are in their slots, and looking at the
+        # overflow __dict__ would allocate it
+        overflow = not obj._compact_slots
+        for name, value in _instance_fields(obj, overflow=overflow):
+            if not name.startswith("_") and name in self:
+                object.__delattr__(obj, name)
+        obj._deferred = self
+        return obj
+
+
+class _StreamedResults(object):
+    """ Iterates over results once, counting them """
+
+    def __init__(self, results):
+        self._results = results
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for result in self._results:
+            self.count += 1
+            yield result
+
+
+def _iter_json_array(chunks):
+    """
+    Decodes the elements of a JSON array incrementally, from chunks of
+    UTF-8 encoded bytes.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    whitespace = re.compile(r"[ \t\n\r]*")
+    buf = ""
+    pos = 0
+    # what's expected next: "[", the first "value" or "]", a "value", the
+    # "next" "," or "]", or the "end" (whitespace only)
+    expect = "["
+
+    chunks = iter(chunks)
+    final = False
+    while not final:
+        chunk = next(chunks, None)
+        final = chunk is None
+        buf = buf[pos:] + text_decoder.decode(chunk or b"", final=final)
+        pos = 0
+
+        while True:
+            pos = whitespace.match(buf, pos).end()
+            if pos == len(buf):
+                break
+            c = buf[pos]
+            if expect == "[":
+                if c != "[":
+                    raise ValueError("Expected a JSON array")
+                expect = "first"
+                pos += 1
+                continue
+            elif expect == "end":
+                raise ValueError("Extra data after the JSON array")
+            elif c == "]" and expect in ("first", "next"):
+                expect = "end"
+                pos += 1
+                continue
+            elif expect == "next":
+                if c != ",":
+                    raise ValueError("Expected ',' or ']' in the JSON array")
+                expect = "value"
+                pos += 1
+                continue
+            elif c in ",]":
+                raise ValueError("Expected a value in the JSON array")
+
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if final:
+                    raise
+                # wait for the rest of it
+                break
+            if end == len(buf) and not final and not isinstance(value, (dict, list)):
+                # a number might continue in the next chunk
+                break
+            yield value
+            expect = "next"
+            pos = end
+
+    if expect != "end":
+        raise ValueError("Incomplete JSON array")
+
+
+def _load_checkpoint(path):
+    """ Reads a :py:meth:`Query.changed_since` checkpoint file """
+    try:
+        with open(path, "r") as fp:
+            return json.load(fp)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_checkpoint(path, state):
+    """ Atomically replaces a :py:meth:`Query.changed_since` checkpoint file """
+    # a unique temporary file, so concurrent writers don't clobber each other
+    fp = tempfile.NamedTemporaryFile(
+        "w",
+        dir=os.path.dirname(path) or ".",
+        prefix="%s." % os.path.basename(path),
+        suffix=".tmp",
+        delete=False,
+    )
+    try:
+        with fp:
+            json.dump(state, fp, indent=2)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(fp.name, path)
+    except BaseException:
+        os.remove(fp.name)
+        raise
+
+
+def _raw_row(raw_result):
+    return raw_result
+
+
+def _lookup(path, raw_result):
+    """ Returns the value at ``path`` in a raw result, or ``None`` """
+    value = raw_result
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _values_row(paths, raw_result):
+    return tuple(_lookup(path, raw_result) for path in paths)
+
+
+def _page_url(url, page):
+    """ Returns ``url`` with the ``page`` query parameter replaced """
+    parts = urllib.parse.urlsplit(url)
+    params = [
+        (k, v)
+        for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if k != "page"
+    ]
+    params.append(("page", str(page)))
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(params)))
+
+
+def _prefetch_pages(pages, depth):
+    """
+    Iterates ``pages`` on a background thread, keeping up to ``depth`` items
+    ready in a queue. Closing the returned generator stops the thread.
+    """
+    ready = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def producer():
+        try:
+            for page in pages:
+                ready.put((page, None))
+                if stop.is_set():
+                    return
+            ready.put((done, None))
+        except Exception as e:
+            ready.put((None, e))
+        finally:
+            pages.close()
+
+    thread = threading.Thread(target=producer, name="koordinates-prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            page, error = ready.get()
+            if error is not None:
+                raise error
+            elif page is done:
+                return
+            yield page
+    finally:
+        stop.set()
+        # unblock the producer if it's waiting for space in the queue
+        try:
+            while True:
+                ready.get_nowait()
+        except queue.Empty:
+            pass
+
 
 class ModelMeta(type):
     """
@@ -345,6 +1777,8 @@ class ModelMeta(type):
     """
 
     def __new__(meta, name, bases, attrs):
+        if "_deserialize" in attrs:
+            attrs["_deserialize"] = _profiled_deserialize(attrs["_deserialize"])
         klass = super(ModelMeta, meta).__new__(meta, name, bases, attrs)
         try:
             ModelBase
@@ -440,11 +1874,140 @@ class ModelMeta(type):
         return klass
 
 
+def _instance_fields(obj, overflow=True):
+    """
+    Returns the attributes set on a model instance as ``(name, value)``
+    pairs, including those in the slots of a compact model.
+
+    :param bool overflow: for compact models, whether to include attributes
+        in the instance ``__dict__``.
+    """
+    if not obj._compact_slots:
+        return list(obj.__dict__.items())
+    fields = []
+    for name in obj._compact_slots:
+        try:
+            fields.append((name, object.__getattribute__(obj, name)))
+        except AttributeError:
+            pass
+    if overflow:
+        fields.extend(obj.__dict__.items())
+    return fields
+
+
+def _instance_field(obj, name, default=None):
+    """ Returns an attribute without fetching deferred or lazy fields """
+    try:
+        return object.__getattribute__(obj, name)
+    except AttributeError:
+        return default
+
+
+def _unset(obj, names):
+    """ Removes attributes from a model instance, if they're set """
+    # not via obj.__dict__, which would make CPython allocate one
+    for name in names:
+        try:
+            object.__delattr__(obj, name)
+        except AttributeError:
+            pass
+
+
+def _new_result(model):
+    """
+    Returns a new instance of ``model`` to deserialize a result into. It's
+    marked as new, so :py:meth:`SerializableBase._deserialize` doesn't look
+    for existing values to replace.
+    """
+    obj = model()
+    obj._lazy = None
+    return obj
+
+
+# types of deserialized values which don't need SerializableBase.__setattr__
+_PLAIN_TYPES = frozenset(
+    (str, int, float, bool, type(None), list, dict, datetime.datetime)
+)
+
+# fields which _deserialize_value() converts: dates & users
+_LAZY_SUFFIXES = ("_at", "_by")
+
+
+# marks lazy fields which have been converted, in SerializableBase._lazy
+_CONVERTED = object()
+
+# tuples of lazy field names, shared by the objects with the same ones
+_LAZY_NAMES = {}
+_LAZY_NAMES_MAX = 256
+
+
+def _lazy_names(lazy):
+    """ Returns the names of the lazy fields which haven't been converted """
+    if not lazy:
+        return []
+    return [n for n, v in zip(lazy[0], lazy[1:]) if v is not _CONVERTED]
+
+
+def _lazy_fields(names, values):
+    """
+    Returns the ``_lazy`` value for fields with raw ``values``: a tuple of
+    the (shared) tuple of names, then the values.
+    """
+    if not names:
+        return ()
+    names = tuple(names)
+    shared = _LAZY_NAMES.get(names)
+    if shared is None:
+        shared = names
+        if len(_LAZY_NAMES) < _LAZY_NAMES_MAX:
+            _LAZY_NAMES[names] = names
+    return (shared,) + tuple(values)
+
+
 class SerializableBase(object):
     """
     Base class for simple serialization.
     """
 
+    # names of the attributes kept in __slots__, for compact models
+    _compact_slots = ()
+    # functions converting the raw values of fields, as ``f(obj, value)``.
+    # These fields, and dates & users, are converted on first access.
+    _converters = {}
+
+    def __getattr__(self, name):
+        # only called for attributes which aren't set: convert fields left as
+        # raw values by _deserialize(), and keep the result
+        lazy = _instance_field(self, "_lazy")
+        if not lazy or name not in lazy[0]:
+            raise AttributeError(
+                "%r object has no attribute %r" % (self.__class__.__name__, name)
+            )
+        i = lazy[0].index(name) + 1
+        raw = lazy[i]
+        if raw is _CONVERTED:
+            # converted by another thread since this lookup started
+            return object.__getattribute__(self, name)
+
+        converter = self._converters.get(name)
+        if converter is not None:
+            value = converter(self, raw)
+        else:
+            value = self._deserialize_value(name, raw)
+        setattr(self, name, value)
+        # don't hold on to the raw value too. _lazy is replaced rather than
+        # changed, since copies of this object share it.
+        lazy = lazy[:i] + (_CONVERTED,) + lazy[i + 1 :]
+        if lazy.count(_CONVERTED) == len(lazy) - 1:
+            lazy = ()
+        object.__setattr__(self, "_lazy", lazy)
+        return value
+
+    def _convert_lazy(self):
+        """ Converts all the fields which haven't been accessed yet """
+        for name in _lazy_names(_instance_field(self, "_lazy")):
+            getattr(self, name)
+
     def __setattr__(self, name, value):
         if isinstance(value, ModelBase) and not name.startswith("_"):
             # set the ._parent attribute on the passed-in Model instance
@@ -455,7 +2018,13 @@ class SerializableBase(object):
         """
         Deserialise from JSON response data.
 
-        String items named ``*_at`` are turned into dates.
+        String items named ``*_at`` are turned into dates. Items with a
+        function in ``_converters`` are converted by it (or are ``None`` if
+        they're missing or empty).
+
+        Dates and converted items are kept as they are in ``data`` until
+        they're first accessed, so objects that are only partly used don't
+        pay for converting the rest.
 
         Filters out:
         * attribute names in ``Meta.deserialize_skip``
@@ -471,10 +2040,46 @@ class SerializableBase(object):
         except AttributeError:  # _meta not available
             skip = []
 
-        for key, value in list(data.items()):
-            if key not in skip:
+        converters = self._converters
+        # names & raw values of the fields to convert later
+        names = []
+        values = []
+        # skip calling __setattr__ for values which aren't models, unless a
+        # subclass overrides it
+        fast = type(self).__setattr__ is SerializableBase.__setattr__
+        for key, value in data.items():
+            if key in skip:
+                continue
+            elif key in converters:
+                if value:
+                    names.append(key)
+                    values.append(value)
+                else:
+                    object.__setattr__(self, key, None)
+            elif value and key.endswith(_LAZY_SUFFIXES):
+                names.append(key)
+                values.append(value)
+            else:
                 value = self._deserialize_value(key, value)
-                setattr(self, key, value)
+                if fast and type(value) in _PLAIN_TYPES:
+                    object.__setattr__(self, key, value)
+                else:
+                    setattr(self, key, value)
+        for key in converters:
+            if key not in data and key not in skip:
+                object.__setattr__(self, key, None)
+
+        previous = _instance_field(self, "_lazy", False)
+        if previous is not None:
+            # not a new object: keep the fields which haven't been converted
+            # yet, and drop any earlier values of the lazy fields
+            if previous:
+                pending = dict(zip(previous[0], previous[1:]))
+                pending.update(zip(names, values))
+                names = [n for n, v in pending.items() if v is not _CONVERTED]
+                values = [pending[n] for n in names]
+            _unset(self, names)
+        object.__setattr__(self, "_lazy", _lazy_fields(names, values))
         return self
 
     def _deserialize_value(self, key, value):
@@ -501,8 +2106,9 @@ class SerializableBase(object):
         """
         skip = set(getattr(self._meta, "serialize_skip", []))
 
+        self._convert_lazy()
         r = {}
-        for k, v in list(self.__dict__.items()):
+        for k, v in _instance_fields(self):
             if k.startswith("_"):
                 continue
             elif k in skip:
@@ -536,8 +2142,9 @@ class ModelBase(SerializableBase, metaclass=ModelMeta):
         return "<%s: %s>" % (self.__class__.__name__, self)
 
     def __str__(self):
-        s = str(getattr(self, "id", None))
-        if getattr(self, "title", None):
+        # doesn't use getattr(), which could fetch deferred fields
+        s = str(_instance_field(self, "id"))
+        if _instance_field(self, "title"):
             s += " - %s" % self.title
         return s
 
@@ -644,6 +2251,27 @@ class Model(ModelBase):
             ...
     """
 
+    def __getattr__(self, name):
+        lazy = _instance_field(self, "_lazy")
+        if lazy and name in lazy[0]:
+            return super(Model, self).__getattr__(name)
+
+        # only called for attributes which aren't set: fetch fields left out
+        # via Query.only() / defer()
+        deferred = _instance_field(self, "_deferred")
+        if deferred is None or name.startswith("_") or name not in deferred:
+            raise AttributeError(
+                "%r object has no attribute %r" % (self.__class__.__name__, name)
+            )
+        elif not self._is_bound:
+            raise AttributeError(
+                "%r must be bound to fetch the deferred field %r" % (self, name)
+            )
+
+        logger.debug("%r: fetching deferred field %r", self, name)
+        self.refresh()
+        return getattr(self, name)
+
     @is_bound
     def refresh(self):
         """
@@ -656,6 +2284,7 @@ class Model(ModelBase):
         Existing attribute values will be overwritten.
         """
         r = self._client.request("GET", self.url)
+        self._deferred = None
         return self._deserialize(r.json(), self._manager)
 
 
@@ -682,3 +2311,92 @@ class InnerModel(ModelBase):
     def _deserialize(self, data, manager, parent):
         self._parent = parent
         return super(InnerModel, self)._deserialize(data, manager)
+
+
+# most compact classes generated per model, see Query.compact()
+_COMPACT_CLASSES_MAX = 32
+
+
+def _compact_class(model, names):
+    """
+    Returns a subclass of ``model`` keeping the attributes in ``names`` in
+    ``__slots__``, generating it on first use. Names which the model class
+    already defines (eg. methods & properties) are left out.
+    """
+    model = model.__dict__.get("_compact_model", model)
+    slots = tuple(
+        sorted(
+            name
+            for name in set(names)
+            if isinstance(name, str)
+            and name.isidentifier()
+            and not name.startswith("__")
+            and not hasattr(model, name)
+        )
+    )
+
+    classes = model.__dict__.get("_compact_classes")
+    if classes is None:
+        classes = model._compact_classes = {}
+    klass = classes.get(slots)
+    if klass is None:
+        if len(classes) >= _COMPACT_CLASSES_MAX:
+            # unusual fields go into the overflow __dict__
+            return next(iter(classes.values()))
+        klass = type(model)(
+            model.__name__,
+            (model,),
+            {
+                "__slots__": slots,
+                "__module__": model.__module__,
+                "__qualname__": model.__qualname__,
+                "__reduce__": _reduce_compact,
+                "Meta": model._meta,
+                "_compact_model": model,
+                "_compact_slots": slots,
+            },
+        )
+        classes[slots] = klass
+    return klass
+
+
+def _create_compact(model, result, deserialize):
+    """
+    Creates a compact instance of ``model`` from a result, via
+    ``deserialize(obj)``.
+
+    The first result with each set of keys is deserialized into a normal
+    instance too, and the attributes it ends up with (including any the model
+    sets itself, and lazy fields) become the slots of the compact class.
+    """
+    schemas = model.__dict__.get("_compact_schemas")
+    if schemas is None:
+        schemas = model._compact_schemas = {}
+    key = frozenset(result) if isinstance(result, dict) else None
+    klass = schemas.get(key)
+    if klass is None:
+        prototype = deserialize(_new_result(model))
+        names = (
+            list(prototype.__dict__) + _lazy_names(prototype._lazy) + ["_deferred"]
+        )
+        klass = _compact_class(model, names)
+        if len(schemas) < _COMPACT_CLASSES_MAX:
+            schemas[key] = klass
+    return deserialize(_new_result(klass))
+
+
+def _new_compact(model, slots):
+    klass = _compact_class(model, slots)
+    return klass.__new__(klass)
+
+
+def _reduce_compact(self):
+    # pickles via the model class, since the compact class isn't importable
+    slots = {}
+    for name in self._compact_slots:
+        try:
+            slots[name] = object.__getattribute__(self, name)
+        except AttributeError:
+            pass
+    state = (self.__dict__ or None, slots)
+    return (_new_compact, (self._compact_model, self._compact_slots), state)
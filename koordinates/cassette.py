@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+
+"""
+koordinates.cassette
+====================
+
+Record the HTTP traffic of a real workload to a compact on-disk *cassette*,
+then replay it offline. Replaying identical traffic makes it possible to
+compare the client-side CPU and memory costs of different library versions
+or code changes, without touching a live site.
+
+Recording and replaying are normally done via
+:py:meth:`koordinates.client.Client.record` and
+:py:meth:`koordinates.client.Client.replay`:
+
+.. code-block:: python
+
+    with client.record("crawl.cassette"):
+        for layer in client.catalog.list():
+            ...
+
+    with client.replay("crawl.cassette"):
+        # same code, served from the cassette
+        for layer in client.catalog.list():
+            ...
+
+Cassettes are gzipped JSON-lines files, with one line per request/response
+pair. Response bodies are stored as they're streamed to the client, so
+downloads are recorded too. Bodies larger than ``max_body_size`` only have
+their size recorded, and are replayed as zero bytes. Request bodies are
+recorded as a SHA-256 hash, so requests to the same URL with different
+bodies can be told apart.
+"""
+
+import base64
+import collections
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from .exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# request headers that aren't written to cassettes
+SKIP_REQUEST_HEADERS = ("authorization", "cookie")
+# response headers that no longer apply to the recorded (decoded) body
+SKIP_RESPONSE_HEADERS = ("content-encoding", "transfer-encoding", "set-cookie")
+
+
+def _body_hash(body):
+    """
+    Returns the SHA-256 hash of a request body, or ``None`` if there's no
+    body, or it's streamed (eg. a file or multipart upload).
+    """
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    if not body or not isinstance(body, bytes):
+        return None
+    return hashlib.sha256(body).hexdigest()
+
+
+class _TeeRaw(object):
+    """
+    Wraps a ``urllib3`` response, capturing the body as the client reads it.
+    """
+
+    def __init__(self, raw, on_complete):
+        self._raw = raw
+        self._on_complete = on_complete
+        self._chunks = []
+        self._complete = False
+        self._t0 = time.perf_counter()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def _capture(self, chunk):
+        if chunk:
+            self._chunks.append(chunk)
+        return chunk
+
+    def _finish(self):
+        if not self._complete:
+            self._complete = True
+            self._on_complete(b"".join(self._chunks), time.perf_counter() - self._t0)
+            self._chunks = []
+
+    def read(self, amt=None, *args, **kwargs):
+        chunk = self._raw.read(amt, *args, **kwargs)
+        if not chunk or amt is None:
+            self._capture(chunk)
+            self._finish()
+            return chunk
+        return self._capture(chunk)
+
+    def stream(self, amt=2 ** 16, *args, **kwargs):
+        if hasattr(self._raw, "stream"):
+            chunks = self._raw.stream(amt, *args, **kwargs)
+        else:
+            chunks = iter(lambda: self._raw.read(amt), b"")
+        for chunk in chunks:
+            yield self._capture(chunk)
+        self._finish()
+
+    def close(self):
+        self._finish()
+        return self._raw.close()
+
+
+class RecordingAdapter(BaseAdapter):
+    """
+    Transport adapter that passes requests to another adapter, and records
+    the requests & responses to a :py:class:`Recorder`.
+    """
+
+    def __init__(self, recorder, adapter):
+        super(RecordingAdapter, self).__init__()
+        self.recorder = recorder
+        self.adapter = adapter
+
+    def send(self, request, **kwargs):
+        t0 = time.perf_counter()
+        r = self.adapter.send(request, **kwargs)
+        elapsed = time.perf_counter() - t0
+
+        def on_complete(body, body_elapsed):
+            self.recorder.add(request, r, body, elapsed, body_elapsed)
+
+        r.raw = _TeeRaw(r.raw, on_complete)
+        return r
+
+    def close(self):
+        self.adapter.close()
+
+
+class Recorder(object):
+    """
+    Writes request/response pairs to a cassette file.
+
+    :param str path: cassette file path. Overwritten if it exists.
+    :param int max_body_size: response bodies larger than this (in bytes)
+        only have their size recorded.
+    """
+
+    def __init__(self, path, max_body_size=10 * 1024 ** 2):
+        self.path = path
+        self.max_body_size = max_body_size
+        self.count = 0
+        self._lock = threading.Lock()
+        self._fp = gzip.open(path, "wt", encoding="utf-8")
+        self._write({"version": FORMAT_VERSION})
+
+    def _write(self, record):
+        self._fp.write(json.dumps(record, separators=(",", ":")))
+        self._fp.write("\n")
+
+    def wrap(self, adapter):
+        """Returns a transport adapter which records traffic via ``adapter``"""
+        return RecordingAdapter(self, adapter)
+
+    def add(self, request, response, body, elapsed, body_elapsed):
+        record = {
+            "method": request.method,
+            "url": request.url,
+            "request_headers": {
+                k: v
+                for k, v in request.headers.items()
+                if k.lower() not in SKIP_REQUEST_HEADERS
+            },
+            "request_body_sha256": _body_hash(request.body),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                k: v
+                for k, v in response.headers.items()
+                if k.lower() not in SKIP_RESPONSE_HEADERS
+            },
+            "elapsed": round(elapsed, 6),
+            "body_elapsed": round(body_elapsed, 6),
+            "body_size": len(body),
+        }
+        if len(body) <= self.max_body_size:
+            try:
+                record["body"] = body.decode("utf-8")
+            except UnicodeDecodeError:
+                record["body_b64"] = base64.b64encode(body).decode("ascii")
+
+        with self._lock:
+            if self._fp is None:
+                logger.warning("Recorder closed, not recording %s", request.url)
+                return
+            self._write(record)
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if self._fp is not None:
+                self._fp.close()
+                self._fp = None
+
+
+class Interaction(object):
+    """A recorded request & response"""
+
+    def __init__(self, record):
+        self.method = record["method"]
+        self.url = record["url"]
+        self.request_headers = record.get("request_headers", {})
+        self.request_body_sha256 = record.get("request_body_sha256")
+        self.status = record["status"]
+        self.reason = record.get("reason", "")
+        self.headers = record.get("headers", {})
+        self.elapsed = record.get("elapsed", 0.0)
+        self.body_elapsed = record.get("body_elapsed", 0.0)
+        self.body_size = record.get("body_size", 0)
+        if "body" in record:
+            self.body = record["body"].encode("utf-8")
+        elif "body_b64" in record:
+            self.body = base64.b64decode(record["body_b64"])
+        else:
+            # not recorded, replay as zero bytes
+            self.body = None
+
+
+class Cassette(object):
+    """
+    A set of recorded interactions, in the order they were recorded.
+
+    :param str path: cassette file path.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.interactions = []
+        with gzip.open(path, "rt", encoding="utf-8") as fp:
+            header = json.loads(fp.readline())
+            if header.get("version") != FORMAT_VERSION:
+                raise ValueError(
+                    "Unsupported cassette version: %s" % header.get("version")
+                )
+            for line in fp:
+                self.interactions.append(Interaction(json.loads(line)))
+
+    def __len__(self):
+        return len(self.interactions)
+
+    def __iter__(self):
+        return iter(self.interactions)
+
+
+class _ReplayBody(object):
+    def __init__(self, interaction, timing):
+        self._body = interaction.body
+        self._size = interaction.body_size
+        self._pos = 0
+        # seconds per byte
+        self._delay = (
+            interaction.body_elapsed * timing / self._size
+            if timing and self._size
+            else 0
+        )
+
+    def read(self, amt=None, **kwargs):
+        remaining = self._size - self._pos
+        n = remaining if amt is None else min(amt, remaining)
+        if n <= 0:
+            return b""
+        if self._body is None:
+            chunk = b"\0" * n
+        else:
+            chunk = self._body[self._pos : self._pos + n]
+        self._pos += n
+        if self._delay:
+            time.sleep(n * self._delay)
+        return chunk
+
+    def close(self):
+        self._pos = self._size
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Transport adapter which serves responses from a :py:class:`Cassette`.
+
+    Requests are matched to recorded interactions by method, URL and body
+    hash. Repeated requests get the recorded responses in order, and the
+    last one is re-used once they've all been served. Streamed request bodies
+    aren't hashed (nor are any in older cassettes), so those interactions
+    match any body.
+
+    :param Cassette cassette: the recorded interactions.
+    :param float timing: scale for the recorded response times. ``None`` or
+        ``0`` replays without delays; ``1.0`` replays with the original timing.
+    """
+
+    def __init__(self, cassette, timing=None):
+        super(ReplayAdapter, self).__init__()
+        self.cassette = cassette
+        self.timing = timing
+        self.count = 0
+        self._lock = threading.Lock()
+        self._queues = collections.defaultdict(collections.deque)
+        for interaction in cassette:
+            key = (interaction.method, interaction.url, interaction.request_body_sha256)
+            self._queues[key].append(interaction)
+
+    def send(
+        self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ):
+        key = (request.method, request.url, _body_hash(request.body))
+        with self._lock:
+            # cassettes without body hashes match any body
+            queue = self._queues.get(key) or self._queues.get(key[:2] + (None,))
+            if not queue:
+                raise ClientError(
+                    "No recorded response for %s %s" % (request.method, request.url)
+                )
+            interaction = queue.popleft() if len(queue) > 1 else queue[0]
+            self.count += 1
+
+        if self.timing:
+            time.sleep(interaction.elapsed * self.timing)
+
+        r = Response()
+        r.status_code = interaction.status
+        r.reason = interaction.reason
+        r.headers = CaseInsensitiveDict(interaction.headers)
+        r.raw = _ReplayBody(interaction, self.timing)
+        r.url = request.url
+        r.request = request
+        r.encoding = "utf-8"
+        r.connection = self
+        return r
+
+    def close(self):
+        pass
@@ -52,11 +52,16 @@ class CatalogManager(base.Manager):
         else:
             raise NotImplementedError("No support for catalog results of type %s" % url)
 
-    def create_from_result(self, result):
+    def create_from_result(self, result, compact=False):
         try:
             klass = self._get_item_class(result["url"])
-            obj = klass()
-            return obj._deserialize(result, self.client.get_manager(klass))
+            manager = self.client.get_manager(klass)
+            if compact:
+                return base._create_compact(
+                    klass, result, lambda obj: obj._deserialize(result, manager)
+                )
+            obj = base._new_result(klass)
+            return obj._deserialize(result, manager)
         except NotImplementedError:
             # return as dict
             return result
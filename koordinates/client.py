@@ -5,12 +5,16 @@ koordinates.client
 ==================
 """
 
+import contextlib
 import copy
+import functools
+import importlib
 import json
 import logging
 import os
 import re
 import sys
+import time
 from urllib.parse import urlparse
 
 try:
@@ -20,15 +24,26 @@ except ImportError:
     from importlib_metadata import version as _version
 
 import requests
-import requests_toolbelt
 
-from . import layers, licenses, publishing, sets, users, catalog, sources, exports
 from . import exceptions
 
 
 logger = logging.getLogger(__name__)
 
 
+def _import_manager(path):
+    module_name, class_name = path.rsplit(".", 1)
+    module = importlib.import_module("." + module_name, __package__)
+    return getattr(module, class_name)
+
+
+@functools.lru_cache(maxsize=None)
+def _user_agent():
+    import requests_toolbelt
+
+    return requests_toolbelt.user_agent("KoordinatesPython", _version("koordinates"))
+
+
 class Client(object):
     """
     A `Client` is used to define the host and api-version which the user
@@ -62,31 +77,47 @@ class Client(object):
                 "No authentication token specified, and KOORDINATES_TOKEN not available in the environment."
             )
 
-        self._user_agent = requests_toolbelt.user_agent(
-            "KoordinatesPython", _version('koordinates')
-        )
+        self._user_agent = _user_agent()
 
         self._init_managers(
             public={
-                "sets": sets.SetManager,
-                "publishing": publishing.PublishManager,
-                "layers": layers.LayerManager,
-                "tables": layers.TableManager,
-                "licenses": licenses.LicenseManager,
-                "catalog": catalog.CatalogManager,
-                "sources": sources.SourceManager,
-                "exports": exports.ExportManager,
+                "sets": "sets.SetManager",
+                "publishing": "publishing.PublishManager",
+                "layers": "layers.LayerManager",
+                "tables": "layers.TableManager",
+                "licenses": "licenses.LicenseManager",
+                "catalog": "catalog.CatalogManager",
+                "sources": "sources.SourceManager",
+                "exports": "exports.ExportManager",
             },
             private=(
-                users.GroupManager,
-                users.UserManager,
-                sources.ScanManager,
-                sources.DatasourceManager,
-                exports.CropFeatureManager,
-                exports.CropLayerManager,
+                "users.GroupManager",
+                "users.UserManager",
+                "sources.ScanManager",
+                "sources.DatasourceManager",
+                "exports.CropFeatureManager",
+                "exports.CropLayerManager",
             ),
         )
 
+        # the HTTP session is created when the first request is made
+        self._session = None
+        self._session_pid = None
+        self._adapters = []
+        self._profiler = None
+
+        super(self.__class__, self).__init__()
+
+    def __getstate__(self):
+        # Sessions hold live sockets, so a pickled Client only carries what's
+        # needed to rebuild itself: the unpickled copy gets fresh managers and
+        # a new session.
+        return {"host": self.host, "token": self.token}
+
+    def __setstate__(self, state):
+        self.__init__(host=state["host"], token=state["token"])
+
+    def _init_session(self):
         self._session = requests.Session()
         self._session.headers.update(
             {"Accept": "application/json", "User-Agent": self._user_agent,}
@@ -95,19 +126,134 @@ class Client(object):
             self._session.headers["Authorization"] = "key {token}".format(
                 token=self.token
             )
+        for prefix, adapter in self._adapters:
+            self._session.mount(prefix, adapter)
+        # remember which process owns the session so forked children can
+        # detect they're sharing their parent's connection pool
+        self._session_pid = os.getpid()
+
+    def _get_session(self):
+        if self._session is None:
+            self._init_session()
+        elif self._session_pid != os.getpid():
+            logger.debug("Process fork detected, resetting session")
+            self._init_session()
+        return self._session
+
+    def mount(self, adapter, prefix=None):
+        """
+        Send requests for URLs starting with ``prefix`` via a custom
+        `transport adapter <https://requests.readthedocs.io/en/latest/user/advanced/#transport-adapters>`_.
 
-        super(self.__class__, self).__init__()
+        Adapters persist if the session is re-created (eg. after a fork), but
+        aren't kept when a Client is pickled.
+
+        :param requests.adapters.BaseAdapter adapter: the adapter to use.
+        :param str prefix: URL prefix to use the adapter for. Defaults to this
+            client's site.
+        """
+        if prefix is None:
+            prefix = "https://%s/" % self.host
+        self._adapters.append((prefix, adapter))
+        if self._session is not None:
+            self._session.mount(prefix, adapter)
+
+    @contextlib.contextmanager
+    def record(self, path, max_body_size=10 * 1024 ** 2):
+        """
+        Context manager which records all requests made by this client, and
+        their responses, to a cassette file. See :py:mod:`koordinates.cassette`.
+
+        :param str path: cassette file to write.
+        :param int max_body_size: response bodies larger than this (in bytes)
+            only have their size recorded.
+        :rtype: koordinates.cassette.Recorder
+        """
+        from .cassette import Recorder
+
+        recorder = Recorder(path, max_body_size=max_body_size)
+        session = self._get_session()
+        adapters = list(session.adapters.items())
+        try:
+            for prefix, adapter in adapters:
+                session.mount(prefix, recorder.wrap(adapter))
+            yield recorder
+        finally:
+            for prefix, adapter in adapters:
+                session.mount(prefix, adapter)
+            recorder.close()
+
+    @contextlib.contextmanager
+    def replay(self, path, timing=None):
+        """
+        Context manager which serves all requests made by this client from a
+        cassette file recorded via :py:meth:`.record`, instead of the network.
+        See :py:mod:`koordinates.cassette`.
+
+        :param str path: cassette file to read.
+        :param float timing: scale for the recorded response times. ``None``
+            replays without delays; ``1.0`` replays with the original timing.
+        :rtype: koordinates.cassette.ReplayAdapter
+        """
+        from .cassette import Cassette, ReplayAdapter
+
+        adapter = ReplayAdapter(Cassette(path), timing=timing)
+        session = self._get_session()
+        adapters = list(session.adapters.items())
+        try:
+            for prefix in ("https://", "http://"):
+                session.mount(prefix, adapter)
+            for prefix, _ in adapters:
+                session.mount(prefix, adapter)
+            yield adapter
+        finally:
+            for prefix, original in adapters:
+                session.mount(prefix, original)
+
+    @contextlib.contextmanager
+    def profile(self, cprofile=False):
+        """
+        Context manager which profiles the requests made by this client,
+        splitting the time for each operation into network, JSON decoding and
+        deserialization phases. See :py:mod:`koordinates.profiling`.
+
+        :param bool cprofile: also capture a :py:mod:`cProfile` profile of the
+            current thread, available as ``cprofile_stats`` afterwards.
+        :rtype: koordinates.profiling.Profiler
+        """
+        from .profiling import Profiler
+
+        profiler = Profiler(cprofile=cprofile)
+        previous, self._profiler = self._profiler, profiler
+        profiler.start()
+        try:
+            yield profiler
+        finally:
+            profiler.stop()
+            self._profiler = previous
 
     def _init_managers(self, public, private):
+        """
+        Managers are named as ``"module.ClassName"`` paths relative to this
+        package. Neither the modules nor the managers are loaded until
+        they're first used.
+        """
         self._manager_map = {}
-        for manager_class in private:
-            mgr = manager_class(self)
-            self._register_manager(mgr.model, mgr)
-
-        for alias, manager_class in list(public.items()):
-            mgr = manager_class(self)
-            self._register_manager(mgr.model, mgr)
-            setattr(self, alias, mgr)
+        self._public_managers = dict(public)
+        self._manager_paths = set(private) | set(public.values())
+
+    def __getattr__(self, name):
+        # public manager aliases, eg. client.layers
+        if name.startswith("_") or name not in self.__dict__.get(
+            "_public_managers", {}
+        ):
+            raise AttributeError(
+                "%r object has no attribute %r" % (self.__class__.__name__, name)
+            )
+        manager_class = _import_manager(self._public_managers[name])
+        mgr = self.get_manager(manager_class.model)
+        setattr(self, name, mgr)
+        return mgr
 
     def _register_manager(self, model, manager):
         self._manager_map[model] = manager
@@ -123,10 +269,35 @@ class Client(object):
             for k, m in list(self._manager_map.items()):
                 if k.__name__ == model:
                     return m
+            for path in sorted(self._manager_paths):
+                manager_class = _import_manager(path)
+                if manager_class.model.__name__ == model:
+                    return self.get_manager(manager_class.model)
             else:
                 raise KeyError(model)
 
-        return self._manager_map[model]
+        try:
+            return self._manager_map[model]
+        except KeyError:
+            pass
+
+        # build the manager on first use
+        manager_class = getattr(getattr(model, "_meta", None), "manager", None)
+        if not any(
+            _import_manager(path) is manager_class
+            for path in self._manager_paths
+            if path.rsplit(".", 1)[1] == getattr(manager_class, "__name__", None)
+        ):
+            raise KeyError(model)
+
+        # subclasses (eg. UploadSource) share their manager's model's instance
+        model = manager_class.model
+        try:
+            return self._manager_map[model]
+        except KeyError:
+            pass
+        # keep the first one, if other threads are building it too
+        return self._manager_map.setdefault(model, manager_class(self))
 
     def _assemble_headers(self, method, user_headers=None):
         """
@@ -182,7 +353,12 @@ class Client(object):
             logger.info("Request: %s %s headers=%s", method, url, json.dumps(headers))
 
         try:
-            r = self._session.request(method, url, headers=headers, *args, **kwargs)
+            t0 = time.perf_counter()
+            r = self._get_session().request(
+                method, url, headers=headers, *args, **kwargs
+            )
+            if self._profiler is not None:
+                self._profiler.wrap_response(r, time.perf_counter() - t0)
             logger.info("Response: %d %s in %s", r.status_code, r.reason, r.elapsed)
             logger.debug("Response: headers=%s", r.headers)
             r.raise_for_status()
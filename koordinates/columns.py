@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+"""
+koordinates.columns
+===================
+
+Converts query results into columns, for analysis and reporting, without
+building model objects. Normally used via
+:py:meth:`koordinates.base.Query.to_columns`:
+
+.. code-block:: python
+
+    # dict of lists
+    columns = client.catalog.list().to_columns(["id", "title", "updated_at"])
+
+    # NumPy structured array
+    array = client.catalog.list().to_columns(["id", "updated_at"], format="numpy")
+
+    # Arrow table, made of one record batch per chunk
+    table = client.catalog.list().to_columns(["id", "updated_at"], format="arrow")
+
+Results are read into columns ``chunk_size`` rows at a time. Each chunk is
+converted to arrays as soon as it's full, so only one chunk of Python values
+is held at once.
+
+Fields named ``*_at`` are converted to datetimes, in UTC, a chunk at a time.
+The NumPy and Arrow formats need `NumPy <https://numpy.org/>`_ and
+`PyArrow <https://arrow.apache.org/docs/python/>`_ respectively.
+"""
+
+import abc
+import datetime
+
+from .utils import make_date
+
+FORMATS = ("dict", "numpy", "arrow")
+
+
+def _is_date_field(field):
+    return field.endswith("_at")
+
+
+def _utc_text(value):
+    """
+    Returns an ISO 8601 date/time string as a naive UTC one, or ``None``.
+    """
+    if not value:
+        return None
+    elif value.endswith("Z"):
+        return value[:-1]
+    elif value.endswith("+00:00"):
+        return value[:-6]
+    # other timezones are rare, so take the slow path
+    dt = make_date(value)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return dt.isoformat()
+
+
+def _python_dates(values):
+    results = []
+    for value in values:
+        text = _utc_text(value)
+        if text is None:
+            results.append(None)
+            continue
+        try:
+            dt = datetime.datetime.fromisoformat(text)
+        except ValueError:
+            dt = make_date(text)
+        results.append(dt.replace(tzinfo=datetime.timezone.utc))
+    return results
+
+
+def _numpy_column(np, field, values):
+    if _is_date_field(field):
+        # numpy parses the whole column at once, NaT for None
+        return np.array([_utc_text(v) for v in values], dtype="datetime64[us]")
+
+    kinds = {type(v) for v in values}
+    if kinds == {bool}:
+        return np.array(values, dtype=bool)
+    elif kinds == {int}:
+        return np.array(values, dtype=np.int64)
+    elif kinds and kinds <= {int, float, type(None)}:
+        return np.array(
+            [np.nan if v is None else v for v in values], dtype=np.float64
+        )
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _arrow_column(pa, field, values):
+    if _is_date_field(field):
+        text = pa.array([_utc_text(v) for v in values], type=pa.string())
+        return text.cast(pa.timestamp("us")).cast(pa.timestamp("us", tz="UTC"))
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # mixed types
+        return pa.array([None if v is None else str(v) for v in values])
+
+
+class _Builder(metaclass=abc.ABCMeta):
+    def __init__(self, fields):
+        self.fields = fields
+
+    @abc.abstractmethod
+    def add_chunk(self, columns):
+        """ Adds a chunk of rows, as a list of values for each field """
+
+    @abc.abstractmethod
+    def finish(self):
+        """ Returns the columns of all the rows added """
+
+
+class _DictBuilder(_Builder):
+    def __init__(self, fields):
+        super(_DictBuilder, self).__init__(fields)
+        self.columns = {f: [] for f in fields}
+
+    def add_chunk(self, columns):
+        for field, values in zip(self.fields, columns):
+            if _is_date_field(field):
+                values = _python_dates(values)
+            self.columns[field].extend(values)
+
+    def finish(self):
+        return self.columns
+
+
+class _NumpyBuilder(_Builder):
+    def __init__(self, fields):
+        import numpy
+
+        super(_NumpyBuilder, self).__init__(fields)
+        self.np = numpy
+        self.chunks = []
+
+    def add_chunk(self, columns):
+        self.chunks.append(
+            [_numpy_column(self.np, f, v) for f, v in zip(self.fields, columns)]
+        )
+
+    def finish(self):
+        np = self.np
+        if not self.chunks:
+            return np.rec.fromarrays(
+                [np.empty(0, dtype=object) for f in self.fields], names=self.fields
+            )
+
+        arrays = []
+        for i, field in enumerate(self.fields):
+            parts = [chunk[i] for chunk in self.chunks]
+            if len({p.dtype for p in parts}) > 1:
+                # eg. ints in one chunk, floats or strings in another
+                kinds = {p.dtype.kind for p in parts}
+                dtype = np.float64 if kinds <= {"i", "f", "b"} else object
+                parts = [p.astype(dtype) for p in parts]
+            arrays.append(np.concatenate(parts))
+        return np.rec.fromarrays(arrays, names=self.fields)
+
+
+class _ArrowBuilder(_Builder):
+    def __init__(self, fields):
+        import pyarrow
+
+        super(_ArrowBuilder, self).__init__(fields)
+        self.pa = pyarrow
+        self.chunks = []
+
+    def add_chunk(self, columns):
+        self.chunks.append(_arrow_batch(self.pa, self.fields, columns))
+
+    def finish(self):
+        pa = self.pa
+        if not self.chunks:
+            return pa.table({f: pa.array([], type=pa.null()) for f in self.fields})
+        schema = _unify_schemas(pa, [batch.schema for batch in self.chunks])
+        return pa.Table.from_batches(
+            [batch.cast(schema) for batch in self.chunks], schema=schema
+        )
+
+
+def _arrow_batch(pa, fields, columns):
+    return pa.RecordBatch.from_arrays(
+        [_arrow_column(pa, f, v) for f, v in zip(fields, columns)], names=fields
+    )
+
+
+def _unify_schemas(pa, schemas):
+    """
+    Returns a schema which chunks with different inferred types can all be
+    cast to, eg. ints in one chunk & floats in another. Fields missing from
+    some chunks are included too.
+    """
+    names = dict.fromkeys(name for schema in schemas for name in schema.names)
+    schema_fields = []
+    for field in names:
+        types = {
+            schema.field(field).type for schema in schemas if field in schema.names
+        }
+        types.discard(pa.null())
+        if not types:
+            type_ = pa.null()
+        elif len(types) == 1:
+            type_ = types.pop()
+        elif all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types):
+            type_ = pa.float64()
+        else:
+            type_ = pa.string()
+        schema_fields.append(pa.field(field, type_))
+    return pa.schema(schema_fields)
+
+
+_BUILDERS = {
+    "dict": _DictBuilder,
+    "numpy": _NumpyBuilder,
+    "arrow": _ArrowBuilder,
+}
+
+
+def to_columns(query, fields, format="dict", chunk_size=10000):
+    """
+    Reads the results of ``query`` into columns. See
+    :py:meth:`koordinates.base.Query.to_columns`.
+    """
+    from .base import _lookup
+
+    if not fields:
+        raise ValueError("to_columns() needs at least one field")
+    elif format not in _BUILDERS:
+        raise ValueError(
+            "Unknown format %r, expecting one of: %s" % (format, ", ".join(FORMATS))
+        )
+    elif chunk_size < 1:
+        raise ValueError("Chunk size must be >= 1")
+
+    fields = list(fields)
+    paths = [tuple(f.split("__")) for f in fields]
+    builder = _BUILDERS[format](fields)
+
+    columns = [[] for f in fields]
+    rows = 0
+    for raw_result in query._raw_results():
+        for column, path in zip(columns, paths):
+            column.append(_lookup(path, raw_result))
+        rows += 1
+        if rows == chunk_size:
+            builder.add_chunk(columns)
+            columns = [[] for f in fields]
+            rows = 0
+    if rows:
+        builder.add_chunk(columns)
+    return builder.finish()
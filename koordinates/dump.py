@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+
+"""
+koordinates.dump
+================
+
+Writes all the results of a query to a file, a page at a time, so memory use
+doesn't grow with the number of results. Normally used via
+:py:meth:`koordinates.base.Query.dump`:
+
+.. code-block:: python
+
+    stats = client.layers.list().expand().dump("layers.ndjson.gz")
+    print(stats)
+
+Formats:
+
+``ndjson``
+    one JSON object per line, with the raw results from the API (or just
+    the requested ``fields``). Can be compressed with ``gzip``, ``bz2`` or
+    ``xz``, each page as a separate stream, which standard tools read as a
+    single file.
+``parquet``
+    a `Parquet <https://parquet.apache.org/>`_ file, via
+    `PyArrow <https://arrow.apache.org/docs/python/>`_. Nested values are
+    stored as JSON strings, and fields named ``*_at`` as UTC timestamps.
+    ``compression`` is any Parquet codec (eg. ``snappy`` or ``zstd``).
+
+Dumps are resumable: after each page is written, a :py:class:`QueryCursor
+<koordinates.base.QueryCursor>` is saved next to the output (as
+``<path>.cursor``). If a dump is interrupted, running it again carries on
+from there. Parquet output is written as one part file per page group (in
+``<path>.parts/``), and combined into the final file at the end.
+"""
+
+import bz2
+import gzip
+import json
+import logging
+import lzma
+import os
+import shutil
+import time
+
+from .base import QueryCursor, _load_checkpoint, _lookup, _save_checkpoint
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("ndjson", "parquet")
+
+_COMPRESSORS = {
+    "gzip": gzip.compress,
+    "bz2": bz2.compress,
+    "xz": lzma.compress,
+}
+_SUFFIXES = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+}
+
+
+class DumpStats(object):
+    """
+    Progress of a :py:func:`dump`.
+
+    :ivar int rows: number of results written.
+    :ivar int bytes: number of bytes written.
+    :ivar int pages: number of pages of results written.
+    :ivar float elapsed: seconds taken.
+    :ivar bool resumed: whether the dump carried on from an earlier one.
+        ``rows``, ``bytes`` and ``pages`` only count this run.
+    """
+
+    def __init__(self, resumed=False):
+        self.rows = 0
+        self.bytes = 0
+        self.pages = 0
+        self.elapsed = 0.0
+        self.resumed = resumed
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "pages": self.pages,
+            "elapsed": self.elapsed,
+            "rows_per_second": self.rows_per_second,
+            "bytes_per_second": self.bytes_per_second,
+            "resumed": self.resumed,
+        }
+
+    def __str__(self):
+        return "%d rows, %d bytes in %.1fs (%.0f rows/s, %.0f bytes/s)" % (
+            self.rows,
+            self.bytes,
+            self.elapsed,
+            self.rows_per_second,
+            self.bytes_per_second,
+        )
+
+
+def _guess_format(path):
+    name = str(path)
+    for suffix in _SUFFIXES:
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+    return "parquet" if name.endswith(".parquet") else "ndjson"
+
+
+def _guess_compression(path):
+    for suffix, compression in _SUFFIXES.items():
+        if str(path).endswith(suffix):
+            return compression
+    return None
+
+
+def _project(results, fields):
+    if fields is None:
+        return results
+    paths = [(f, tuple(f.split("__"))) for f in fields]
+    return [{f: _lookup(p, r) for f, p in paths} for r in results]
+
+
+class _NDJSONWriter(object):
+    def __init__(self, path, compression, state):
+        if compression is not None and compression not in _COMPRESSORS:
+            raise ValueError(
+                "Unknown compression %r, expecting one of: %s"
+                % (compression, ", ".join(_COMPRESSORS))
+            )
+        self._compress = _COMPRESSORS.get(compression)
+        self._fp = open(path, "ab")
+        # drop anything written after the last checkpoint
+        self._fp.truncate(state.get("bytes", 0))
+        self._fp.seek(0, os.SEEK_END)
+
+    def write(self, rows, fields):
+        data = "".join(
+            json.dumps(row, separators=(",", ":")) + "\n" for row in rows
+        ).encode("utf-8")
+        if self._compress:
+            data = self._compress(data)
+        self._fp.write(data)
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+        return len(data)
+
+    def pending(self):
+        return False
+
+    def state(self):
+        return {"bytes": self._fp.tell()}
+
+    def close(self):
+        self._fp.close()
+
+
+class _ParquetWriter(object):
+    def __init__(self, path, compression, state, row_group_size):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self._path = path
+        self._parts_dir = "%s.parts" % path
+        self._compression = compression or "snappy"
+        self._row_group_size = row_group_size
+        self._part = state.get("part", 0)
+        self._rows = []
+        os.makedirs(self._parts_dir, exist_ok=True)
+        # drop any part written after the last checkpoint
+        for name in os.listdir(self._parts_dir):
+            if int(name.split(".")[0]) >= self._part:
+                os.remove(os.path.join(self._parts_dir, name))
+
+    def _part_path(self, part):
+        return os.path.join(self._parts_dir, "%06d.parquet" % part)
+
+    def _flush(self, fields):
+        from .columns import _arrow_batch
+
+        if fields is None:
+            # every key in this row group: finish() adds the ones other
+            # parts don't have
+            fields = list(dict.fromkeys(k for row in self._rows for k in row))
+        columns = [[] for f in fields]
+        for row in self._rows:
+            for column, field in zip(columns, fields):
+                value = row.get(field)
+                if isinstance(value, (dict, list)):
+                    value = json.dumps(value, separators=(",", ":"))
+                column.append(value)
+        table = self.pa.Table.from_batches([_arrow_batch(self.pa, fields, columns)])
+        path = self._part_path(self._part)
+        self.pq.write_table(table, path, compression=self._compression)
+        self._part += 1
+        self._rows = []
+        return os.path.getsize(path)
+
+    def write(self, rows, fields):
+        self._rows.extend(rows)
+        if len(self._rows) >= self._row_group_size:
+            return self._flush(fields)
+        return 0
+
+    def pending(self):
+        """ Whether there are rows which haven't been written yet """
+        return bool(self._rows)
+
+    def state(self):
+        return {"part": self._part}
+
+    def finish(self, fields):
+        """
+        Writes any remaining rows, and combines the parts into the output
+        file. Returns the number of bytes written for the remaining rows.
+        """
+        from .columns import _unify_schemas
+
+        size = self._flush(fields) if self._rows else 0
+        parts = [self._part_path(i) for i in range(self._part)]
+        if not parts:
+            schema = self.pa.schema([(f, self.pa.null()) for f in fields or []])
+            self.pq.write_table(schema.empty_table(), self._path)
+        else:
+            # parts can have different fields & inferred types
+            schema = _unify_schemas(self.pa, [self.pq.read_schema(p) for p in parts])
+            with self.pq.ParquetWriter(
+                self._path, schema, compression=self._compression
+            ) as writer:
+                for part in parts:
+                    table = self.pq.read_table(part)
+                    for field in schema:
+                        if field.name not in table.column_names:
+                            table = table.append_column(
+                                field.name, self.pa.nulls(len(table), field.type)
+                            )
+                    writer.write_table(table.select(schema.names).cast(schema))
+        shutil.rmtree(self._parts_dir)
+        return size
+
+    def close(self):
+        pass
+
+
+def dump(
+    query,
+    path,
+    format=None,
+    compression=None,
+    fields=None,
+    progress=None,
+    row_group_size=10000,
+):
+    """
+    Writes the results of ``query`` to ``path``. See
+    :py:meth:`koordinates.base.Query.dump`.
+
+    :rtype: DumpStats
+    """
+    format = format or _guess_format(path)
+    if format not in FORMATS:
+        raise ValueError(
+            "Unknown format %r, expecting one of: %s" % (format, ", ".join(FORMATS))
+        )
+    if format == "ndjson" and compression is None:
+        compression = _guess_compression(path)
+    if query._unordered():
+        # pages arrive out of order, so there's no position to resume from
+        raise ValueError("Can't dump unordered parallel queries")
+
+    cursor_path = "%s.cursor" % path
+    state = _load_checkpoint(cursor_path)
+    query = query.raw()
+    if state:
+        logger.info("Resuming dump to %s at result %d", path, state["position"])
+        query = query.resume(state["cursor"])
+        fields = state.get("fields", fields)
+    elif os.path.exists(path):
+        os.remove(path)
+
+    if format == "ndjson":
+        writer = _NDJSONWriter(path, compression, state)
+    else:
+        writer = _ParquetWriter(path, compression, state, row_group_size)
+
+    stats = DumpStats(resumed=bool(state))
+    t0 = time.perf_counter()
+    try:
+        for page in query.iter_pages():
+            stats.bytes += writer.write(_project(page.items, fields), fields)
+            stats.rows += len(page.items)
+            stats.pages += 1
+            stats.elapsed = time.perf_counter() - t0
+
+            position = page.position + len(page.items)
+            if not writer.pending():
+                # everything up to here is safely on disk
+                cursor = QueryCursor(query, page.next_url, 0, position, page.count)
+                state = dict(
+                    writer.state(), cursor=cursor.as_dict(), position=position
+                )
+                if fields is not None:
+                    state["fields"] = fields
+                _save_checkpoint(cursor_path, state)
+            if progress is not None:
+                progress(stats)
+
+        if format == "parquet":
+            stats.bytes += writer.finish(fields)
+    finally:
+        writer.close()
+
+    if os.path.exists(cursor_path):
+        os.remove(cursor_path)
+    stats.elapsed = time.perf_counter() - t0
+    logger.info("Dumped %s to %s", stats, path)
+    return stats
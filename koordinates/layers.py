@@ -17,7 +17,7 @@ from .metadata import Metadata, MetadataManager
 from .permissions import PermissionObjectMixin
 from .publishing import Publish
 from .users import Group
-from .utils import is_bound
+from .utils import is_bound, lazy_property
 
 
 logger = logging.getLogger(__name__)
@@ -32,12 +32,18 @@ class LayerManager(base.Manager):
 
     _URL_KEY = "LAYER"
 
-    def __init__(self, client):
-        super(LayerManager, self).__init__(client)
-        # Inner model managers
-        self.versions = LayerVersionManager(client, self)
-        self._data = LayerDataManager(client, self)
-        self._metadata = MetadataManager(client, self)
+    # Inner model managers
+    @lazy_property
+    def versions(self):
+        return LayerVersionManager(self.client, self)
+
+    @lazy_property
+    def _data(self):
+        return LayerDataManager(self.client, self)
+
+    @lazy_property
+    def _metadata(self):
+        return MetadataManager(self.client, self)
 
     def list_drafts(self):
         """
@@ -201,39 +207,24 @@ class Layer(base.Model, PermissionObjectMixin):
             del o["data"]
         return o
 
-    def _deserialize(self, data, manager):
-        super(Layer, self)._deserialize(data, manager)
-        self.group = (
-            Group()._deserialize(data["group"], manager.client.get_manager(Group))
-            if data.get("group")
-            else None
-        )
-        self.data = (
-            LayerData()._deserialize(data["data"], manager._data, self)
-            if data.get("data")
-            else None
-        )
-        self.version = (
-            LayerVersion()._deserialize(data["version"], manager.versions, self)
-            if data.get("version")
-            else None
-        )
-        self.collected_at = (
-            [make_date(d) for d in data["collected_at"]]
-            if data.get("collected_at")
-            else None
-        )
-        self.license = (
-            License()._deserialize(data["license"], manager.client.get_manager(License))
-            if data.get("license")
-            else None
-        )
-        self.metadata = (
-            Metadata()._deserialize(data["metadata"], manager._metadata, self)
-            if data.get("metadata")
-            else None
-        )
-        return self
+    _converters = {
+        "group": lambda layer, value: Group()._deserialize(
+            value, layer._manager.client.get_manager(Group)
+        ),
+        "data": lambda layer, value: LayerData()._deserialize(
+            value, layer._manager._data, layer
+        ),
+        "version": lambda layer, value: LayerVersion()._deserialize(
+            value, layer._manager.versions, layer
+        ),
+        "collected_at": lambda layer, value: [make_date(d) for d in value],
+        "license": lambda layer, value: License()._deserialize(
+            value, layer._manager.client.get_manager(License)
+        ),
+        "metadata": lambda layer, value: Metadata()._deserialize(
+            value, layer._manager._metadata, layer
+        ),
+    }
 
     @property
     def is_published_version(self):
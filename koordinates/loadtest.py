@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+
+"""
+koordinates.loadtest
+====================
+
+Drives :py:class:`koordinates.client.Client` workloads at increasing
+concurrency against a :py:class:`koordinates.simulator.Simulator`, and reports
+latency percentiles and throughput at each level.
+
+.. code-block:: bash
+
+    $ python -m koordinates.loadtest get --concurrency 1,2,4,8,16 --latency 0.05
+    $ python -m koordinates.loadtest list --mode asyncio --format json -o list.json
+    $ python -m koordinates.loadtest download --plot download.png
+
+Scenarios:
+
+``list``
+    crawls every layer via :py:meth:`koordinates.layers.LayerManager.list`.
+``get``
+    fetches random layers via :py:meth:`koordinates.layers.LayerManager.get`.
+``export``
+    creates an export, and polls it until it's ready to download.
+``download``
+    downloads a random export.
+
+Each concurrency level runs for ``--duration`` seconds, with N worker threads
+or (``--mode asyncio``) N asyncio tasks sharing one client.
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import csv
+import json
+import math
+import random
+import sys
+import threading
+import time
+
+from .exports import Export
+from .simulator import Simulator
+
+FIELDS = (
+    "scenario",
+    "mode",
+    "concurrency",
+    "operations",
+    "errors",
+    "duration",
+    "throughput",
+    "p50",
+    "p90",
+    "p95",
+    "p99",
+    "max",
+)
+
+
+class _NullFile(object):
+    def write(self, data):
+        return len(data)
+
+
+def _scenario_list(client, sim, rnd):
+    for layer in client.layers.list():
+        pass
+
+
+def _scenario_get(client, sim, rnd):
+    client.layers.get(rnd.randint(1, sim.layers.count))
+
+
+def _scenario_export(client, sim, rnd):
+    export = Export()
+    export.crs = "EPSG:4326"
+    export.formats = {"vector": "application/x-ogc-gpkg"}
+    export.items = [
+        {"item": client.get_url("LAYER", "GET", "single", {"id": rnd.randint(1, 10)})}
+    ]
+    export = client.exports.create(export)
+    while export.state == "processing":
+        time.sleep(sim.export_delay / 4)
+        export.refresh()
+
+
+def _scenario_download(client, sim, rnd):
+    export = client.exports.get(rnd.randint(1, sim.exports.count))
+    export.download(_NullFile())
+
+
+SCENARIOS = {
+    "list": _scenario_list,
+    "get": _scenario_get,
+    "export": _scenario_export,
+    "download": _scenario_download,
+}
+
+
+def percentile(values, p):
+    """
+    Returns the ``p``-th percentile (``0`` - ``100``) of ``values``, by the
+    nearest-rank method.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(int(math.ceil(p / 100.0 * len(values))), 1)
+    return values[min(rank, len(values)) - 1]
+
+
+def _run_threads(operation, concurrency, deadline):
+    results = []
+    lock = threading.Lock()
+
+    def worker(i):
+        rnd = random.Random(i)
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                operation(rnd)
+                ok = True
+            except Exception:
+                ok = False
+            with lock:
+                results.append((time.perf_counter() - t0, ok))
+
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+        for future in [executor.submit(worker, i) for i in range(concurrency)]:
+            future.result()
+    return results
+
+
+def _run_asyncio(operation, concurrency, deadline):
+    # the client is synchronous, so each task waits on a thread from the pool
+    results = []
+
+    async def task(loop, executor, i):
+        rnd = random.Random(i)
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                await loop.run_in_executor(executor, operation, rnd)
+                ok = True
+            except Exception:
+                ok = False
+            results.append((time.perf_counter() - t0, ok))
+
+    async def main():
+        loop = asyncio.get_event_loop()
+        with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+            await asyncio.gather(*[task(loop, executor, i) for i in range(concurrency)])
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.close()
+    return results
+
+
+def run(scenario, concurrency, duration=5.0, mode="threads", simulator=None):
+    """
+    Runs a scenario at one concurrency level.
+
+    :param str scenario: one of :py:data:`SCENARIOS`.
+    :param int concurrency: number of concurrent workers.
+    :param float duration: seconds to run for.
+    :param str mode: ``threads`` or ``asyncio``.
+    :param Simulator simulator: the simulated site. By default a new one.
+    :return: a result row, with latencies in seconds.
+    :rtype: dict
+    """
+    sim = simulator or Simulator()
+    client = sim.client()
+    func = SCENARIOS[scenario]
+    runner = {"threads": _run_threads, "asyncio": _run_asyncio}[mode]
+
+    t0 = time.perf_counter()
+    results = runner(lambda rnd: func(client, sim, rnd), concurrency, t0 + duration)
+    elapsed = time.perf_counter() - t0
+
+    latencies = [t for t, ok in results if ok]
+    row = {
+        "scenario": scenario,
+        "mode": mode,
+        "concurrency": concurrency,
+        "operations": len(latencies),
+        "errors": len(results) - len(latencies),
+        "duration": elapsed,
+        "throughput": len(latencies) / elapsed,
+    }
+    for p in (50, 90, 95, 99):
+        row["p%d" % p] = percentile(latencies, p)
+    row["max"] = max(latencies) if latencies else None
+    return row
+
+
+def write_csv(rows, fp):
+    writer = csv.DictWriter(fp, FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def write_json(rows, fp):
+    json.dump(rows, fp, indent=2)
+    fp.write("\n")
+
+
+def plot(rows, path):
+    """
+    Plots throughput and p95 latency against concurrency. Requires
+    `matplotlib <https://matplotlib.org/>`_.
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    x = [r["concurrency"] for r in rows]
+    fig, ax1 = plt.subplots()
+    ax1.plot(x, [r["throughput"] for r in rows], "o-", color="tab:blue")
+    ax1.set_xlabel("concurrency")
+    ax1.set_ylabel("throughput (operations/s)", color="tab:blue")
+    ax2 = ax1.twinx()
+    ax2.plot(x, [(r["p95"] or 0) * 1000 for r in rows], "s--", color="tab:red")
+    ax2.set_ylabel("p95 latency (ms)", color="tab:red")
+    ax1.set_title("%s (%s)" % (rows[0]["scenario"], rows[0]["mode"]))
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m koordinates.loadtest",
+        description="Load test the Koordinates client against a simulated site.",
+    )
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        default="1,2,4,8,16",
+        help="comma-separated concurrency levels (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-d",
+        "--duration",
+        type=float,
+        default=5.0,
+        help="seconds to run each level for (default: %(default)s)",
+    )
+    parser.add_argument("--mode", choices=("threads", "asyncio"), default="threads")
+    parser.add_argument("--format", choices=("csv", "json"), default="csv")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--plot", help="also plot the results to this image file")
+
+    group = parser.add_argument_group("simulated site")
+    group.add_argument(
+        "--latency", type=float, default=0.02, help="seconds (default: %(default)s)"
+    )
+    group.add_argument("--bandwidth", type=int, help="bytes per second")
+    group.add_argument("--layers", type=int, default=1000)
+    group.add_argument("--page-size", type=int, default=100)
+    group.add_argument("--export-size", type=int, default=1024 ** 2, help="bytes")
+    group.add_argument("--export-delay", type=float, default=0.5, help="seconds")
+    group.add_argument(
+        "--rate-limit", type=float, default=0.0, help="fraction of requests to reject"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    rows = []
+    for concurrency in levels:
+        sim = Simulator(
+            layers=args.layers,
+            page_size=args.page_size,
+            latency=args.latency,
+            bandwidth=args.bandwidth,
+            rate_limit=args.rate_limit,
+            export_size=args.export_size,
+            export_delay=args.export_delay,
+        )
+        row = run(args.scenario, concurrency, args.duration, args.mode, sim)
+        print(
+            "%s x%d: %.1f ops/s, p50=%.1fms p95=%.1fms, %d errors"
+            % (
+                args.scenario,
+                concurrency,
+                row["throughput"],
+                (row["p50"] or 0) * 1000,
+                (row["p95"] or 0) * 1000,
+                row["errors"],
+            ),
+            file=sys.stderr,
+        )
+        rows.append(row)
+
+    write = write_csv if args.format == "csv" else write_json
+    if args.output:
+        with open(args.output, "w", newline="") as fp:
+            write(rows, fp)
+    else:
+        write(rows, sys.stdout)
+
+    if args.plot:
+        plot(rows, args.plot)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
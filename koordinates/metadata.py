@@ -4,8 +4,6 @@ provides an interface for adding, inspecting and downloading
 XML metadata documents against a range of objects.
 """
 
-from requests_toolbelt.downloadutils import stream
-
 from . import base
 from . import exceptions
 
@@ -60,6 +58,8 @@ class Metadata(base.InnerModel):
         If you pass this function an open file-like object as the fp parameter, the function will
         not close that file for you.
         """
+        from requests_toolbelt.downloadutils import stream
+
         r = self._client.request(
             "GET", getattr(self, format), headers={"Accept": "text/xml"}, stream=True
         )
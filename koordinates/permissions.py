@@ -111,19 +111,19 @@ class Permission(base.InnerModel):
     or :py:class:`koordinates.sets.Set` instance.
     """
 
+    _converters = {
+        "group": lambda permission, value: Group()._deserialize(
+            value, permission._manager.client.get_manager(Group)
+        ),
+        "user": lambda permission, value: User()._deserialize(
+            value, permission._manager.client.get_manager(User)
+        ),
+    }
+
     def _deserialize(self, data, manager):
-        super(Permission, self)._deserialize(data, manager, manager.parent_object)
-        self.group = (
-            Group()._deserialize(data["group"], manager.client.get_manager(Group))
-            if data.get("group")
-            else None
-        )
-        self.user = (
-            User()._deserialize(data["user"], manager.client.get_manager(User))
-            if data.get("user")
-            else None
+        return super(Permission, self)._deserialize(
+            data, manager, manager.parent_object
         )
-        return self
 
     class Meta:
         manager = PermissionManager
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+"""
+koordinates.profiling
+=====================
+
+Splits the time spent in client operations into network, JSON decoding and
+model deserialization phases. Normally used via
+:py:meth:`koordinates.client.Client.profile`:
+
+.. code-block:: python
+
+    with client.profile() as p:
+        for layer in client.layers.list():
+            ...
+
+    print(p.summary())
+
+Time is attributed to the outermost client operation on the stack when each
+phase happens: a manager method (eg. ``LayerManager.get``), a query (eg.
+``Query[Layer].__iter__``), or a model method (eg. ``Export.download``).
+"""
+
+import collections
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+
+from .utils import is_bound
+
+PHASES = ("network", "decode", "deserialize")
+
+# frames for decorated model methods aren't operations themselves
+_SKIP_CODE = (is_bound(lambda self: None).__code__,)
+
+
+class OperationStats(object):
+    """Accumulated time for one operation"""
+
+    def __init__(self, name):
+        self.name = name
+        self.requests = 0
+        self.objects = 0
+        self.bytes = 0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+
+    @property
+    def total(self):
+        """Total time spent in all phases, in seconds"""
+        return sum(self.phases.values())
+
+    def as_dict(self):
+        d = {
+            "requests": self.requests,
+            "objects": self.objects,
+            "bytes": self.bytes,
+            "total": self.total,
+        }
+        d.update(self.phases)
+        return d
+
+
+class Profiler(object):
+    """
+    Records the time spent in each phase of each client operation.
+
+    :param bool cprofile: also capture a :py:mod:`cProfile` profile of the
+        thread that started profiling.
+    """
+
+    def __init__(self, cprofile=False):
+        self.operations = collections.OrderedDict()
+        self.elapsed = 0.0
+        self.cprofile_stats = None
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._t0 = None
+
+    def start(self):
+        self._t0 = time.perf_counter()
+        if self._cprofile:
+            self._cprofile.enable()
+
+    def stop(self):
+        if self._cprofile:
+            self._cprofile.disable()
+            self.cprofile_stats = pstats.Stats(self._cprofile, stream=io.StringIO())
+        self.elapsed = time.perf_counter() - self._t0
+
+    def _operation_name(self, frame):
+        from .base import BaseManager, ModelBase, Query
+
+        name = None
+        while frame is not None:
+            if frame.f_code in _SKIP_CODE:
+                frame = frame.f_back
+                continue
+            obj = frame.f_locals.get("self")
+            method = frame.f_code.co_name
+            if isinstance(obj, Query):
+                name = "Query[%s].%s" % (obj._manager.model.__name__, method)
+            elif isinstance(obj, (BaseManager, ModelBase)):
+                name = "%s.%s" % (obj.__class__.__name__, method)
+            frame = frame.f_back
+        return name or "Client.request"
+
+    def _record(self, phase, elapsed, name, requests=0, objects=0, bytes=0):
+        with self._lock:
+            stats = self.operations.get(name)
+            if stats is None:
+                stats = self.operations[name] = OperationStats(name)
+            stats.phases[phase] += elapsed
+            stats.requests += requests
+            stats.objects += objects
+            stats.bytes += bytes
+
+    def phase(self, phase, **counts):
+        """
+        Context manager timing a phase. Phases nested within another phase
+        (eg. deserializing inner models) are counted as part of the outer one.
+        """
+        return _Phase(self, phase, counts)
+
+    def wrap_response(self, response, elapsed):
+        """
+        Records the network time for a response, and times its JSON decoding.
+        """
+        name = self._operation_name(sys._getframe(1))
+        try:
+            size = int(response.headers.get("Content-Length", 0))
+        except ValueError:
+            size = 0
+        self._record("network", elapsed, name, requests=1, bytes=size)
+
+        decode = response.json
+
+        def json_(**kwargs):
+            with self.phase("decode"):
+                return decode(**kwargs)
+
+        response.json = json_
+        return response
+
+    def report(self):
+        """
+        Returns the results as a JSON-serializable dict, with time in seconds.
+
+        :rtype: dict
+        """
+        total = sum(op.total for op in self.operations.values())
+        return {
+            "elapsed": self.elapsed,
+            "outside_client": max(self.elapsed - total, 0.0),
+            "operations": {
+                name: op.as_dict() for name, op in self.operations.items()
+            },
+        }
+
+    def save(self, path):
+        """Writes :py:meth:`report` to a JSON file"""
+        with open(path, "w") as fp:
+            json.dump(self.report(), fp, indent=2)
+
+    def summary(self):
+        """
+        Returns a text table of the results, slowest operations first.
+
+        :rtype: str
+        """
+        header = ("operation", "requests", "objects", "total") + PHASES
+        rows = []
+        for op in sorted(self.operations.values(), key=lambda o: -o.total):
+            rows.append(
+                (op.name, str(op.requests), str(op.objects), "%.3fs" % op.total)
+                + tuple("%.3fs" % op.phases[p] for p in PHASES)
+            )
+        report = self.report()
+        rows.append(
+            ("(outside client)", "", "", "%.3fs" % report["outside_client"])
+            + ("",) * len(PHASES)
+        )
+        rows.append(("(elapsed)", "", "", "%.3fs" % self.elapsed) + ("",) * len(PHASES))
+
+        widths = [max(len(r[i]) for r in [header] + rows) for i in range(len(header))]
+        lines = []
+        for row in [header] + rows:
+            lines.append(
+                "  ".join(
+                    c.ljust(w) if i == 0 else c.rjust(w)
+                    for i, (c, w) in enumerate(zip(row, widths))
+                )
+            )
+        lines.insert(1, "-" * len(lines[0]))
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.summary()
+
+
+class _Phase(object):
+    def __init__(self, profiler, phase, counts):
+        self.profiler = profiler
+        self.phase = phase
+        self.counts = counts
+
+    def __enter__(self):
+        local = self.profiler._local
+        self.outer = not getattr(local, "depth", 0)
+        local.depth = getattr(local, "depth", 0) + 1
+        if self.outer:
+            self.name = self.profiler._operation_name(sys._getframe(1))
+            self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler._local.depth -= 1
+        if self.outer:
+            self.profiler._record(
+                self.phase, time.perf_counter() - self.t0, self.name, **self.counts
+            )
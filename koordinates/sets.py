@@ -14,7 +14,7 @@ from koordinates.permissions import PermissionObjectMixin
 from koordinates.users import Group
 from koordinates.metadata import Metadata, MetadataManager
 from koordinates import base
-from koordinates.utils import is_bound
+from koordinates.utils import is_bound, lazy_property
 from .publishing import Publish
 
 logger = logging.getLogger(__name__)
@@ -29,12 +29,18 @@ class SetManager(base.Manager):
 
     _URL_KEY = "SET"
 
-    def __init__(self, client):
-        super(SetManager, self).__init__(client)
-        # Inner model managers
-        self.versions = SetVersionManager(client, self)
-        self._data = SetDataManager(client, self)
-        self._metadata = MetadataManager(self, client)
+    # Inner model managers
+    @lazy_property
+    def versions(self):
+        return SetVersionManager(self.client, self)
+
+    @lazy_property
+    def _data(self):
+        return SetDataManager(self.client, self)
+
+    @lazy_property
+    def _metadata(self):
+        return MetadataManager(self.client, self)
 
     def list_drafts(self):
         """
@@ -130,24 +136,17 @@ class Set(base.Model, PermissionObjectMixin):
         serialize_skip = ("permissions",)
         deserialize_skip = ("permissions",)
 
-    def _deserialize(self, data, manager):
-        super(Set, self)._deserialize(data, manager)
-        self.group = (
-            Group()._deserialize(data["group"], manager.client.get_manager(Group))
-            if data.get("group")
-            else None
-        )
-        self.metadata = (
-            Metadata()._deserialize(data["metadata"], manager._metadata, self)
-            if data.get("metadata")
-            else None
-        )
-        self.version = (
-            SetVersion()._deserialize(data["version"], manager.versions, self)
-            if data.get("version")
-            else None
-        )
-        return self
+    _converters = {
+        "group": lambda set_, value: Group()._deserialize(
+            value, set_._manager.client.get_manager(Group)
+        ),
+        "metadata": lambda set_, value: Metadata()._deserialize(
+            value, set_._manager._metadata, set_
+        ),
+        "version": lambda set_, value: SetVersion()._deserialize(
+            value, set_._manager.versions, set_
+        ),
+    }
 
     @is_bound
     def set_metadata(self, fp, version_id=None):
@@ -0,0 +1,1000 @@
+# -*- coding: utf-8 -*-
+
+"""
+koordinates.simulator
+=====================
+
+An in-process stand-in for the `Publisher Admin APIs <https://help.koordinates.com/api/publisher-admin-api/>`_,
+for load and performance testing :py:class:`koordinates.client.Client` without a live site.
+
+The simulator is a `requests` transport adapter, so no sockets or servers are
+involved and it's safe to use from many threads at once. It serves synthetic
+layers, sets, sources, exports and publish groups, with ``Link: page-next``
+pagination and ``X-Resource-Range`` counts, and can inject latency, limited
+bandwidth and rate-limiting (``429``) errors.
+
+:Example:
+
+>>> sim = Simulator(layers=5000, latency=0.05)
+>>> client = sim.client()
+>>> len(client.layers.list())
+5000
+>>> sim.request_count
+1
+"""
+
+import collections
+import datetime
+import functools
+import http.client
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from .client import Client
+
+DEFAULT_HOST = "test.koordinates.com"
+API_ROOT = "/services/api/v1"
+
+# synthetic objects are created hourly from this point in time
+_EPOCH = int(datetime.datetime(2015, 1, 1, tzinfo=datetime.timezone.utc).timestamp())
+_KINDS = ("vector", "vector", "raster", "grid", "table")
+
+
+def _isodate(ts):
+    d = datetime.datetime.fromtimestamp(ts, datetime.timezone.utc)
+    return d.strftime("%Y-%m-%dT%H:%M:%S.") + "%03dZ" % (d.microsecond // 1000)
+
+
+def _parse_isodate(value):
+    value = value.strip().replace("Z", "+00:00")
+    d = datetime.datetime.fromisoformat(value)
+    if d.tzinfo is None:
+        d = d.replace(tzinfo=datetime.timezone.utc)
+    return d.timestamp()
+
+
+def _created_at(id):
+    return _EPOCH + id * 3600
+
+
+def _updated_at(id):
+    # deterministic, but not in the same order as the ids
+    return _created_at(id) + (id * 2654435761) % (90 * 86400)
+
+
+def _api_url(host, path):
+    return "https://%s%s%s" % (host, API_ROOT, path)
+
+
+def license_payload(id, host=DEFAULT_HOST):
+    """Returns a synthetic License API object"""
+    return {
+        "id": id,
+        "title": "Creative Commons Attribution 4.0 International",
+        "type": "cc-by",
+        "jurisdiction": "",
+        "version": "4.0",
+        "url": _api_url(host, "/licenses/%d/" % id),
+        "url_html": "https://%s/license/attribution-4-0-international/" % host,
+    }
+
+
+def group_payload(id, host=DEFAULT_HOST):
+    """Returns a synthetic Group object"""
+    return {
+        "id": id,
+        "url": _api_url(host, "/groups/%d/" % id),
+        "name": "Group %d" % id,
+        "country": "NZ",
+    }
+
+
+def user_payload(id, host=DEFAULT_HOST):
+    """Returns a synthetic User object"""
+    return {
+        "id": id,
+        "url": _api_url(host, "/users/%d/" % id),
+        "first_name": "User",
+        "last_name": str(id),
+        "country": "NZ",
+    }
+
+
+def layer_payload(id, host=DEFAULT_HOST, expanded=True):
+    """
+    Returns a synthetic Layer API object, similar in shape and size to a
+    real vector layer.
+
+    :param int id: layer ID. Other values are derived from it, so the same ID
+        always returns the same object.
+    :param str host: site hostname for URLs.
+    :param bool expanded: return the full object rather than the summary
+        returned by list requests.
+    """
+    url = _api_url(host, "/layers/%d/" % id)
+    version_id = id * 10
+    version_url = _api_url(host, "/layers/%d/versions/%d/" % (id, version_id))
+    kind = _KINDS[id % len(_KINDS)]
+    o = {
+        "id": id,
+        "url": url,
+        "type": "table" if kind == "table" else "layer",
+        "name": "Layer %d" % id,
+        "first_published_at": _isodate(_created_at(id) + 60),
+        "published_at": _isodate(_updated_at(id)),
+    }
+    if not expanded:
+        return o
+
+    description = (
+        "Synthetic %s layer %d. Polygons representing building rooftop outlines, "
+        "captured from aerial photography and updated periodically." % (kind, id)
+    )
+    o.update(
+        {
+            "description": description,
+            "description_html": "<p>%s</p>" % description,
+            "group": group_payload(100 + id % 20, host),
+            "data": {
+                "encoding": None,
+                "crs": "EPSG:2193",
+                "primary_key_fields": ["OBJECTID"],
+                "datasources": [{"id": id * 7}],
+                "geometry_field": "GEOMETRY",
+                "fields": [
+                    {"name": "GEOMETRY", "type": "geometry"},
+                    {"name": "OBJECTID", "type": "integer"},
+                    {"name": "Shape_Area", "type": "double"},
+                    {"name": "elevation", "type": "double"},
+                    {"name": "feat_code", "type": "string"},
+                ],
+                "feature_count": (id * 7919) % 100000,
+            },
+            "url_html": "https://%s/layer/%d-layer-%d/" % (host, id, id),
+            "published_version": version_url,
+            "latest_version": version_url,
+            "this_version": version_url,
+            "kind": kind,
+            "categories": [{"name": "Cadastral & Property", "slug": "cadastral"}],
+            "tags": ["building", "footprint", "synthetic"],
+            "collected_at": ["2012-01-01", "2012-05-01"],
+            "created_at": _isodate(_created_at(id)),
+            "updated_at": _isodate(_updated_at(id)),
+            "license": license_payload(1 + id % 5, host),
+            "metadata": {
+                "iso": version_url + "metadata/iso/",
+                "dc": version_url + "metadata/dc/",
+                "native": version_url + "metadata/",
+            },
+            "elevation_field": "elevation",
+            "version": {
+                "id": version_id,
+                "url": version_url,
+                "status": "ok",
+                "is_draft": False,
+                "created_at": _isodate(_updated_at(id)),
+                "reference": "",
+                "progress": 1.0,
+            },
+        }
+    )
+    return o
+
+
+def set_payload(id, host=DEFAULT_HOST, expanded=True):
+    """Returns a synthetic Set API object. See :py:func:`layer_payload`."""
+    url = _api_url(host, "/sets/%d/" % id)
+    version_url = _api_url(host, "/sets/%d/versions/%d/" % (id, id * 10))
+    o = {
+        "id": id,
+        "url": url,
+        "type": "set",
+        "title": "Set %d" % id,
+        "first_published_at": _isodate(_created_at(id) + 60),
+        "published_at": _isodate(_updated_at(id)),
+    }
+    if not expanded:
+        return o
+
+    o.update(
+        {
+            "description": "Synthetic set %d" % id,
+            "description_html": "<p>Synthetic set %d</p>" % id,
+            "group": group_payload(100 + id % 20, host),
+            "items": [_api_url(host, "/layers/%d/" % i) for i in range(id, id + 5)],
+            "url_html": "https://%s/set/%d-set-%d/" % (host, id, id),
+            "metadata": {
+                "iso": version_url + "metadata/iso/",
+                "dc": version_url + "metadata/dc/",
+                "native": version_url + "metadata/",
+            },
+            "created_at": _isodate(_created_at(id)),
+            "updated_at": _isodate(_updated_at(id)),
+            "version": {
+                "id": id * 10,
+                "url": version_url,
+                "status": "ok",
+                "is_draft": False,
+                "created_at": _isodate(_updated_at(id)),
+            },
+            "published_version": version_url,
+            "latest_version": version_url,
+            "this_version": version_url,
+        }
+    )
+    return o
+
+
+def source_payload(id, host=DEFAULT_HOST, expanded=True):
+    """Returns a synthetic Source API object. See :py:func:`layer_payload`."""
+    o = {
+        "id": id,
+        "url": _api_url(host, "/sources/%d/" % id),
+        "type": "upload",
+        "name": "Source %d" % id,
+    }
+    if not expanded:
+        return o
+
+    o.update(
+        {
+            "group": group_payload(100 + id % 20, host),
+            "user": user_payload(id % 50, host),
+            "created_at": _isodate(_created_at(id)),
+            "updated_at": _isodate(_updated_at(id)),
+            "last_scanned_at": _isodate(_updated_at(id)),
+            "scan_schedule": None,
+            "url_html": "https://%s/sources/%d/" % (host, id),
+            "metadata": None,
+        }
+    )
+    return o
+
+
+def export_payload(
+    id, host=DEFAULT_HOST, expanded=True, state="complete", size=1024 ** 2
+):
+    """Returns a synthetic Export API object. Exports are always expanded."""
+    url = _api_url(host, "/exports/%d/" % id)
+    return {
+        "id": id,
+        "name": "export-%d" % id,
+        "created_at": _isodate(_created_at(id)),
+        "created_via": "api",
+        "state": state,
+        "url": url,
+        "download_url": (url + "download/") if state == "complete" else None,
+        "extent": None,
+        "delivery": {"method": "download"},
+        "formats": {"vector": "application/x-zipped-shp"},
+        "items": [{"item": _api_url(host, "/layers/%d/" % (1 + id % 100))}],
+        "crs": "EPSG:2193",
+        "options": {},
+        "size_estimate_zipped": size,
+        "progress": 1.0 if state == "complete" else 0.0,
+    }
+
+
+def publish_payload(id, host=DEFAULT_HOST, expanded=True, items=()):
+    """Returns a synthetic Publish API object. Publish groups are always expanded."""
+    return {
+        "id": id,
+        "url": _api_url(host, "/publish/%d/" % id),
+        "state": "completed",
+        "created_at": _isodate(_created_at(id)),
+        "created_by": user_payload(1, host),
+        "publish_strategy": "together",
+        "error_strategy": "abort",
+        "items": list(items),
+    }
+
+
+# A row of the values lists are filtered and ordered by
+_Row = collections.namedtuple("_Row", "ref id created_at updated_at name kind")
+
+
+class _Collection(object):
+    """
+    A set of synthetic objects. Objects are generated on demand from their ID,
+    and only objects created or edited via the API are stored.
+    """
+
+    def __init__(self, factory, count, host):
+        self.factory = factory
+        self.count = count
+        self.host = host
+        self.stored = {}
+        self.deleted = set()
+        self.next_id = count + 1
+        # incremented whenever the contents change
+        self.version = 0
+        self._rows = None
+
+    def __contains__(self, id):
+        return (1 <= id <= self.count or id in self.stored) and id not in self.deleted
+
+    def get(self, id, expanded=True):
+        if id in self.stored:
+            o = self.stored[id]
+            if expanded:
+                return o
+            summary = self.factory(id, self.host, expanded=False)
+            return {k: o.get(k) for k in summary}
+        return self.factory(id, self.host, expanded=expanded)
+
+    def create(self, data):
+        id = self.next_id
+        self.next_id += 1
+        o = self.factory(id, self.host)
+        o.update(data)
+        o["id"] = id
+        o["created_at"] = o["updated_at"] = _isodate(time.time())
+        self.stored[id] = o
+        self._changed()
+        return o
+
+    def update(self, id, data):
+        o = dict(self.get(id))
+        o.update(data)
+        o["id"] = id
+        o["updated_at"] = _isodate(time.time())
+        self.stored[id] = o
+        self._changed()
+        return o
+
+    def delete(self, id):
+        self.deleted.add(id)
+        self._changed()
+
+    def _changed(self):
+        self.version += 1
+        self._rows = None
+
+    def rows(self):
+        if self._rows is None:
+            rows = []
+            for id in range(1, self.count + 1):
+                if id in self.stored or id in self.deleted:
+                    continue
+                o = self.factory(id, self.host, expanded=False)
+                rows.append(
+                    _Row(
+                        (self, id),
+                        id,
+                        _created_at(id),
+                        _updated_at(id),
+                        o.get("name") or o.get("title") or "",
+                        (
+                            _KINDS[id % len(_KINDS)]
+                            if o.get("type") in ("layer", "table")
+                            else None
+                        ),
+                    )
+                )
+            for id, o in sorted(self.stored.items()):
+                if id in self.deleted:
+                    continue
+                rows.append(
+                    _Row(
+                        (self, id),
+                        id,
+                        _parse_isodate(o["created_at"]),
+                        _parse_isodate(o["updated_at"]),
+                        o.get("name") or o.get("title") or "",
+                        o.get("kind"),
+                    )
+                )
+            self._rows = rows
+        return self._rows
+
+
+class _Body(object):
+    """
+    A response body, delivered at a limited bandwidth. Bodies can be either
+    ``bytes`` or generated on the fly (for large downloads).
+    """
+
+    def __init__(self, content=b"", size=None, bandwidth=None, sleep=time.sleep):
+        self._content = content
+        self._size = len(content) if size is None else size
+        self._pos = 0
+        self._bandwidth = bandwidth
+        self._sleep = sleep
+
+    def read(self, amt=None, **kwargs):
+        remaining = self._size - self._pos
+        n = remaining if amt is None else min(amt, remaining)
+        if n <= 0:
+            return b""
+        if self._content:
+            chunk = self._content[self._pos : self._pos + n]
+        else:
+            chunk = b"\0" * n
+        self._pos += n
+        if self._bandwidth:
+            self._sleep(n / float(self._bandwidth))
+        return chunk
+
+    def close(self):
+        self._pos = self._size
+
+
+class _Adapter(BaseAdapter):
+    def __init__(self, simulator):
+        super(_Adapter, self).__init__()
+        self.simulator = simulator
+
+    def send(
+        self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ):
+        return self.simulator._handle(request)
+
+    def close(self):
+        pass
+
+
+class Simulator(object):
+    """
+    In-process simulation of a Koordinates site.
+
+    :param str host: the site hostname.
+    :param int layers: number of layers (and tables) on the site.
+    :param int sets: number of sets.
+    :param int sources: number of sources.
+    :param int exports: number of (complete) exports.
+    :param int page_size: default number of results in each page of a list.
+    :param int max_page_size: maximum ``page_size`` clients can request.
+    :param latency: seconds to wait before each response. Either a number, or
+        a ``(min, max)`` tuple for a random latency in that range.
+    :param int bandwidth: bytes per second to deliver response bodies at.
+        ``None`` for no limit.
+    :param float rate_limit: fraction of requests (``0.0`` - ``1.0``) to
+        reject with a ``429 Too Many Requests`` error.
+    :param int rate_limit_every: reject every Nth request with a ``429`` error.
+    :param int export_size: size in bytes of export downloads.
+    :param float export_delay: seconds after creation before exports are
+        ready to download.
+    :param int seed: seed for the random number generator used for latency
+        and errors.
+    """
+
+    def __init__(
+        self,
+        host=DEFAULT_HOST,
+        layers=100,
+        sets=10,
+        sources=10,
+        exports=10,
+        page_size=100,
+        max_page_size=100,
+        latency=0.0,
+        bandwidth=None,
+        rate_limit=0.0,
+        rate_limit_every=None,
+        export_size=1024 ** 2,
+        export_delay=0.0,
+        seed=0,
+    ):
+        self.host = host
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.rate_limit = rate_limit
+        self.rate_limit_every = rate_limit_every
+        self.export_size = export_size
+        self.export_delay = export_delay
+
+        self.layers = _Collection(layer_payload, layers, host)
+        self.sets = _Collection(set_payload, sets, host)
+        self.sources = _Collection(source_payload, sources, host)
+        self.exports = _Collection(
+            functools.partial(export_payload, size=export_size), exports, host
+        )
+        self.publishing = _Collection(publish_payload, 0, host)
+
+        self.request_count = 0
+        self.bytes_sent = 0
+        self.requests = collections.Counter()
+
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._export_ready = {}
+        self._list_cache = collections.OrderedDict()
+        self.adapter = _Adapter(self)
+
+    def client(self, token="test", **kwargs):
+        """
+        Returns a new :py:class:`koordinates.client.Client` connected to this simulator.
+        """
+        client = Client(host=self.host, token=token, **kwargs)
+        self.install(client)
+        return client
+
+    def install(self, client):
+        """
+        Connect an existing :py:class:`koordinates.client.Client` to this simulator.
+        """
+        client.mount(self.adapter, "https://%s/" % self.host)
+        return client
+
+    def reset_stats(self):
+        """Reset the request counters"""
+        with self._lock:
+            self.request_count = 0
+            self.bytes_sent = 0
+            self.requests.clear()
+
+    # Request handling
+
+    def _handle(self, request):
+        url = urllib.parse.urlsplit(request.url)
+        params = urllib.parse.parse_qs(url.query, keep_blank_values=True)
+        method = request.method.upper()
+        path = url.path
+        if path.startswith(API_ROOT):
+            path = path[len(API_ROOT) :]
+
+        with self._lock:
+            self.request_count += 1
+            n = self.request_count
+            throttled = (
+                self.rate_limit and self._random.random() < self.rate_limit
+            ) or (self.rate_limit_every and n % self.rate_limit_every == 0)
+            latency = self.latency
+            if isinstance(latency, (tuple, list)):
+                latency = self._random.uniform(*latency)
+
+        if latency:
+            time.sleep(latency)
+
+        if throttled:
+            route = "throttled"
+            status, headers, body = self._error(
+                429, "Request was throttled", {"Retry-After": "1"}
+            )
+        else:
+            for route_method, pattern, handler in self._ROUTES:
+                if route_method != ("GET" if method == "HEAD" else method):
+                    continue
+                m = re.match(pattern + "$", path)
+                if m:
+                    route = "%s %s" % (route_method, pattern)
+                    args = [int(v) if v.isdigit() else v for v in m.groups()]
+                    try:
+                        status, headers, body = handler(self, request, params, *args)
+                    except KeyError:
+                        status, headers, body = self._error(404, "Not found")
+                    break
+            else:
+                route = "unknown"
+                status, headers, body = self._error(404, "Not found")
+
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+            headers.setdefault("Content-Type", "application/json")
+        if isinstance(body, bytes):
+            body = _Body(body, bandwidth=self.bandwidth)
+        if method == "HEAD":
+            body = _Body(b"")
+        headers.setdefault("Content-Length", str(body._size))
+
+        with self._lock:
+            self.requests[route] += 1
+            self.bytes_sent += body._size
+
+        r = Response()
+        r.status_code = status
+        r.reason = http.client.responses.get(status, "")
+        r.headers = CaseInsensitiveDict(headers)
+        r.raw = body
+        r.url = request.url
+        r.request = request
+        r.encoding = "utf-8"
+        r.connection = self.adapter
+        return r
+
+    def _error(self, status, message, headers=None):
+        return status, dict(headers or {}), {"error": message}
+
+    def _body_json(self, request):
+        body = request.body or b"{}"
+        if hasattr(body, "read"):
+            body = body.read()
+        if isinstance(body, bytes):
+            body = body.decode("utf-8")
+        return json.loads(body)
+
+    def _created(self, path):
+        return 201, {"Location": _api_url(self.host, path)}, b""
+
+    def _list(self, request, params, collections_, expanded=None):
+        """
+        Filter, order and paginate rows from one or more collections.
+        """
+        if expanded is None:
+            expanded = bool(request.headers.get("Expand"))
+
+        page = max(int(params.get("page", ["1"])[0]), 1)
+        page_size = int(params.get("page_size", [self.page_size])[0])
+        page_size = max(1, min(page_size, self.max_page_size))
+
+        query_key = (
+            tuple((id(c), c.version) for c in collections_),
+            tuple(
+                sorted(
+                    (k, tuple(v))
+                    for k, v in params.items()
+                    if k not in ("page", "page_size")
+                )
+            ),
+        )
+        with self._lock:
+            rows = self._list_cache.get(query_key)
+            if rows is None:
+                rows = self._filter_rows(collections_, params)
+                self._list_cache[query_key] = rows
+                while len(self._list_cache) > 32:
+                    self._list_cache.popitem(last=False)
+
+        total = len(rows)
+        start = (page - 1) * page_size
+        end = min(start + page_size, total)
+        results = [
+            collection.get(id, expanded=expanded)
+            for (collection, id) in (row.ref for row in rows[start:end])
+        ]
+
+        headers = {"X-Resource-Range": "%d-%d/%d" % (start, max(start, end), total)}
+        if end < total:
+            url = urllib.parse.urlsplit(request.url)
+            next_params = dict(params)
+            next_params["page"] = [str(page + 1)]
+            next_url = url._replace(
+                query=urllib.parse.urlencode(next_params, doseq=True)
+            ).geturl()
+            headers["Link"] = '<%s>; rel="page-next"' % next_url
+        return 200, headers, results
+
+    def _filter_rows(self, collections_, params):
+        rows = []
+        for collection in collections_:
+            rows.extend(collection.rows())
+
+        for key, values in params.items():
+            if key in ("page", "page_size", "sort"):
+                continue
+            field, _, op = key.partition(".")
+            if field not in _Row._fields or field == "ref":
+                # unsupported filters are ignored
+                continue
+            if op == "":
+                # multiple values for an exact match are alternatives
+                rows = [
+                    r
+                    for r in rows
+                    if any(self._match(getattr(r, field), op, v) for v in values)
+                ]
+            else:
+                for value in values:
+                    rows = [
+                        r for r in rows if self._match(getattr(r, field), op, value)
+                    ]
+
+        sort = params.get("sort", ["id"])[-1]
+        reverse = sort.startswith("-")
+        sort = sort.lstrip("-")
+        if sort in _Row._fields and sort != "ref":
+            rows = sorted(
+                rows, key=lambda r: (getattr(r, sort) or 0, r.id), reverse=reverse
+            )
+        return rows
+
+    def _match(self, row_value, op, value):
+        if isinstance(row_value, (int, float)) and not isinstance(row_value, bool):
+            try:
+                value = float(value)
+            except ValueError:
+                value = _parse_isodate(value)
+        if op == "":
+            return row_value == value
+        elif op == "gte":
+            return row_value >= value
+        elif op == "gt":
+            return row_value > value
+        elif op == "lte":
+            return row_value <= value
+        elif op == "lt":
+            return row_value < value
+        return True
+
+    # Layers & Sets
+
+    def _list_layers(self, request, params):
+        return self._list(request, params, [self.layers])
+
+    def _get_layer(self, request, params, id, version_id=None):
+        with self._lock:
+            if id not in self.layers:
+                raise KeyError(id)
+            return 200, {}, self.layers.get(id)
+
+    def _create_layer(self, request, params):
+        data = self._body_json(request)
+        with self._lock:
+            o = self.layers.create(data)
+        return self._created("/layers/%d/" % o["id"])
+
+    def _delete_layer(self, request, params, id):
+        with self._lock:
+            if id not in self.layers:
+                raise KeyError(id)
+            self.layers.delete(id)
+        return 204, {}, b""
+
+    def _list_layer_versions(self, request, params, id):
+        layer = self._get_layer(request, params, id)[2]
+        return 200, {"X-Resource-Range": "0-1/1"}, [layer["version"]]
+
+    def _create_layer_version(self, request, params, id):
+        layer = self._get_layer(request, params, id)[2]
+        return self._created("/layers/%d/versions/%d/" % (id, layer["version"]["id"]))
+
+    def _edit_layer_version(self, request, params, id, version_id):
+        data = self._body_json(request)
+        with self._lock:
+            if id not in self.layers:
+                raise KeyError(id)
+            return 200, {}, self.layers.update(id, data)
+
+    def _import_layer(self, request, params, id, version_id=None):
+        return self._get_layer(request, params, id)
+
+    def _publish_layer_version(self, request, params, id, version_id):
+        layer = self._get_layer(request, params, id)[2]
+        with self._lock:
+            o = self.publishing.create({"items": [layer["this_version"]]})
+        return self._created("/publish/%d/" % o["id"])
+
+    def _list_sets(self, request, params):
+        return self._list(request, params, [self.sets])
+
+    def _get_set(self, request, params, id, version_id=None):
+        with self._lock:
+            if id not in self.sets:
+                raise KeyError(id)
+            return 200, {}, self.sets.get(id)
+
+    def _create_set(self, request, params):
+        data = self._body_json(request)
+        with self._lock:
+            o = self.sets.create(data)
+        return self._created("/sets/%d/" % o["id"])
+
+    def _publish_set_version(self, request, params, id, version_id):
+        s = self._get_set(request, params, id)[2]
+        with self._lock:
+            o = self.publishing.create({"items": [s["this_version"]]})
+        return self._created("/publish/%d/" % o["id"])
+
+    def _list_catalog(self, request, params):
+        return self._list(request, params, [self.layers, self.sets])
+
+    def _get_license(self, request, params, id):
+        return 200, {}, license_payload(id, self.host)
+
+    def _get_group(self, request, params, id):
+        return 200, {}, group_payload(id, self.host)
+
+    # Sources
+
+    def _list_sources(self, request, params):
+        return self._list(request, params, [self.sources])
+
+    def _get_source(self, request, params, id):
+        with self._lock:
+            if id not in self.sources:
+                raise KeyError(id)
+            return 200, {}, self.sources.get(id)
+
+    def _create_source(self, request, params):
+        content_type = request.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/"):
+            from requests_toolbelt.multipart.decoder import MultipartDecoder
+
+            body = request.body
+            if hasattr(body, "read"):
+                # read through the encoder, so upload progress callbacks fire
+                chunks = []
+                while True:
+                    chunk = body.read(64 * 1024)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                body = b"".join(chunks)
+            data = {}
+            for part in MultipartDecoder(body, content_type).parts:
+                disposition = part.headers.get(b"Content-Disposition", b"")
+                if b'name="source"' in disposition:
+                    data = json.loads(part.text)
+        else:
+            data = self._body_json(request)
+
+        with self._lock:
+            o = self.sources.create(data)
+        return self._created("/sources/%d/" % o["id"])
+
+    def _delete_source(self, request, params, id):
+        with self._lock:
+            if id not in self.sources:
+                raise KeyError(id)
+            self.sources.delete(id)
+        return 204, {}, b""
+
+    # Exports
+
+    def _list_exports(self, request, params):
+        return self._list(request, params, [self.exports], expanded=True)
+
+    def _get_export(self, request, params, id):
+        with self._lock:
+            if id not in self.exports:
+                raise KeyError(id)
+            o = self.exports.get(id)
+            ready_at = self._export_ready.get(id)
+            if ready_at is not None and time.time() >= ready_at:
+                # processing has finished
+                del self._export_ready[id]
+                o = self.exports.update(
+                    id,
+                    {
+                        "state": "complete",
+                        "progress": 1.0,
+                        "download_url": o["url"] + "download/",
+                    },
+                )
+            return 200, {}, o
+
+    def _create_export(self, request, params):
+        data = self._body_json(request)
+        if not data.get("items"):
+            return 400, {}, {"items": ["This field is required."]}
+        data.update(
+            {
+                "state": "processing",
+                "progress": 0.0,
+                "download_url": None,
+                "size_estimate_zipped": self.export_size,
+            }
+        )
+        with self._lock:
+            o = self.exports.create(data)
+            self._export_ready[o["id"]] = time.time() + self.export_delay
+        return self._created("/exports/%d/" % o["id"])
+
+    def _validate_export(self, request, params):
+        data = self._body_json(request)
+        items = [
+            dict(item, is_valid=True, invalid_reasons=[], price="0.00")
+            for item in data.get("items", [])
+        ]
+        return (
+            200,
+            {},
+            {
+                "items": items,
+                "size_estimate_zipped": self.export_size,
+                "is_valid": bool(items),
+                "invalid_reasons": [] if items else ["no-items"],
+            },
+        )
+
+    def _export_options(self, request, params):
+        return (
+            200,
+            {},
+            {
+                "formats": {
+                    "vector": {
+                        "application/x-zipped-shp": "Shapefile",
+                        "application/x-ogc-gpkg": "GeoPackage",
+                    },
+                    "table": {"text/csv": "CSV (text/csv)"},
+                    "raster": {"image/tiff;subtype=geotiff": "GeoTIFF"},
+                    "grid": {"image/tiff;subtype=geotiff": "GeoTIFF"},
+                }
+            },
+        )
+
+    def _cancel_export(self, request, params, id):
+        with self._lock:
+            if id not in self.exports:
+                raise KeyError(id)
+            self._export_ready.pop(id, None)
+            return 200, {}, self.exports.update(id, {"state": "cancelled"})
+
+    def _download_export(self, request, params, id):
+        with self._lock:
+            if id not in self.exports:
+                raise KeyError(id)
+            o = self.exports.get(id)
+        if o["state"] != "complete":
+            return self._error(409, "Export isn't complete")
+        size = o.get("size_estimate_zipped") or self.export_size
+        headers = {
+            "Content-Type": "application/zip",
+            "Content-Disposition": 'attachment; filename="%s.zip"' % o["name"],
+        }
+        return 200, headers, _Body(size=size, bandwidth=self.bandwidth)
+
+    # Publishing
+
+    def _list_publish(self, request, params):
+        return self._list(request, params, [self.publishing], expanded=True)
+
+    def _get_publish(self, request, params, id):
+        with self._lock:
+            if id not in self.publishing:
+                raise KeyError(id)
+            return 200, {}, self.publishing.get(id)
+
+    def _create_publish(self, request, params):
+        data = self._body_json(request)
+        with self._lock:
+            o = self.publishing.create(data)
+        return self._created("/publish/%d/" % o["id"])
+
+    def _cancel_publish(self, request, params, id):
+        with self._lock:
+            if id not in self.publishing:
+                raise KeyError(id)
+            self.publishing.delete(id)
+        return 204, {}, b""
+
+    _ROUTES = (
+        ("GET", r"/layers/", _list_layers),
+        ("GET", r"/layers/drafts/", _list_layers),
+        ("POST", r"/layers/", _create_layer),
+        ("GET", r"/layers/(\d+)/", _get_layer),
+        ("DELETE", r"/layers/(\d+)/", _delete_layer),
+        ("GET", r"/layers/(\d+)/versions/", _list_layer_versions),
+        ("GET", r"/layers/(\d+)/versions/(\d+|draft|published)/", _get_layer),
+        ("POST", r"/layers/(\d+)/versions/", _create_layer_version),
+        ("PUT", r"/layers/(\d+)/versions/(\d+)/", _edit_layer_version),
+        ("POST", r"/layers/(\d+)/versions/import/", _import_layer),
+        ("POST", r"/layers/(\d+)/versions/(\d+)/import/", _import_layer),
+        ("POST", r"/layers/(\d+)/versions/(\d+)/publish/", _publish_layer_version),
+        ("GET", r"/sets/", _list_sets),
+        ("GET", r"/sets/drafts/", _list_sets),
+        ("POST", r"/sets/", _create_set),
+        ("GET", r"/sets/(\d+)/", _get_set),
+        ("GET", r"/sets/(\d+)/versions/(\d+|draft|published)/", _get_set),
+        ("POST", r"/sets/(\d+)/versions/(\d+)/publish/", _publish_set_version),
+        ("GET", r"/data/", _list_catalog),
+        ("GET", r"/data/latest/", _list_catalog),
+        ("GET", r"/licenses/(\d+)/", _get_license),
+        ("GET", r"/groups/(\d+)/", _get_group),
+        ("GET", r"/sources/", _list_sources),
+        ("POST", r"/sources/", _create_source),
+        ("GET", r"/sources/(\d+)/", _get_source),
+        ("DELETE", r"/sources/(\d+)/", _delete_source),
+        ("GET", r"/exports/", _list_exports),
+        ("POST", r"/exports/", _create_export),
+        ("POST", r"/exports/validate/", _validate_export),
+        ("OPTIONS", r"/exports/", _export_options),
+        ("GET", r"/exports/(\d+)/", _get_export),
+        ("DELETE", r"/exports/(\d+)/", _cancel_export),
+        ("GET", r"/exports/(\d+)/download/", _download_export),
+        ("GET", r"/publish/", _list_publish),
+        ("POST", r"/publish/", _create_publish),
+        ("GET", r"/publish/(\d+)/", _get_publish),
+        ("DELETE", r"/publish/(\d+)/", _cancel_publish),
+    )
@@ -21,14 +21,12 @@ import logging
 import mimetypes
 import os
 
-from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
-
 from . import base
 from .exceptions import ClientValidationError
 from .metadata import Metadata, MetadataManager
 from .permissions import PermissionObjectMixin
 from .users import Group, User
-from .utils import is_bound
+from .utils import is_bound, lazy_property
 
 
 logger = logging.getLogger(__name__)
@@ -43,10 +41,9 @@ class SourceManager(base.Manager):
 
     _URL_KEY = "SOURCE"
 
-    def __init__(self, client):
-        super(SourceManager, self).__init__(client)
-        # Inner model managers
-        self._metadata = MetadataManager(client, self)
+    @lazy_property
+    def _metadata(self):
+        return MetadataManager(self.client, self)
 
     def create(self, source, upload_progress_callback=None):
         """
@@ -157,24 +154,17 @@ class Source(base.Model, PermissionObjectMixin):
         self.items = []
         super(Source, self).__init__(**kwargs)
 
-    def _deserialize(self, data, manager):
-        super(Source, self)._deserialize(data, manager)
-        self.group = (
-            Group()._deserialize(data["group"], manager.client.get_manager(Group))
-            if data.get("group")
-            else None
-        )
-        self.user = (
-            User()._deserialize(data["user"], manager.client.get_manager(User))
-            if data.get("user")
-            else None
-        )
-        self.metadata = (
-            Metadata()._deserialize(data["metadata"], manager._metadata, self)
-            if data.get("metadata")
-            else None
-        )
-        return self
+    _converters = {
+        "group": lambda source, value: Group()._deserialize(
+            value, source._manager.client.get_manager(Group)
+        ),
+        "user": lambda source, value: User()._deserialize(
+            value, source._manager.client.get_manager(User)
+        ),
+        "metadata": lambda source, value: Metadata()._deserialize(
+            value, source._manager._metadata, source
+        ),
+    }
 
     def _create(self, manager, *args, **kwargs):
         target_url = manager.client.get_url("SOURCE", "POST", "create")
@@ -243,6 +233,8 @@ class UploadSource(Source):
         self._files = collections.OrderedDict()
 
     def _create(self, manager, callback=None):
+        from requests_toolbelt import MultipartEncoder, MultipartEncoderMonitor
+
         if self.type != self.TYPE_UPLOAD:
             raise ClientValidationError("Model/type mismatch")
 
@@ -392,10 +384,9 @@ class Scan(base.Model):
 class DatasourceManager(base.Manager):
     _URL_KEY = "DATASOURCE"
 
-    def __init__(self, client):
-        super(DatasourceManager, self).__init__(client)
-        # Inner model managers
-        self._metadata = MetadataManager(client, self)
+    @lazy_property
+    def _metadata(self):
+        return MetadataManager(self.client, self)
 
 
 class Datasource(base.Model):
@@ -410,11 +401,8 @@ class Datasource(base.Model):
             "source": Source,
         }
 
-    def _deserialize(self, data, manager):
-        super(Datasource, self)._deserialize(data, manager)
-        self.metadata = (
-            Metadata()._deserialize(data["metadata"], manager._metadata, self)
-            if data.get("metadata")
-            else None
-        )
-        return self
+    _converters = {
+        "metadata": lambda datasource, value: Metadata()._deserialize(
+            value, datasource._manager._metadata, datasource
+        ),
+    }
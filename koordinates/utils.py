@@ -10,8 +10,6 @@ Client Library
 """
 import functools
 
-import dateutil.parser
-
 
 def is_bound(method):
     """
@@ -32,6 +30,24 @@ def is_bound(method):
     return wrapper
 
 
+class lazy_property(object):
+    """
+    Decorator for a property that's computed on first access, then cached in
+    the instance ``__dict__``. If several threads compute it at once, they all
+    get the first value to be cached.
+    """
+
+    def __init__(self, method):
+        self.method = method
+        functools.update_wrapper(self, method)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = self.method(instance)
+        return instance.__dict__.setdefault(self.method.__name__, value)
+
+
 def make_date(v):
     """Returns a `DateTime` object, if `v` is a populated string, or an empty string.
 
@@ -42,4 +58,6 @@ def make_date(v):
     if v == "" or v is None:
         return ""
     else:
+        import dateutil.parser
+
         return dateutil.parser.parse(v)
@@ -5,16 +5,24 @@ Tests for the `koordinates.catalog` module.
 """
 
 
+import concurrent.futures
 import contextlib
 import json
+import multiprocessing
 import os
+import pickle
 import re
 import logging
+import time
 
 import pytest
 import responses
 
-from koordinates import Client, BadRequest
+from koordinates import Client, BadRequest, Group, Layer, Source
+from koordinates.layers import LayerManager
+from koordinates.sources import UploadSource
+
+from .response_data.responses_2 import layers_single_good_simulated_response
 
 
 def _env_set(key, value):
@@ -63,6 +71,49 @@ def test_token_from_param():
         assert client.token == "12345abcde"
 
 
+def test_lazy_managers(client):
+    assert client._manager_map == {}
+
+    layers = client.layers
+    assert client._manager_map == {Layer: layers}
+    assert client.tables is layers
+    assert client.get_manager(Layer) is layers
+    assert "versions" not in layers.__dict__
+    assert layers.versions is layers.versions
+
+    assert client.get_manager("Group") is client.get_manager(Group)
+    with pytest.raises(KeyError):
+        client.get_manager("NotAModel")
+    with pytest.raises(AttributeError):
+        client.not_a_manager
+
+
+def test_lazy_managers_subclass(client):
+    # model subclasses share their manager
+    sources = client.get_manager(UploadSource)
+    assert sources is client.sources
+    assert client.get_manager(Source) is sources
+    assert client._manager_map == {Source: sources}
+    # so it pickles as a lookup against the client
+    assert sources.__reduce_ex__(2) == (client.get_manager, (Source,))
+
+
+def test_lazy_managers_threads(client, monkeypatch):
+    # slow enough for the threads to overlap
+    init = LayerManager.__init__
+
+    def slow_init(self, *args, **kwargs):
+        time.sleep(0.01)
+        init(self, *args, **kwargs)
+
+    monkeypatch.setattr(LayerManager, "__init__", slow_init)
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        managers = list(executor.map(lambda i: client.get_manager(Layer), range(8)))
+        assert all(m is managers[0] for m in managers)
+        versions = list(executor.map(lambda m: m.versions, managers))
+        assert all(v is managers[0].versions for v in versions)
+
+
 def test_get_url_path(client):
     assert "/layers/" == client.get_url_path("LAYER", "GET", "multi")
     assert "/publish/12345/" == client.get_url_path(
@@ -239,3 +290,95 @@ def test_request_logging(caplog, client):
     lheaders = json.loads(lf.group("headers"))
     assert "FooHeader" in lheaders
     assert "Authorization" not in lheaders
+
+
+def test_pickle_client(client):
+    c2 = pickle.loads(pickle.dumps(client))
+    assert c2 is not client
+    assert c2.host == client.host
+    assert c2.token == client.token
+    assert c2._get_session() is not client._get_session()
+    assert c2._get_session().headers["Authorization"] == "key 12345abcde"
+    assert c2.get_manager(Layer).client is c2
+
+
+@responses.activate
+def test_pickle_bound_model(client):
+    responses.add(
+        responses.GET,
+        client.get_url("LAYER", "GET", "single", {"id": 1474}),
+        body=layers_single_good_simulated_response,
+        status=200,
+        content_type="application/json",
+    )
+    layer = client.layers.get(1474)
+
+    layer2 = pickle.loads(pickle.dumps(layer))
+    assert layer2 == layer
+    assert layer2.name == layer.name
+    assert layer2.data.crs == "EPSG:2193"
+    assert layer2._is_bound
+    # the manager is looked up on the new client rather than copied
+    assert layer2._manager is layer2._client.get_manager(Layer)
+    assert layer2.data._parent is layer2
+
+
+def _refresh_in_child(layer):
+    # runs in a worker process, against its own stubbed transport
+    with responses.RequestsMock() as rsps:
+        data = json.loads(layers_single_good_simulated_response)
+        data["name"] = "Refreshed in %s" % os.getpid()
+        rsps.add(responses.GET, layer.url, json=data)
+        layer.refresh()
+        return layer.name, os.getpid()
+
+
+@responses.activate
+def test_process_pool(client):
+    responses.add(
+        responses.GET,
+        client.get_url("LAYER", "GET", "single", {"id": 1474}),
+        body=layers_single_good_simulated_response,
+        status=200,
+        content_type="application/json",
+    )
+    layer = client.layers.get(1474)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(_refresh_in_child, [layer] * 4))
+
+    for name, pid in results:
+        assert pid != os.getpid()
+        assert name == "Refreshed in %s" % pid
+
+
+_FORK_STATE = {}
+
+
+def _request_after_fork(url):
+    c = _FORK_STATE["client"]
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, url, json=[])
+        c.request("GET", url)
+    return c._session is not _FORK_STATE["session"]
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="needs fork()"
+)
+def test_fork_resets_session(client):
+    _FORK_STATE.update(client=client, session=client._get_session())
+    url = "https://test.koordinates.com/api/v1/test/"
+    try:
+        ctx = multiprocessing.get_context("fork")
+        with concurrent.futures.ProcessPoolExecutor(1, mp_context=ctx) as pool:
+            assert pool.submit(_request_after_fork, url).result()
+    finally:
+        _FORK_STATE.clear()
+
+    # the parent's session is untouched
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, url, json=[])
+        old_session = client._session
+        client.request("GET", url)
+        assert client._session is old_session
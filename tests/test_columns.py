@@ -0,0 +1,107 @@
+import datetime
+import json
+
+import pytest
+import responses
+
+from koordinates import Client, columns
+
+from .test_models import FooManager
+
+
+UTC = datetime.timezone.utc
+RESULTS = [
+    {
+        "id": 1,
+        "title": "a",
+        "group": {"name": "g"},
+        "size": 1.5,
+        "updated_at": "2020-01-01T10:00:00Z",
+    },
+    {
+        "id": 2,
+        "title": "b",
+        "group": None,
+        "size": None,
+        "updated_at": "2020-01-01T22:30:00.500+12:00",
+    },
+    {"id": 3, "title": "c", "size": 2, "updated_at": None},
+]
+FIELDS = ["id", "title", "group__name", "size", "updated_at"]
+
+
+@pytest.fixture
+def manager():
+    c = Client(host="test.koordinates.com", token="test")
+    return FooManager(c)
+
+
+def _add_results():
+    responses.add(
+        responses.GET,
+        FooManager.TEST_LIST_URL,
+        body=json.dumps(RESULTS),
+        content_type="application/json",
+    )
+
+
+@responses.activate
+def test_to_columns(manager):
+    _add_results()
+    result = manager.list().to_columns(FIELDS, chunk_size=2)
+    assert result == {
+        "id": [1, 2, 3],
+        "title": ["a", "b", "c"],
+        "group__name": ["g", None, None],
+        "size": [1.5, None, 2],
+        "updated_at": [
+            datetime.datetime(2020, 1, 1, 10, 0, tzinfo=UTC),
+            datetime.datetime(2020, 1, 1, 10, 30, 0, 500000, tzinfo=UTC),
+            None,
+        ],
+    }
+
+
+def test_to_columns_invalid(manager):
+    with pytest.raises(ValueError):
+        manager.list().to_columns([])
+    with pytest.raises(ValueError):
+        manager.list().to_columns(["id"], format="csv")
+    with pytest.raises(ValueError):
+        manager.list().to_columns(["id"], chunk_size=0)
+
+
+def test_utc_text():
+    assert columns._utc_text("2020-01-01T10:00:00Z") == "2020-01-01T10:00:00"
+    assert columns._utc_text("2020-01-01T10:00:00+00:00") == "2020-01-01T10:00:00"
+    assert columns._utc_text("2020-01-01T10:00:00-02:00") == "2020-01-01T12:00:00"
+    assert columns._utc_text("") is None
+    assert columns._utc_text(None) is None
+
+
+@responses.activate
+def test_to_columns_numpy(manager):
+    np = pytest.importorskip("numpy")
+    _add_results()
+    result = manager.list().to_columns(FIELDS, format="numpy", chunk_size=2)
+    assert result.dtype.names == tuple(FIELDS)
+    assert result["id"].tolist() == [1, 2, 3]
+    assert result["title"].tolist() == ["a", "b", "c"]
+    assert np.isnan(result["size"][1])
+    assert result["updated_at"].dtype == np.dtype("datetime64[us]")
+    assert str(result["updated_at"][1]) == "2020-01-01T10:30:00.500000"
+    assert np.isnat(result["updated_at"][2])
+
+
+@responses.activate
+def test_to_columns_arrow(manager):
+    pa = pytest.importorskip("pyarrow")
+    _add_results()
+    table = manager.list().to_columns(FIELDS, format="arrow", chunk_size=2)
+    assert table.num_rows == 3
+    assert len(table.to_batches()) == 2
+    assert table.column("id").to_pylist() == [1, 2, 3]
+    assert table.schema.field("updated_at").type == pa.timestamp("us", tz="UTC")
+    assert table.column("updated_at").to_pylist()[0] == datetime.datetime(
+        2020, 1, 1, 10, 0, tzinfo=UTC
+    )
@@ -0,0 +1,205 @@
+import gzip
+import json
+import os
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import pytest
+import responses
+
+from koordinates import Client, dump
+
+from .test_models import FooManager
+
+
+@pytest.fixture
+def manager():
+    c = Client(host="test.koordinates.com", token="test")
+    return FooManager(c)
+
+
+def _result(id):
+    return {"id": id, "title": "Foo %d" % id, "group": {"name": "g%d" % (id % 3)}}
+
+
+def _add_paged_server(total, page_size=10):
+    def callback(request):
+        params = parse_qs(urlparse(request.url).query)
+        page = int(params.get("page", ["1"])[0])
+        start = (page - 1) * page_size
+        end = min(start + page_size, total)
+        headers = {"X-Resource-Range": "%d-%d/%d" % (start, end, total)}
+        if end < total:
+            next_params = dict(params, page=[str(page + 1)])
+            headers["Link"] = '<%s?%s>; rel="page-next"' % (
+                FooManager.TEST_LIST_URL,
+                urlencode(next_params, doseq=True),
+            )
+        body = json.dumps([_result(id) for id in range(start, end)])
+        return (200, headers, body)
+
+    responses.add_callback(
+        responses.GET,
+        FooManager.TEST_LIST_URL,
+        callback=callback,
+        content_type="application/json",
+    )
+
+
+def _read_ndjson(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as f:
+        return [json.loads(line) for line in f]
+
+
+@responses.activate
+def test_dump_ndjson(manager, tmp_path):
+    _add_paged_server(total=25)
+    path = str(tmp_path / "foo.ndjson")
+
+    stats = manager.list().dump(path)
+    assert _read_ndjson(path) == [_result(i) for i in range(25)]
+    assert stats.rows == 25
+    assert stats.pages == 3
+    assert stats.bytes == os.path.getsize(path)
+    assert not stats.resumed
+    assert stats.as_dict()["rows"] == 25
+    assert "25 rows" in str(stats)
+    assert not os.path.exists(path + ".cursor")
+
+    # starts again from scratch
+    manager.list().dump(path)
+    assert len(_read_ndjson(path)) == 25
+
+
+@responses.activate
+def test_dump_ndjson_gzip(manager, tmp_path):
+    _add_paged_server(total=25)
+    path = str(tmp_path / "foo.ndjson.gz")
+
+    stats = manager.list().dump(path)
+    assert _read_ndjson(path) == [_result(i) for i in range(25)]
+    assert stats.bytes == os.path.getsize(path)
+
+
+@responses.activate
+def test_dump_fields(manager, tmp_path):
+    _add_paged_server(total=5)
+    path = str(tmp_path / "foo.ndjson")
+
+    manager.list().dump(path, fields=["id", "group__name"])
+    assert _read_ndjson(path) == [
+        {"id": i, "group__name": "g%d" % (i % 3)} for i in range(5)
+    ]
+
+
+@responses.activate
+def test_dump_resume(manager, tmp_path):
+    _add_paged_server(total=25)
+    path = str(tmp_path / "foo.ndjson.gz")
+
+    def fail(stats):
+        if stats.pages == 2:
+            raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        manager.list().dump(path, fields=["id"], progress=fail)
+    assert os.path.exists(path + ".cursor")
+
+    # simulate a partial write after the last checkpoint
+    with open(path, "ab") as f:
+        f.write(b"garbage")
+
+    requests_before = len(responses.calls)
+    progress = []
+    stats = manager.list().dump(path, progress=progress.append)
+    assert stats.resumed
+    assert stats.rows == 5
+    assert len(progress) == 1
+    assert len(responses.calls) == requests_before + 1
+    assert parse_qs(urlparse(responses.calls[-1].request.url).query)["page"] == ["3"]
+
+    # the fields from the original dump are kept
+    assert _read_ndjson(path) == [{"id": i} for i in range(25)]
+    assert not os.path.exists(path + ".cursor")
+
+
+@responses.activate
+def test_dump_resume_parallel(manager, tmp_path):
+    _add_paged_server(total=25)
+    path = str(tmp_path / "foo.ndjson")
+
+    def fail(stats):
+        if stats.pages == 2:
+            raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        manager.list().parallel(workers=2).dump(path, progress=fail)
+    assert os.path.exists(path + ".cursor")
+
+    stats = manager.list().parallel(workers=2).dump(path)
+    assert stats.resumed
+    assert stats.rows == 5
+    assert _read_ndjson(path) == [_result(i) for i in range(25)]
+    assert not os.path.exists(path + ".cursor")
+
+    with pytest.raises(ValueError):
+        manager.list().parallel(ordered=False).dump(path)
+
+
+def test_dump_invalid(manager, tmp_path):
+    with pytest.raises(ValueError):
+        manager.list().dump(str(tmp_path / "foo.csv"), format="csv")
+    with pytest.raises(ValueError):
+        manager.list().dump(str(tmp_path / "foo.ndjson"), compression="zip")
+
+
+def test_guess_format():
+    assert dump._guess_format("foo.ndjson") == "ndjson"
+    assert dump._guess_format("foo.json.gz") == "ndjson"
+    assert dump._guess_format("foo.parquet") == "parquet"
+    assert dump._guess_compression("foo.ndjson.xz") == "xz"
+    assert dump._guess_compression("foo.ndjson") is None
+
+
+@responses.activate
+def test_dump_parquet(manager, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    _add_paged_server(total=25)
+    path = str(tmp_path / "foo.parquet")
+
+    def fail(stats):
+        if stats.pages == 2:
+            raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        manager.list().dump(path, progress=fail, row_group_size=10)
+    assert len(os.listdir(path + ".parts")) == 2
+
+    stats = dump.dump(manager.list(), path, row_group_size=10)
+    assert stats.resumed
+    assert stats.rows == 5
+
+    table = pq.read_table(path)
+    assert table.column_names == ["id", "title", "group"]
+    assert table.column("id").to_pylist() == list(range(25))
+    assert json.loads(table.column("group")[4].as_py()) == {"name": "g1"}
+    assert not os.path.exists(path + ".parts")
+    assert not os.path.exists(path + ".cursor")
+
+
+@responses.activate
+def test_dump_parquet_mixed_fields(manager, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    responses.add(
+        responses.GET,
+        FooManager.TEST_LIST_URL,
+        json=[{"id": 0}, {"id": 1, "title": "b"}, {"id": 2, "extra": 1.5}, {"id": 3}],
+        headers={"X-Resource-Range": "0-4/4"},
+    )
+    path = str(tmp_path / "foo.parquet")
+
+    manager.list().dump(path, row_group_size=2)
+    table = pq.read_table(path)
+    assert table.column_names == ["id", "title", "extra"]
+    assert table.column("title").to_pylist() == [None, "b", None, None]
+    assert table.column("extra").to_pylist() == [None, None, 1.5, None]
@@ -5,6 +5,8 @@ General tests.
 """
 
 
+import subprocess
+import sys
 import urllib
 
 import pytest
@@ -41,6 +43,23 @@ def contains_substring(strtosearch, strtosearchfor):
     return strtosearch.lower().find(strtosearchfor) > -1
 
 
+def test_lazy_imports():
+    code = (
+        "import sys, koordinates\n"
+        "assert 'koordinates.client' not in sys.modules\n"
+        "assert 'requests' not in sys.modules\n"
+        "assert 'dateutil' not in sys.modules\n"
+        "assert koordinates.Layer.__module__ == 'koordinates.layers'\n"
+        "assert 'koordinates.layers' in sys.modules\n"
+        "assert koordinates.catalog.CatalogManager\n"
+    )
+    subprocess.check_call([sys.executable, "-c", code])
+
+    assert set(koordinates.__all__) <= set(dir(koordinates))
+    with pytest.raises(AttributeError):
+        koordinates.NotAThing
+
+
 def test_instantiate_group_class():
     g = koordinates.Group(
         id=99, url="http//example.com", name="Group Name", country="NZ"
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the `koordinates.loadtest` module.
+"""
+
+import csv
+import json
+
+import pytest
+
+from koordinates import loadtest
+from koordinates.simulator import Simulator
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert loadtest.percentile(values, 50) == 50
+    assert loadtest.percentile(values, 95) == 95
+    assert loadtest.percentile(values, 100) == 100
+    assert loadtest.percentile([3, 1, 2], 0) == 1
+    assert loadtest.percentile([], 50) is None
+
+
+@pytest.mark.parametrize("scenario", sorted(loadtest.SCENARIOS))
+@pytest.mark.parametrize("mode", ["threads", "asyncio"])
+def test_run(scenario, mode):
+    sim = Simulator(layers=150, export_size=1000, export_delay=0.02)
+    row = loadtest.run(scenario, 2, duration=0.1, mode=mode, simulator=sim)
+
+    assert set(row) == set(loadtest.FIELDS)
+    assert row["scenario"] == scenario
+    assert row["concurrency"] == 2
+    assert row["operations"] > 0
+    assert row["errors"] == 0
+    assert row["p50"] <= row["p95"] <= row["max"]
+    assert sim.request_count > 0
+
+
+def test_run_errors():
+    sim = Simulator(rate_limit=1.0)
+    row = loadtest.run("get", 1, duration=0.05, simulator=sim)
+    assert row["operations"] == 0
+    assert row["errors"] > 0
+    assert row["p50"] is None
+
+
+def test_main(tmp_path, capsys):
+    path = str(tmp_path / "results.csv")
+    loadtest.main(["get", "-c", "1,2", "-d", "0.05", "--latency", "0", "-o", path])
+    with open(path) as fp:
+        rows = list(csv.DictReader(fp))
+    assert [r["concurrency"] for r in rows] == ["1", "2"]
+    assert "get x2" in capsys.readouterr().err
+
+    loadtest.main(["get", "-c", "1", "-d", "0.05", "--format", "json"])
+    rows = json.loads(capsys.readouterr().out)
+    assert rows[0]["scenario"] == "get"
@@ -1,9 +1,12 @@
+import copy
+import datetime
 import json
 
 import pytest
 import responses
 
-from koordinates import base, Client
+from koordinates import base, Client, Group, Layer, User
+from koordinates.simulator import layer_payload
 from koordinates.utils import is_bound
 
 
@@ -165,6 +168,67 @@ class TestModels(object):
         assert isinstance(o.mylist, list)
         assert o.mylist == [1, 2]
 
+    def test_deserialize_lazy(self, client):
+        o = FooModel()._deserialize(
+            {
+                "id": 1,
+                "created_at": "2013-01-01T10:00:00Z",
+                "created_by": {"id": 5},
+            },
+            client.mgr,
+        )
+        assert "created_at" not in o.__dict__
+        assert o.created_at == datetime.datetime(
+            2013, 1, 1, 10, tzinfo=datetime.timezone.utc
+        )
+        assert o.__dict__["created_at"] is o.created_at
+        # the raw value isn't kept once it's converted
+        assert base._lazy_names(o._lazy) == ["created_by"]
+        assert isinstance(o.created_by, User)
+        assert o._lazy == ()
+        assert o._serialize()["created_by"] == {"id": 5}
+        with pytest.raises(AttributeError):
+            o.updated_at
+
+        # replaces the converted value
+        o._deserialize({"created_at": "2014-01-01T00:00:00Z"}, client.mgr)
+        assert o.created_at.year == 2014
+        assert o._serialize()["created_at"] == "2014-01-01T00:00:00+00:00"
+
+        # nothing to convert later
+        assert FooModel()._deserialize({"id": 1}, client.mgr)._lazy == ()
+
+    def test_deserialize_lazy_copy(self, client):
+        o = FooModel()._deserialize(
+            {"id": 1, "created_at": "2013-01-01T10:00:00Z"}, client.mgr
+        )
+        # copies share the raw values, converting them doesn't affect the other
+        o2 = copy.copy(o)
+        assert o2.created_at.year == 2013
+        assert o.created_at.year == 2013
+        assert o.created_at is not o2.created_at
+        assert o._lazy == o2._lazy == ()
+
+    def test_deserialize_converters(self, client):
+        manager = client.get_manager(Layer)
+        layer = Layer()._deserialize(layer_payload(1), manager)
+        assert "group" not in layer.__dict__
+        assert "data" not in layer.__dict__
+        assert isinstance(layer.group, Group)
+        assert layer.group is layer.group
+        assert layer.data._parent is layer
+        assert layer.data.crs == "EPSG:2193"
+        assert layer._serialize() == Layer()._deserialize(
+            layer_payload(1), manager
+        )._serialize()
+
+        data = dict(layer_payload(2), group=None, data={})
+        del data["metadata"]
+        layer = Layer()._deserialize(data, manager)
+        assert layer.group is None
+        assert layer.data is None
+        assert layer.metadata is None
+
     def test_serialize(self):
         o = FooModel(id=1234, attr="test", noserialize=1)
         assert o._serialize() == {
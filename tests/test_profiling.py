@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the `koordinates.profiling` module.
+"""
+
+import io
+import json
+import pstats
+
+from koordinates.simulator import Simulator
+
+
+def test_profile():
+    sim = Simulator(layers=150)
+    client = sim.client()
+
+    with client.profile() as p:
+        assert sum(1 for layer in client.layers.list().expand()) == 150
+        client.layers.get(1)
+        client.exports.get(1).download(io.BytesIO())
+    assert client._profiler is None
+
+    ops = p.operations
+    assert list(ops) == [
+        "Query[Layer].__iter__",
+        "LayerManager.get",
+        "ExportManager.get",
+        "Export.download",
+    ]
+    # nested models count towards their parent
+    assert ops["Query[Layer].__iter__"].objects == 150
+    assert ops["Query[Layer].__iter__"].requests == 2
+    assert ops["LayerManager.get"].objects == 1
+    assert ops["Export.download"].requests == 1
+
+    for op in ops.values():
+        assert op.phases["network"] > 0
+        assert op.total == sum(op.phases.values())
+    assert ops["Query[Layer].__iter__"].phases["decode"] > 0
+    assert ops["Query[Layer].__iter__"].phases["deserialize"] > 0
+    assert ops["Export.download"].phases["deserialize"] == 0
+
+    total = sum(op.total for op in ops.values())
+    assert p.elapsed >= total
+
+
+def test_profile_report(tmp_path):
+    client = Simulator().client()
+    with client.profile() as p:
+        client.layers.get(1)
+
+    report = p.report()
+    op = report["operations"]["LayerManager.get"]
+    assert op["requests"] == 1
+    assert op["bytes"] > 0
+    assert set(op) >= {"network", "decode", "deserialize", "total"}
+    assert report["outside_client"] >= 0
+
+    path = str(tmp_path / "profile.json")
+    p.save(path)
+    with open(path) as fp:
+        assert json.load(fp) == report
+
+    summary = p.summary().splitlines()
+    assert summary[0].split() == [
+        "operation",
+        "requests",
+        "objects",
+        "total",
+        "network",
+        "decode",
+        "deserialize",
+    ]
+    assert summary[2].startswith("LayerManager.get")
+    assert summary[-1].startswith("(elapsed)")
+
+
+def test_profile_cprofile():
+    client = Simulator().client()
+    with client.profile() as p:
+        client.layers.get(1)
+    assert p.cprofile_stats is None
+
+    with client.profile(cprofile=True) as p:
+        client.layers.get(1)
+    assert isinstance(p.cprofile_stats, pstats.Stats)
+    assert p.cprofile_stats.total_calls > 0
+
+
+def test_profile_threads():
+    import concurrent.futures
+
+    client = Simulator(layers=20).client()
+    with client.profile() as p:
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            list(executor.map(client.layers.get, range(1, 21)))
+
+    op = p.operations["LayerManager.get"]
+    assert op.requests == 20
+    assert op.objects == 20
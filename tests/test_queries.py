@@ -1,12 +1,16 @@
 import json
+import os
+import pickle
+import threading
 
 import pytest
+import requests
 import responses
 from responses import matchers
-from urllib.parse import parse_qs, urlparse
+from urllib.parse import parse_qs, urlencode, urlparse
 
 from koordinates import base, Client
-from koordinates.exceptions import ClientValidationError
+from koordinates.exceptions import ClientValidationError, ServerError
 
 from .test_models import FooManager, FooModel
 
@@ -151,6 +155,99 @@ def test_count(manager):
     assert len(responses.calls) == 1
 
 
+@responses.activate
+def test_count_head(manager):
+    responses.add(
+        responses.HEAD,
+        FooManager.TEST_LIST_URL,
+        adding_headers={"X-Resource-Range": "0-1/28"},
+    )
+
+    q = manager.list()
+    assert q.count() == 28
+    assert q.exists()
+    assert len(q) == 28
+    assert len(responses.calls) == 1
+    assert responses.calls[0].request.method == "HEAD"
+    assert _request_params(0) == {"page_size": "1"}
+
+
+@responses.activate
+def test_count_get(manager):
+    # HEAD isn't supported, so use a single-result page instead
+    responses.add(responses.HEAD, FooManager.TEST_LIST_URL, status=405)
+    _add_paged_server(total=28)
+
+    assert manager.list().count() == 28
+    assert [c.request.method for c in responses.calls] == ["HEAD", "GET"]
+    assert _request_params(1) == {"page_size": "1"}
+
+    # doesn't try HEAD again
+    assert manager.list().filter(thing="bang").exists()
+    assert [c.request.method for c in responses.calls] == ["HEAD", "GET", "GET"]
+
+
+@responses.activate
+def test_count_head_error(manager):
+    # other errors only fall back to GET for that count
+    responses.add(responses.HEAD, FooManager.TEST_LIST_URL, status=503)
+    responses.add(
+        responses.HEAD,
+        FooManager.TEST_LIST_URL,
+        adding_headers={"X-Resource-Range": "0-1/28"},
+    )
+    _add_paged_server(total=28)
+
+    assert manager.list().count() == 28
+    assert manager._count_via_head
+    assert manager.list().count() == 28
+    assert [c.request.method for c in responses.calls] == ["HEAD", "GET", "HEAD"]
+
+
+@responses.activate
+def test_count_head_without_range(manager):
+    responses.add(responses.HEAD, FooManager.TEST_LIST_URL)
+    _add_paged_server(total=28)
+
+    assert manager.list().count() == 28
+    assert not manager._count_via_head
+    assert [c.request.method for c in responses.calls] == ["HEAD", "GET"]
+
+
+@responses.activate
+def test_count_without_range(manager):
+    manager._count_via_head = False
+    responses.add(
+        responses.GET,
+        FooManager.TEST_LIST_URL,
+        match=[matchers.query_param_matcher({"page_size": "1"})],
+        body=json.dumps([]),
+        content_type="application/json",
+    )
+    assert manager.list().count() == 0
+    assert not manager.list().exists()
+
+
+@responses.activate
+def test_counts(manager):
+    manager._count_via_head = False
+    _add_paged_server(total=28)
+
+    counts = manager.list().counts(
+        {"all": {}, "bang": {"thing": "bang"}, "cheese": {"thing": "cheese"}}
+    )
+    assert counts == {"all": 28, "bang": 28, "cheese": 28}
+    assert len(responses.calls) == 3
+    assert sorted(_request_params(i).get("thing", "") for i in range(3)) == [
+        "",
+        "bang",
+        "cheese",
+    ]
+    assert manager.list().counts({}) == {}
+    with pytest.raises(ClientValidationError):
+        manager.list().counts({"bad": {"invalid": 1}})
+
+
 @responses.activate
 def test_pagination(manager):
     responses.add(
@@ -196,66 +293,915 @@ def test_pagination(manager):
     assert len(responses.calls) == 3
 
 
+def _add_pages(total=28, page_size=10):
+    for page, start in enumerate(range(0, total, page_size), 1):
+        end = min(start + page_size, total)
+        headers = {"X-Resource-Range": "%d-%d/%d" % (start, end, total)}
+        if end < total:
+            headers["Link"] = '<%s?page=%d>; rel="page-next"' % (
+                FooManager.TEST_LIST_URL,
+                page + 1,
+            )
+        params = {"page": str(page)} if page > 1 else {"page_size": "100"}
+        responses.add(
+            responses.GET,
+            FooManager.TEST_LIST_URL,
+            match=[matchers.query_param_matcher(params)],
+            body=json.dumps([{"id": id} for id in range(start, end)]),
+            content_type="application/json",
+            adding_headers=headers,
+        )
+
+
 @responses.activate
-def test_slicing(manager):
+def test_prefetch(manager):
+    _add_pages()
+
+    q = manager.list().prefetch(2)
+    assert q._prefetch == 2
+    assert q.filter(thing="bang")._prefetch == 2
+    assert manager.list()._prefetch == 0
+    pytest.raises(ValueError, manager.list().prefetch, -1)
+
+    assert [o.id for o in q] == list(range(28))
+    assert len(responses.calls) == 3
+    assert len(q) == 28
+
+
+@responses.activate
+def test_prefetch_abandoned(manager):
+    _add_pages(total=100)
+
+    it = iter(manager.list().prefetch(1))
+    assert next(it).id == 0
+    it.close()
+
+    for thread in threading.enumerate():
+        if thread.name == "koordinates-prefetch":
+            thread.join(timeout=5)
+            assert not thread.is_alive()
+    # stopped early, rather than fetching all 10 pages
+    assert len(responses.calls) <= 3
+
+
+@responses.activate
+def test_prefetch_error(manager):
     responses.add(
         responses.GET,
         FooManager.TEST_LIST_URL,
-        match=[matchers.query_param_matcher({})],
-        body=json.dumps([{"id": id} for id in range(10)]),
+        body=json.dumps([{"id": 0}]),
         content_type="application/json",
         adding_headers={
-            "X-Resource-Range": "0-10/28",
-            "Link": '<%s?page=2>; rel="page-next"' % FooManager.TEST_LIST_URL,
+            "Link": '<%s?page=2>; rel="page-next"' % FooManager.TEST_LIST_URL
         },
     )
+    responses.add(responses.GET, FooManager.TEST_LIST_URL + "?page=2", status=500)
+
+    it = iter(manager.list().prefetch(2))
+    assert next(it).id == 0
+    pytest.raises(ServerError, next, it)
+
+
+@responses.activate
+def test_parallel(manager):
+    _add_pages(total=95)
+
+    q = manager.list().parallel(3)
+    assert q._parallel == (3, True)
+    assert q.filter(thing="bang")._parallel == (3, True)
+    assert manager.list().parallel(0)._parallel is None
+    pytest.raises(ValueError, manager.list().parallel, -1)
+
+    assert [o.id for o in q] == list(range(95))
+    assert len(responses.calls) == 10
+
+    ids = [o.id for o in manager.list().parallel(3, ordered=False)]
+    assert sorted(ids) == list(range(95))
+    assert len(responses.calls) == 20
+
+
+@responses.activate
+def test_parallel_without_count(manager):
+    # no X-Resource-Range, so follow the page-next links instead
     responses.add(
         responses.GET,
         FooManager.TEST_LIST_URL,
-        match=[matchers.query_param_matcher({'page': '2'})],
-        body=json.dumps([{"id": id} for id in range(10, 20)]),
+        match=[matchers.query_param_matcher({"page_size": "100"})],
+        body=json.dumps([{"id": 0}, {"id": 1}]),
         content_type="application/json",
         adding_headers={
-            "X-Resource-Range": "10-20/28",
-            "Link": '<%s?page=3>; rel="page-next"' % FooManager.TEST_LIST_URL,
+            "Link": '<%s?cursor=abc>; rel="page-next"' % FooManager.TEST_LIST_URL
         },
     )
     responses.add(
         responses.GET,
         FooManager.TEST_LIST_URL,
-        match=[matchers.query_param_matcher({'page': '3'})],
-        body=json.dumps([{"id": id} for id in range(20, 28)]),
+        match=[matchers.query_param_matcher({"cursor": "abc"})],
+        body=json.dumps([{"id": 2}]),
         content_type="application/json",
-        adding_headers={"X-Resource-Range": "20-28/28",},
     )
 
-    q = manager.list()
-    for i, o in enumerate(q[:3]):
-        assert isinstance(o, FooModel)
+    assert [o.id for o in manager.list().parallel(4)] == [0, 1, 2]
+
+
+def test_page_url():
+    assert (
+        base._page_url("https://example.com/a/?page=2&thing=1", 5)
+        == "https://example.com/a/?thing=1&page=5"
+    )
+    assert base._page_url("https://example.com/a/", 2) == "https://example.com/a/?page=2"
 
-    assert i == 2  # 0-index
+
+def _add_paged_server(total, max_page_size=100, default_page_size=10):
+    """ Serves ``total`` results, respecting the page & page_size parameters """
+
+    def callback(request):
+        params = parse_qs(urlparse(request.url).query)
+        page = int(params.get("page", ["1"])[0])
+        page_size = int(params.get("page_size", [default_page_size])[0])
+        page_size = min(page_size, max_page_size)
+        start = (page - 1) * page_size
+        end = min(start + page_size, total)
+        headers = {"X-Resource-Range": "%d-%d/%d" % (start, end, total)}
+        if end < total:
+            next_params = dict(params, page=[str(page + 1)])
+            headers["Link"] = '<%s?%s>; rel="page-next"' % (
+                FooManager.TEST_LIST_URL,
+                urlencode(next_params, doseq=True),
+            )
+        body = json.dumps([{"id": id} for id in range(start, end)])
+        return (200, headers, body)
+
+    responses.add_callback(
+        responses.GET,
+        FooManager.TEST_LIST_URL,
+        callback=callback,
+        content_type="application/json",
+    )
+
+
+def _request_params(call):
+    return _request_params_url(responses.calls[call].request.url)
+
+
+def _request_params_url(url):
+    params = parse_qs(urlparse(url).query)
+    return {k: v[0] for k, v in params.items()}
+
+
+@responses.activate
+def test_slicing(manager):
+    _add_paged_server(total=28)
+
+    q = manager.list()
+    results = q[:3]
+    assert [o.id for o in results] == [0, 1, 2]
+    assert isinstance(results[0], FooModel)
     assert len(responses.calls) == 1
+    # only asks for as many results as it needs
+    assert _request_params(0) == {"page_size": "3"}
 
     # When the slice is bigger than the dataset
-    for i, o in enumerate(q[:50]):
-        continue
-
-    assert i == 27  # 0-index
-    assert len(responses.calls) == 4
+    assert [o.id for o in q[:50]] == list(range(28))
+    assert len(responses.calls) == 2
+    assert _request_params(1) == {"page_size": "50"}
 
-    # query[0] slice
+    # query[N]
     assert q[0].id == 0
     assert q[3].id == 3
+    assert _request_params(-1) == {"page_size": "1", "page": "4"}
     pytest.raises(IndexError, lambda qq: qq[999], q)
 
-    # Bad slices, we only support query[:N] where N>0
-    pytest.raises(ValueError, lambda qq: qq[-1], q)
-    pytest.raises(ValueError, lambda qq: qq[0:10], q)
-    pytest.raises(ValueError, lambda qq: qq[10:20], q)
-    pytest.raises(ValueError, lambda qq: qq[:10:3], q)
-    pytest.raises(ValueError, lambda qq: qq[:-5], q)
-    pytest.raises(ValueError, lambda qq: qq[:0], q)
-    pytest.raises(ValueError, lambda qq: qq[1:30:2], q)
+    # query[a:b] fetches a single page where possible
+    assert [o.id for o in q[10:20]] == list(range(10, 20))
+    assert _request_params(-1) == {"page_size": "10", "page": "2"}
+    assert [o.id for o in q[5:12]] == list(range(5, 12))
+    assert _request_params(-1) == {"page_size": "12"}
+    assert [o.id for o in q[25:35]] == [25, 26, 27]
+    assert [o.id for o in q[30:40]] == []
+    assert q[10:10] == []
+
+    # steps
+    assert [o.id for o in q[1:10:3]] == [1, 4, 7]
+
+    # an explicit page size is used as-is
+    q.page_size(5)[:3]
+    assert _request_params(-1) == {"page_size": "5"}
+
+    pytest.raises(ValueError, lambda qq: qq[::0], q)
+    pytest.raises(TypeError, lambda qq: qq["a"], q)
+
+
+@responses.activate
+def test_slicing_negative(manager):
+    _add_paged_server(total=28)
+
+    q = manager.list()
+    assert q[-1].id == 27
+    # len() is cached, and its first page is reused
+    assert len(responses.calls) == 1
+    assert [o.id for o in q[-3:]] == [25, 26, 27]
+    assert [o.id for o in q[:-25]] == [0, 1, 2]
+    assert [o.id for o in q[::-10]] == [27, 17, 7]
+    assert len(responses.calls) == 1
+    pytest.raises(IndexError, lambda qq: qq[-29], q)
+
+
+@responses.activate
+def test_slicing_deep(manager):
+    _add_paged_server(total=1000)
+
+    q = manager.list()
+    assert q[950].id == 950
+    assert len(responses.calls) == 1
+    assert _request_params(0) == {"page_size": "1", "page": "951"}
+
+    # spanning several pages, fetched concurrently
+    assert [o.id for o in q[150:420]] == list(range(150, 420))
+    assert len(responses.calls) == 5
+    assert sorted(_request_params(i)["page"] for i in range(1, 5)) == [
+        "2",
+        "3",
+        "4",
+        "5",
+    ]
+
+
+@responses.activate
+def test_slicing_page_size_mismatch(manager):
+    # the server only gives 10 results per page, whatever's asked for
+    _add_paged_server(total=28, max_page_size=10)
+
+    q = manager.list()
+    assert [o.id for o in q[15:25]] == list(range(15, 25))
+    assert [o.id for o in q[:20]] == list(range(20))
+
+
+def test_page_size(manager):
+    q = manager.list().page_size(20)
+    assert q._page_size == 20
+    assert "page_size=20" in q._to_url()
+    assert q.filter(thing="bang")._page_size == 20
+    pytest.raises(ValueError, manager.list().page_size, 0)
+
+    # unset, iteration picks its own
+    q = manager.list()
+    assert q._to_url() == FooManager.TEST_LIST_URL
+    assert q._to_url(page_size=100) == FooManager.TEST_LIST_URL + "?page_size=100"
+
+
+@responses.activate
+def test_page_size_iteration(manager):
+    responses.add(
+        responses.GET,
+        FooManager.TEST_LIST_URL,
+        body=json.dumps([{"id": id} for id in range(10)]),
+        content_type="application/json",
+        adding_headers={"X-Resource-Range": "0-10/10"},
+    )
+
+    # bulk iteration & len() use the biggest page
+    list(manager.list())
+    len(manager.list())
+    for call in responses.calls:
+        assert "page_size=%d" % base.Query.MAX_PAGE_SIZE in call.request.url
+
+
+@responses.activate
+def test_cache(manager):
+    _add_paged_server(total=250)
+    result = manager.list().cache()
+    assert isinstance(result, base.QueryResult)
+    assert len(responses.calls) == 0
+
+    # only fetches as far as it needs to
+    assert result[5].id == 5
+    assert len(responses.calls) == 1
+    assert not result.complete
+
+    assert [o.id for o in result] == list(range(250))
+    assert len(responses.calls) == 3
+    assert result.complete
+
+    # everything else comes from the cache
+    assert len(result) == 250
+    assert [o.id for o in result] == list(range(250))
+    assert result[-1].id == 249
+    assert [o.id for o in result[10:20:5]] == [10, 15]
+    assert [o.id for o in result[-2:]] == [248, 249]
+    assert result[0] is result[0]
+    assert len(responses.calls) == 3
+
+    with pytest.raises(IndexError):
+        result[250]
+    with pytest.raises(TypeError):
+        result["a"]
+
+
+@responses.activate
+def test_cache_spill(manager, tmp_path):
+    _add_paged_server(total=25)
+    with manager.list().page_size(10).cache(
+        max_in_memory=10, spill_dir=str(tmp_path)
+    ) as result:
+        assert [o.id for o in result] == list(range(25))
+        assert len(result._items) == 10
+        assert len(result._offsets) == 15
+
+        assert isinstance(result[20], FooModel)
+        assert result[20].id == 20
+        assert [o.id for o in result[8:12]] == [8, 9, 10, 11]
+        assert [o.id for o in result] == list(range(25))
+        assert len(responses.calls) == 3
+
+    # spilled results are gone once it's closed
+    assert result._spill is None
+    assert len(result) == 10
+    with pytest.raises(ValueError):
+        manager.list().cache(max_in_memory=-1)
+
+
+@responses.activate
+def test_cache_close(manager):
+    _add_paged_server(total=25)
+    result = manager.list().page_size(10).cache()
+    assert result[0].id == 0
+    result.close()
+    assert result.complete
+    assert len(result) == 1
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_cache_error(manager):
+    responses.add(
+        responses.GET,
+        FooManager.TEST_LIST_URL,
+        json=[{"id": id} for id in range(10)],
+        headers={
+            "Link": '<%s?page=2>; rel="page-next"' % FooManager.TEST_LIST_URL,
+            "X-Resource-Range": "0-10/25",
+        },
+        match=[matchers.query_param_matcher({"page_size": "10"})],
+    )
+    responses.add(
+        responses.GET,
+        FooManager.TEST_LIST_URL,
+        status=503,
+        match=[matchers.query_param_matcher({"page": "2"})],
+    )
+    result = manager.list().page_size(10).cache()
+    assert result[9].id == 9
+    for i in range(2):
+        # fails again rather than returning a truncated list
+        with pytest.raises(ServerError):
+            len(result)
+        with pytest.raises(ServerError):
+            list(result)
+    assert not result.complete
+    assert [o.id for o in result[:10]] == list(range(10))
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_raw(manager):
+    _add_paged_server(total=25)
+    rows = list(manager.list().raw())
+    assert rows == [{"id": id} for id in range(25)]
+
+    assert manager.list().raw()[3] == {"id": 3}
+    assert manager.list().raw().cache()[-1] == {"id": 24}
+    # chaining keeps raw mode
+    assert manager.list().raw().page_size(5)[7:9] == [{"id": 7}, {"id": 8}]
+
+
+@responses.activate
+def test_values(manager):
+    responses.add(
+        responses.GET,
+        FooManager.TEST_LIST_URL,
+        body=json.dumps(
+            [
+                {"id": 1, "name": "a", "group": {"id": 5, "name": "g"}},
+                {"id": 2, "name": "b", "group": None},
+            ]
+        ),
+        content_type="application/json",
+    )
+    q = manager.list()
+    assert list(q.values("id", "name", "group__name", "missing")) == [
+        (1, "a", "g", None),
+        (2, "b", None, None),
+    ]
+    assert list(q.values("group__id", flat=True)) == [5, None]
+
+    with pytest.raises(ValueError):
+        q.values()
+    with pytest.raises(ValueError):
+        q.values("id", "name", flat=True)
+
+
+def _add_full_results():
+    results = [
+        {
+            "id": id,
+            "url": FooManager.TEST_GET_URL % id,
+            "name": "foo %d" % id,
+            "data": {"big": True},
+        }
+        for id in range(3)
+    ]
+    responses.add(
+        responses.GET,
+        FooManager.TEST_LIST_URL,
+        body=json.dumps(results),
+        content_type="application/json",
+    )
+    for result in results:
+        responses.add(
+            responses.GET,
+            result["url"],
+            body=json.dumps(result),
+            content_type="application/json",
+        )
+
+
+@responses.activate
+def test_only(manager):
+    _add_full_results()
+    q = manager.list().only("name")
+    objects = list(q)
+    assert [o.name for o in objects] == ["foo 0", "foo 1", "foo 2"]
+    assert "data" not in objects[0].__dict__
+    assert len(responses.calls) == 1
+
+    # fetched on access
+    assert objects[0].data == {"big": True}
+    assert len(responses.calls) == 2
+    assert objects[0].data == {"big": True}
+    assert objects[1].name == "foo 1"
+    assert len(responses.calls) == 2
+
+    # other missing attributes aren't fetched
+    with pytest.raises(AttributeError):
+        objects[1].missing
+    assert not hasattr(objects[1], "missing")
+    assert getattr(objects[2], "missing", None) is None
+    with pytest.raises(AttributeError):
+        objects[2]._private
+    assert len(responses.calls) == 2
+
+    assert list(manager.list().only("name").raw()) == [
+        {"id": 0, "url": FooManager.TEST_GET_URL % 0, "name": "foo 0"},
+        {"id": 1, "url": FooManager.TEST_GET_URL % 1, "name": "foo 1"},
+        {"id": 2, "url": FooManager.TEST_GET_URL % 2, "name": "foo 2"},
+    ]
+
+
+@responses.activate
+def test_defer(manager):
+    _add_full_results()
+    objects = list(manager.list().defer("data").defer("url"))
+    assert objects[0].__dict__["name"] == "foo 0"
+    assert "data" not in objects[0].__dict__
+    assert objects[0].url == FooManager.TEST_GET_URL % 0
+    assert objects[0].data == {"big": True}
+
+    assert manager.list().only("a").defer("b")._deferred.defer == {"b"}
+    assert manager.list().defer("b").only("a")._deferred.only == {"a", "id", "url"}
+
+
+@responses.activate
+def test_compact(manager):
+    _add_full_results()
+    objects = list(manager.list().compact())
+    normal = list(manager.list())
+    obj = objects[1]
+    assert isinstance(obj, FooModel)
+    assert type(obj) is not FooModel
+    assert type(obj).__name__ == "FooModel"
+    assert {type(o) for o in objects} == {type(obj)}
+    assert "name" in type(obj).__slots__
+    assert obj.name == "foo 1"
+    assert obj.data == {"big": True}
+    assert obj == normal[1]
+    assert obj != normal[0]
+    assert obj._serialize() == normal[1]._serialize()
+    assert str(obj) == "1"
+
+    # unknown attributes overflow into __dict__
+    obj.colour = "blue"
+    assert obj.__dict__ == {"colour": "blue"}
+    assert obj._serialize()["colour"] == "blue"
+
+    copied = pickle.loads(pickle.dumps(obj))
+    assert type(copied) is type(obj)
+    assert copied.colour == "blue"
+    assert copied._serialize() == obj._serialize()
+
+
+@responses.activate
+def test_compact_only(manager):
+    _add_full_results()
+    objects = list(manager.list().only("name").compact())
+    assert objects[0].name == "foo 0"
+    assert "data" not in type(objects[0]).__slots__
+    assert len(responses.calls) == 1
+
+    # deferred fields are fetched on access
+    assert objects[0].data == {"big": True}
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_only_server_side(manager, monkeypatch):
+    monkeypatch.setattr(FooManager, "_FIELDS_PARAM", "fields", raising=False)
+    _add_full_results()
+    q = manager.list().only("name", "id")
+    assert _request_params_url(q._to_url()) == {"fields": "id,name,url"}
+    assert list(q.values("name", "data")) == [
+        ("foo 0", None),
+        ("foo 1", None),
+        ("foo 2", None),
+    ]
+
+    obj = manager._get(FooManager.TEST_GET_URL % 1, fields=["name"])
+    assert _request_params(1) == {"fields": "id,name,url"}
+    assert obj.name == "foo 1"
+    assert "data" not in obj.__dict__
+
+
+@responses.activate
+def test_get_fields():
+    client = Client(host="test.koordinates.com", token="test")
+    url = client.get_url("LAYER", "GET", "single", {"id": 1})
+    responses.add(
+        responses.GET,
+        url,
+        body=json.dumps({"id": 1, "url": url, "name": "a", "data": {"crs": "x"}}),
+        content_type="application/json",
+    )
+    layer = client.layers.get(1, fields=["name"])
+    assert layer.name == "a"
+    assert "data" not in layer.__dict__
+    assert str(layer) == "1"
+    assert len(responses.calls) == 1
+
+    layer.data
+    assert layer.data.crs == "x"
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_get_many(manager):
+    for id in (1, 2):
+        responses.add(
+            responses.GET,
+            FooManager.TEST_GET_URL % id,
+            body=json.dumps({"id": id}),
+            content_type="application/json",
+        )
+    responses.add(responses.GET, FooManager.TEST_GET_URL % 3, status=404)
+
+    objs, errors = manager.get_many([2, 3, 1, 2], concurrency=2)
+    assert [o.id for o in objs] == [2, 1]
+    assert list(errors) == [3]
+    assert errors[3].response.status_code == 404
+    assert len(responses.calls) == 3
+
+    assert manager.get_many([]) == ([], {})
+    with pytest.raises(ValueError):
+        manager.get_many([1], concurrency=0)
+
+
+@responses.activate
+def test_get_many_connection_error(manager):
+    responses.add(
+        responses.GET,
+        FooManager.TEST_GET_URL % 1,
+        body=json.dumps({"id": 1}),
+        content_type="application/json",
+    )
+    responses.add(
+        responses.GET,
+        FooManager.TEST_GET_URL % 2,
+        body=requests.ConnectionError("Connection refused"),
+    )
+    responses.add(
+        responses.GET,
+        FooManager.TEST_GET_URL % 3,
+        body="<html>",
+        content_type="application/json",
+    )
+
+    objs, errors = manager.get_many([1, 2, 3])
+    assert [o.id for o in objs] == [1]
+    assert sorted(errors) == [2, 3]
+    assert isinstance(errors[2], ServerError)
+    assert isinstance(errors[3], requests.RequestException)
+
+
+@responses.activate
+def test_get_many_id_filter(manager):
+    manager._ID_FILTER = "id"
+
+    def callback(request):
+        ids = parse_qs(urlparse(request.url).query)["id"][0].split(",")
+        assert request.headers["Expand"] == "list"
+        body = json.dumps([{"id": int(id)} for id in ids if int(id) % 50])
+        return (200, {}, body)
+
+    responses.add_callback(
+        responses.GET,
+        FooManager.TEST_LIST_URL,
+        callback=callback,
+        content_type="application/json",
+    )
+
+    ids = list(range(150, 0, -1))
+    objs, errors = manager.get_many(ids + ids[:10])
+    assert [o.id for o in objs] == [id for id in ids if id % 50]
+    assert sorted(errors) == [50, 100, 150]
+    assert "50 not found" in str(errors[50])
+    assert len(responses.calls) == 2
+    assert sorted(len(_request_params(i)["id"].split(",")) for i in (0, 1)) == [
+        50,
+        100,
+    ]
+
+
+def _add_changing_server(items):
+    """ Serves ``items``, filtered & sorted by updated_at """
+
+    def callback(request):
+        params = parse_qs(urlparse(request.url).query)
+        assert params["sort"] == ["updated_at"]
+        since = params.get("updated_at.gte", [""])[0]
+        results = sorted(
+            (i for i in items if i["updated_at"] >= since),
+            key=lambda i: i["updated_at"],
+        )
+        return (200, {}, json.dumps(results))
+
+    responses.add_callback(
+        responses.GET,
+        FooManager.TEST_LIST_URL,
+        callback=callback,
+        content_type="application/json",
+    )
+
+
+@responses.activate
+def test_changed_since(manager, tmp_path):
+    items = [
+        {"id": 1, "updated_at": "2020-01-01T10:00:00+00:00"},
+        {"id": 2, "updated_at": "2020-01-01T11:00:00+00:00"},
+        {"id": 3, "updated_at": "2020-01-01T11:00:00+00:00"},
+    ]
+    _add_changing_server(items)
+    q = base.Query(
+        manager,
+        FooManager.TEST_LIST_URL,
+        valid_filter_attributes=("updated_at",),
+        valid_sort_attributes=("updated_at",),
+    )
+    path = str(tmp_path / "sync.checkpoint")
+
+    assert [o.id for o in q.changed_since(path)] == [1, 2, 3]
+    with open(path) as fp:
+        checkpoint = json.load(fp)
+    assert checkpoint["updated_at"] == "2020-01-01T11:00:00+00:00"
+    assert sorted(checkpoint["seen"].values()) == [items[1]["updated_at"]] * 2
+
+    # nothing's changed
+    assert list(q.changed_since(path)) == []
+    assert _request_params(1)["updated_at.gte"] == "2020-01-01T10:55:00+00:00"
+
+    # a tie with the checkpoint, and a late change within the skew
+    items.append({"id": 4, "updated_at": "2020-01-01T11:00:00+00:00"})
+    items.append({"id": 5, "updated_at": "2020-01-01T10:58:00+00:00"})
+    items[0]["updated_at"] = "2020-01-01T12:00:00+00:00"
+    assert [o.id for o in q.changed_since(path)] == [5, 4, 1]
+    assert list(q.changed_since(path)) == []
+    assert os.listdir(str(tmp_path)) == ["sync.checkpoint"]
+
+    # abandoned iteration doesn't move the checkpoint
+    items[1]["updated_at"] = "2020-01-01T13:00:00+00:00"
+    items[2]["updated_at"] = "2020-01-01T13:00:00+00:00"
+    changes = q.changed_since(path)
+    assert next(changes).id == 2
+    changes.close()
+    assert [o.id for o in q.changed_since(path)] == [2, 3]
+
+
+def test_save_checkpoint(tmp_path):
+    path = str(tmp_path / "sync.checkpoint")
+
+    def save(i):
+        for j in range(20):
+            base._save_checkpoint(path, {"writer": i, "n": j})
+
+    threads = [threading.Thread(target=save, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert base._load_checkpoint(path)["n"] == 19
+    assert os.listdir(str(tmp_path)) == ["sync.checkpoint"]
+
+    # a failed save leaves the old checkpoint in place
+    with pytest.raises(TypeError):
+        base._save_checkpoint(path, {"n": object()})
+    assert base._load_checkpoint(path)["n"] == 19
+    assert os.listdir(str(tmp_path)) == ["sync.checkpoint"]
+
+
+@responses.activate
+def test_changed_since_callback(manager):
+    _add_changing_server([{"id": 1, "updated_at": "2020-01-01T10:00:00+00:00"}])
+    q = base.Query(
+        manager,
+        FooManager.TEST_LIST_URL,
+        valid_filter_attributes=("updated_at",),
+        valid_sort_attributes=("updated_at",),
+    )
+    saved = []
+    assert len(list(q.raw().changed_since(None, save=saved.append))) == 1
+    assert saved[0]["updated_at"] == "2020-01-01T10:00:00+00:00"
+    assert list(q.changed_since(saved[0], save=saved.append)) == []
+    assert len(saved) == 2
+
+    with pytest.raises(TypeError):
+        q.changed_since(None)
+    with pytest.raises(ClientValidationError):
+        manager.list().changed_since(None, save=saved.append)
+
+
+@responses.activate
+def test_cursor(manager):
+    _add_paged_server(total=25)
+    q = manager.list().page_size(10)
+    assert q.cursor is None
+
+    results = iter(q)
+    assert [next(results).id for i in range(13)] == list(range(13))
+    cursor = q.cursor
+    assert cursor.position == 13
+    assert cursor.offset == 3
+    assert cursor.count == 25
+    assert _request_params_url(cursor.url) == {"page": "2", "page_size": "10"}
+    results.close()
+
+    # resume in a new query, from a serialized cursor
+    data = json.loads(json.dumps(cursor.as_dict()))
+    assert base.QueryCursor.from_dict(data) == cursor
+    assert pickle.loads(pickle.dumps(cursor)) == cursor
+    resumed = manager.list().page_size(10).resume(data)
+    calls = len(responses.calls)
+    assert [o.id for o in resumed] == list(range(13, 25))
+    assert len(responses.calls) == calls + 2
+    assert resumed.cursor.done
+    assert resumed.cursor.position == 25
+
+    # resuming at the end of a page starts at the next one
+    results = iter(q)
+    assert [next(results).id for i in range(10)] == list(range(10))
+    assert (q.cursor.offset, q.cursor.position) == (0, 10)
+    calls = len(responses.calls)
+    assert [o.id for o in q.resume(q.cursor)] == list(range(10, 25))
+    assert len(responses.calls) == calls + 2
+
+    # resuming when finished
+    assert list(q.resume(resumed.cursor)) == []
+
+    with pytest.raises(ValueError):
+        manager.list().resume(cursor)
+
+    # pages may arrive out of order, so there's no position to resume from
+    q = manager.list().page_size(10).parallel(ordered=False)
+    assert sorted(o.id for o in q) == list(range(25))
+    with pytest.raises(ValueError):
+        q.cursor
+
+
+@responses.activate
+def test_checkpoint(manager):
+    _add_paged_server(total=25)
+    cursors = []
+    q = manager.list().page_size(5).checkpoint(cursors.append, every=2)
+    assert [o.id for o in q] == list(range(25))
+    assert [c.position for c in cursors] == [10, 20]
+    assert all(c.offset == 0 for c in cursors)
+
+    # resume from the last checkpoint, in parallel
+    resumed = manager.list().page_size(5).parallel(workers=2).resume(cursors[0])
+    assert [o.id for o in resumed] == list(range(10, 25))
+
+    with pytest.raises(ValueError):
+        manager.list().checkpoint(cursors.append, every=0)
+    with pytest.raises(ValueError):
+        list(manager.list().parallel(ordered=False).checkpoint(cursors.append))
+
+
+@responses.activate
+def test_iter_pages(manager):
+    _add_paged_server(total=25)
+    q = manager.list().page_size(10)
+    pages = list(q.iter_pages())
+    assert [len(p) for p in pages] == [10, 10, 5]
+    assert [p.range for p in pages] == ["0-10/25", "10-20/25", "20-25/25"]
+    assert [p.position for p in pages] == [0, 10, 20]
+    assert pages[0].count == 25
+    assert isinstance(pages[0].items[0], FooModel)
+    assert [o.id for o in pages[1]] == list(range(10, 20))
+    assert pages[0].results[0] == {"id": 0}
+    assert pages[0].url == responses.calls[0].request.url
+    assert pages[0].next_url == responses.calls[1].request.url
+    assert pages[2].next_url is None
+    assert pages[0].bytes == len(responses.calls[0].response.content)
+    assert all(p.elapsed >= 0 for p in pages)
+    assert q.cursor.done
+
+    # other modes
+    assert [p.items for p in q.raw().prefetch(2).iter_pages()][2] == [
+        {"id": id} for id in range(20, 25)
+    ]
+    pages = list(q.values("id", flat=True).parallel(workers=2).iter_pages())
+    assert [p.items for p in pages] == [
+        list(range(0, 10)),
+        list(range(10, 20)),
+        list(range(20, 25)),
+    ]
+
+    # resuming part way through a page
+    results = iter(q)
+    [next(results) for i in range(13)]
+    pages = list(q.resume(q.cursor).iter_pages())
+    assert [(p.offset, p.position, len(p)) for p in pages] == [(3, 13, 7), (0, 20, 5)]
+    assert [o.id for o in pages[0]] == list(range(13, 20))
+
+
+def test_iter_json_array():
+    data = [{"id": 1, "name": "caf\u00e9 \u2603", "nested": [1, {"a": "]"}]}, 12345, "s", []]
+    encoded = json.dumps(data, ensure_ascii=False).encode("utf-8")
+    for size in (1, 2, 7, len(encoded)):
+        chunks = [encoded[i : i + size] for i in range(0, len(encoded), size)]
+        assert list(base._iter_json_array(chunks)) == data
+
+    assert list(base._iter_json_array([b" [ ", b"]  "])) == []
+    with pytest.raises(ValueError):
+        list(base._iter_json_array([b'[{"id": 1}, {"id"']))
+    with pytest.raises(ValueError):
+        list(base._iter_json_array([b'{"id": 1}']))
+
+    # malformed arrays, whole & a byte at a time
+    for encoded in (b"[1 2]", b"[1,,2]", b"[,1]", b"[1,]", b"[1]garbage", b"[1"):
+        with pytest.raises(ValueError):
+            list(base._iter_json_array([encoded]))
+        chunks = [encoded[i : i + 1] for i in range(len(encoded))]
+        with pytest.raises(ValueError):
+            list(base._iter_json_array(chunks))
+
+
+@responses.activate
+def test_stream(manager):
+    _add_paged_server(total=25)
+    q = manager.list().page_size(10).stream(chunk_size=16)
+    results = iter(q)
+    assert next(results).id == 0
+    # the first result arrives before the page has been read
+    body = json.dumps([{"id": id} for id in range(10)])
+    assert responses.calls[0].response.raw.tell() < len(body)
+
+    assert [o.id for o in results] == list(range(1, 25))
+    assert len(responses.calls) == 3
+    assert q.cursor.done
+
+    pages = list(q.raw().iter_pages())
+    assert [len(p) for p in pages] == [10, 10, 5]
+    assert [p.position for p in pages] == [0, 10, 20]
+    assert pages[0].bytes == len(body)
+    assert pages[1].items[0] == {"id": 10}
+
+    # elapsed includes reading & decoding the body
+    page = q._stream_page(q._to_url())
+    headers_elapsed = page.elapsed
+    assert len(list(page.results)) == 10
+    assert page.elapsed > headers_elapsed
+
+    # resume part way through a page
+    results = iter(q)
+    [next(results) for i in range(13)]
+    cursor = q.cursor
+    results.close()
+    assert (cursor.offset, cursor.position) == (3, 13)
+    assert [o.id for o in q.resume(cursor)] == list(range(13, 25))
+
+    # parallel & prefetch are ignored
+    assert len(list(q.parallel(workers=4).prefetch(2))) == 25
+
+    with pytest.raises(ValueError):
+        manager.list().stream(chunk_size=0)
 
 
 @responses.activate
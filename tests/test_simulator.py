@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the `koordinates.simulator` module.
+"""
+
+import io
+import time
+
+import pytest
+
+from koordinates import Export, Layer, Set, RateLimitExceeded, NotFound
+from koordinates.sources import UploadSource
+from koordinates.simulator import Simulator, layer_payload
+
+
+@pytest.fixture
+def sim():
+    return Simulator(layers=250, sets=20, sources=5, exports=3)
+
+
+@pytest.fixture
+def client(sim):
+    return sim.client()
+
+
+def test_layer_payload():
+    o = layer_payload(12)
+    assert o == layer_payload(12)
+    assert o["id"] == 12
+    assert o["url"] == "https://test.koordinates.com/services/api/v1/layers/12/"
+    assert "data" in o
+
+    summary = layer_payload(12, expanded=False)
+    assert set(summary) < set(o)
+
+
+def test_pagination(sim, client):
+    q = client.layers.list()
+    assert len(q) == 250
+    assert sim.request_count == 1
+
+    ids = [layer.id for layer in q]
+    assert ids == list(range(1, 251))
+    # 3 pages, the first one was fetched by len()
+    assert sim.request_count == 3
+    assert sim.requests["GET /layers/"] == 3
+
+
+def test_page_size(sim, client):
+    r = client.request(
+        "GET", client.get_url("LAYER", "GET", "multi") + "?page_size=30&page=2"
+    )
+    assert len(r.json()) == 30
+    assert r.headers["X-Resource-Range"] == "30-60/250"
+    assert "page=3" in r.links["page-next"]["url"]
+    assert "page_size=30" in r.links["page-next"]["url"]
+
+    # limited by max_page_size
+    r = client.request(
+        "GET", client.get_url("LAYER", "GET", "multi") + "?page_size=1000"
+    )
+    assert len(r.json()) == 100
+
+
+def test_expand(client):
+    layer = client.layers.list()[0]
+    assert layer.data is None
+
+    layer = client.layers.list().expand()[0]
+    assert layer.data.crs == "EPSG:2193"
+    assert layer.created_at.year == 2015
+
+
+def test_filter_and_sort(client):
+    q = client.layers.list().filter(kind="raster")
+    assert {l.kind for l in q.expand()} == {"raster"}
+    assert len(q) == 50
+
+    q = client.layers.list().filter(updated_at__gte="2015-03-01T00:00:00Z")
+    assert 0 < len(q) < 250
+    assert all(l.updated_at.month >= 3 for l in q.expand())
+
+    q = client.layers.list().order_by("-created_at")
+    assert q[0].id == 250
+
+
+def test_catalog(client):
+    results = list(client.catalog.list())
+    assert len(results) == 270
+    assert {type(o) for o in results} == {Layer, Set}
+
+
+def test_get_and_not_found(client):
+    assert client.layers.get(10).name == "Layer 10"
+    assert client.sets.get(3).title == "Set 3"
+    with pytest.raises(NotFound):
+        client.layers.get(1000)
+
+
+def test_create_layer(sim, client):
+    layer = Layer(name="New layer")
+    layer = client.layers.create(layer)
+    assert layer.id == 251
+    assert layer.name == "New layer"
+    assert len(client.layers.list()) == 251
+
+
+def test_export_lifecycle(sim, client):
+    sim.export_delay = 0.05
+
+    export = Export()
+    export.add_item(client.layers.get(3))
+    export = client.exports.create(export)
+    assert export.state == "processing"
+
+    time.sleep(0.05)
+    export.refresh()
+    assert export.state == "complete"
+
+    fp = io.BytesIO()
+    export.download(fp)
+    assert len(fp.getvalue()) == sim.export_size
+
+
+def test_upload_source(sim, client):
+    progress = []
+
+    source = UploadSource(title="test")
+    source.add_file(io.BytesIO(b"x" * 1000), "data.csv")
+    source = client.sources.create(
+        source, upload_progress_callback=lambda n, total: progress.append(n)
+    )
+    assert source.id == 6
+    assert source.title == "test"
+    assert progress[-1] > 1000
+
+
+def test_latency_and_bandwidth():
+    sim = Simulator(latency=0.02, bandwidth=10 * 1024**2, export_size=1024**2)
+    client = sim.client()
+
+    t0 = time.perf_counter()
+    client.layers.get(1)
+    assert time.perf_counter() - t0 >= 0.02
+
+    t0 = time.perf_counter()
+    client.exports.get(1).download(io.BytesIO())
+    # 1MB at 10MB/s
+    assert time.perf_counter() - t0 >= 0.1
+
+
+def test_rate_limit():
+    client = Simulator(rate_limit_every=3).client()
+    client.layers.get(1)
+    client.layers.get(1)
+    with pytest.raises(RateLimitExceeded) as cm:
+        client.layers.get(1)
+    assert cm.value.response.headers["Retry-After"] == "1"
+
+    client = Simulator(rate_limit=1.0).client()
+    with pytest.raises(RateLimitExceeded):
+        client.layers.get(1)
+
+
+def test_head(sim, client):
+    r = client.request("HEAD", client.get_url("LAYER", "GET", "multi"))
+    assert r.headers["X-Resource-Range"] == "0-100/250"
+    assert r.content == b""
+
+
+def test_threads(sim, client):
+    import concurrent.futures
+
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        layers = list(pool.map(client.layers.get, range(1, 101)))
+    assert [l.id for l in layers] == list(range(1, 101))
+    assert sim.request_count == 100
+
+
+def test_session_reset(sim, client):
+    client.layers.get(1)
+    # simulate a fork: the new session still uses the simulator
+    client._session_pid = -1
+    client.layers.get(2)
+    assert sim.request_count == 2